@@ -0,0 +1,226 @@
+# benchmarks/mock_llm_server.py
+"""
+Local stand-in for a chat-completions API, for benchmarks and keyless runs.
+
+Accepts POST .../chat/completions with the OpenAI/Cerebras request shape and
+answers the prompts this package sends with canned content:
+  - domain classification -> a domain chosen deterministically per statement
+  - statement extraction  -> the text split into sentences
+  - batched scoring       -> "N. score" lines
+  - single scoring        -> a score, or a 0-9 digit for bucketed prompts
+    (with top log-probabilities when the request asks for logprobs)
+Latency is drawn from a configurable distribution, and a configurable
+fraction of requests fail with 429 or 500.
+
+Usage:
+    python benchmarks/mock_llm_server.py --port 8765 --latency lognormal --median-ms 200
+    export CEREBRAS_BASE_URL=http://127.0.0.1:8765 CEREBRAS_API_KEY=mock
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+# Domains whose checks need no external services.
+DEFAULT_DOMAINS = ("history", "general", "logic", "math", "none")
+
+
+class MockLLMConfig:
+    """
+    Behaviour of the mock server.
+    """
+
+    def __init__(self,
+                 latency: str = "lognormal",
+                 median_ms: float = 100.0,
+                 sigma: float = 0.5,
+                 max_ms: Optional[float] = None,
+                 error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0,
+                 domains: Tuple[str, ...] = DEFAULT_DOMAINS,
+                 score: Optional[float] = None,
+                 seed: Optional[int] = None):
+        """
+        :param latency: "fixed", "uniform" (0 to 2 x median) or "lognormal".
+        :param median_ms: Median response latency in milliseconds.
+        :param sigma: Log-space standard deviation for the lognormal distribution.
+        :param max_ms: Cap on a single response latency.
+        :param error_rate: Fraction of requests answered with HTTP 500.
+        :param rate_limit_rate: Fraction of requests answered with HTTP 429.
+        :param domains: Domains returned for classification prompts.
+        :param score: Fixed truth score; None draws a score per statement (stable per text).
+        :param seed: Seed for latency and error sampling.
+        """
+        self.latency = latency
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.max_ms = max_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.domains = domains
+        self.score = score
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        with self.rng_lock:
+            if self.latency == "fixed":
+                ms = self.median_ms
+            elif self.latency == "uniform":
+                ms = self.rng.uniform(0, 2 * self.median_ms)
+            else:
+                ms = self.rng.lognormvariate(0, self.sigma) * self.median_ms
+        if self.max_ms is not None:
+            ms = min(ms, self.max_ms)
+        return ms / 1000
+
+    def sample_error(self) -> Optional[int]:
+        with self.rng_lock:
+            roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+
+def _stable_fraction(text: str) -> float:
+    return int(hashlib.sha256(text.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+def canned_response(prompt: str, config: MockLLMConfig) -> str:
+    """Answer one of the package's prompt types."""
+    if "Classify" in prompt or "classify" in prompt:
+        statement = prompt.rstrip().splitlines()[-1]
+        return config.domains[int(_stable_fraction(statement) * len(config.domains)) % len(config.domains)]
+    if prompt.rstrip().endswith("Statements:"):
+        match = re.search(r"Text:(.*)Statements:\s*$", prompt, re.S)
+        text = match.group(1) if match else ""
+        return "\n".join(s.strip() for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s.strip())
+    count = re.search(r"following (\d+)", prompt)
+    if count:
+        lines = re.findall(r"^\s*(\d+)\. (.*)$", prompt, re.M)
+        by_number = {int(n): text for n, text in lines}
+        return "\n".join(f"{i}. {_score(by_number.get(i, str(i)), config):.2f}"
+                         for i in range(1, int(count.group(1)) + 1))
+    if "single digit from 0 to 9" in prompt:
+        return str(round(_score(prompt, config) * 9))
+    return f"{_score(prompt, config):.2f}"
+
+
+def _logprobs(content: str, top: int) -> dict:
+    """OpenAI-style logprobs for a one-token answer: most mass on it, the rest on its neighbours."""
+    alternatives = [{"token": content, "logprob": math.log(0.8)}]
+    if content.isdigit() and len(content) == 1:
+        neighbours = [str(d) for d in (int(content) - 1, int(content) + 1) if 0 <= d <= 9]
+        alternatives += [{"token": d, "logprob": math.log(0.2 / len(neighbours))} for d in neighbours]
+    return {"content": [{"token": content, "logprob": alternatives[0]["logprob"], "top_logprobs": alternatives[:top]}]}
+
+
+def _score(text: str, config: MockLLMConfig) -> float:
+    return config.score if config.score is not None else round(_stable_fraction(text), 2)
+
+
+def _make_handler(config: MockLLMConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("retry-after", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            # SDKs may probe the base URL to warm the connection.
+            self._send(200, {"status": "ok"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("chat/completions"):
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            time.sleep(config.sample_latency())
+            error = config.sample_error()
+            if error is not None:
+                self._send(error, {"error": {"message": "mock failure", "type": "mock", "code": error}})
+                return
+            messages: List[dict] = request.get("messages") or [{"content": ""}]
+            prompt = messages[-1].get("content") or ""
+            content = canned_response(prompt, config)
+            prompt_tokens, completion_tokens = len(prompt.split()), len(content.split())
+            choice = {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+            if request.get("logprobs"):
+                choice["logprobs"] = _logprobs(content, request.get("top_logprobs") or 1)
+            self._send(200, {
+                "id": f"mock-{time.time_ns()}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [choice],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+
+    return Handler
+
+
+def start_server(config: MockLLMConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve in a background thread; server.server_address holds the bound port."""
+    server = ThreadingHTTPServer((host, port), _make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-llm-server", daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--median-ms", type=float, default=100.0, help="Median response latency")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Lognormal spread")
+    parser.add_argument("--max-ms", type=float, default=None, help="Latency cap")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of HTTP 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of HTTP 429 responses")
+    parser.add_argument("--score", type=float, default=None, help="Fixed truth score for every statement")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> MockLLMConfig:
+    return MockLLMConfig(latency=args.latency, median_ms=args.median_ms, sigma=args.sigma, max_ms=args.max_ms,
+                         error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, score=args.score,
+                         seed=args.seed)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run a mock chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(config_from_args(args)))
+    print(f"Mock LLM server listening on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
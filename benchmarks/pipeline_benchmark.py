@@ -0,0 +1,217 @@
+# benchmarks/pipeline_benchmark.py
+"""
+End-to-end throughput and latency benchmark against the local mock LLM server.
+
+Scores synthetic corpora of several sizes with each StatementParser setting
+and reports, per run: documents/sec, p50/p95/p99 statement latency (time from
+document start until the statement's result is streamed) and LLM calls per
+statement. No API keys are needed; all LLM traffic goes to
+benchmarks/mock_llm_server.py.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py --docs 5 20 --modes hybrid llm --output results.json
+    python benchmarks/pipeline_benchmark.py --baseline results.json --tolerance 0.15
+
+With --baseline, the run exits with status 1 when docs/sec of any matching
+run drops by more than the tolerance, so throughput regressions fail CI. Any
+run with a failed document, or with no statements scored, also exits with
+status 1; docs/sec counts successfully scored documents only.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_llm_server import add_config_arguments, config_from_args, start_server  # noqa: E402
+
+_SENTENCES = [
+    "The Treaty of Versailles was signed in {year}.",
+    "The Roman Empire was ruled by Augustus after {year} BC.",
+    "{a} + {b} = {c}.",
+    "{a} is a prime number.",
+    "Water boils at {a} degrees Celsius at sea level.",
+    "If all birds can fly and penguins are birds, then penguins can fly.",
+    "Mount Everest is the tallest mountain on Earth.",
+    "The novel was published by a small press in {year}.",
+    "She later moved to Paris, where she wrote most of her work.",
+    "It was the largest city in the region at the time.",
+]
+
+
+def make_document(rng: random.Random, paragraphs: int, sentences_per_paragraph: int) -> str:
+    out = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(sentences_per_paragraph):
+            a, b = rng.randint(2, 500), rng.randint(2, 500)
+            c = a + b if rng.random() < 0.7 else a + b + rng.randint(1, 9)
+            sentences.append(rng.choice(_SENTENCES).format(year=rng.randint(1500, 2000), a=a, b=b, c=c))
+        out.append(" ".join(sentences))
+    return "\n\n".join(out)
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_case(documents: List[str], extraction_mode: str, max_tokens: int,
+             classify_workers: int, check_workers: int) -> Dict:
+    from hallucination_detection.check_aggregator import CheckAggregator
+    from hallucination_detection.metrics import get_metrics
+    from hallucination_detection.pipeline import stream_document
+    from hallucination_detection.statement_parser import StatementParser
+
+    metrics = get_metrics()
+    metrics.reset()
+    parser = StatementParser(max_tokens=max_tokens, split_by_paragraph=True, extraction_mode=extraction_mode)
+    aggregator = CheckAggregator()
+
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    for doc_num, text in enumerate(documents):
+        doc_start = time.perf_counter()
+        doc_latencies = []
+        try:
+            for _ in stream_document(text, parser=parser, aggregator=aggregator,
+                                     classify_workers=classify_workers, check_workers=check_workers):
+                doc_latencies.append(time.perf_counter() - doc_start)
+        except Exception as e:
+            errors += 1
+            print(f"{extraction_mode} max_tokens={max_tokens}: document {doc_num} failed: "
+                  f"{type(e).__name__}: {e}", file=sys.stderr)
+            continue
+        latencies.extend(doc_latencies)
+    elapsed = time.perf_counter() - start
+    aggregator.close()
+    scored_docs = len(documents) - errors
+
+    summary = metrics.summary()
+    llm_calls = sum(row["value"] for row in summary.get("llm_calls_total", []))
+    statements = len(latencies)
+    return {
+        "extraction_mode": extraction_mode,
+        "max_tokens": max_tokens,
+        "docs": len(documents),
+        "statements": statements,
+        "failed_docs": errors,
+        "elapsed_s": round(elapsed, 4),
+        "docs_per_s": round(scored_docs / elapsed, 4) if elapsed else 0.0,
+        "statement_latency_s": {
+            "p50": round(percentile(latencies, 50), 4),
+            "p95": round(percentile(latencies, 95), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "mean": round(statistics.fmean(latencies), 4) if latencies else 0.0,
+        },
+        "llm_calls": llm_calls,
+        "llm_calls_per_statement": round(llm_calls / statements, 4) if statements else 0.0,
+        "stages": {row["stage"]: row["sum"] for row in summary.get("stage_seconds", [])},
+    }
+
+
+def _case_key(result: Dict) -> tuple:
+    return result["extraction_mode"], result["max_tokens"], result["docs"]
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Return descriptions of runs whose docs/sec fell more than tolerance below the baseline."""
+    previous = {_case_key(r): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(_case_key(result))
+        if before and result["docs_per_s"] < before["docs_per_s"] * (1 - tolerance):
+            regressions.append(f"{_case_key(result)}: {before['docs_per_s']} -> {result['docs_per_s']} docs/s")
+    return regressions
+
+
+def failures(results: List[Dict]) -> List[str]:
+    """Return descriptions of runs with failed documents or without any scored statement."""
+    return [f"{_case_key(r)}: {r['failed_docs']} failed documents, {r['statements']} statements"
+            for r in results if r["failed_docs"] > 0 or r["statements"] == 0]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scoring pipeline against a mock LLM server")
+    parser.add_argument("--docs", type=int, nargs="+", default=[5, 20], help="Corpus sizes (documents)")
+    parser.add_argument("--paragraphs", type=int, default=3, help="Paragraphs per document")
+    parser.add_argument("--sentences", type=int, default=4, help="Sentences per paragraph")
+    parser.add_argument("--modes", nargs="+", default=["hybrid", "local", "llm"],
+                        help="StatementParser extraction modes")
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[600],
+                        help="StatementParser token budget per partition")
+    parser.add_argument("--classify-workers", type=int, default=4)
+    parser.add_argument("--check-workers", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=1000.0,
+                        help="Client-side rate limit per model (keep high to measure the pipeline, not the limiter)")
+    parser.add_argument("--corpus-seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare docs/sec against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed docs/sec drop vs. baseline")
+    add_config_arguments(parser)
+    parser.set_defaults(median_ms=20.0)
+    args = parser.parse_args(argv)
+
+    server = start_server(config_from_args(args))
+    os.environ["CEREBRAS_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("CEREBRAS_API_KEY", "mock")
+    from hallucination_detection.llm import get_registry
+    get_registry().configure_rate_limit("cerebras", requests_per_second=args.rps, burst=max(1, int(args.rps)))
+
+    rng = random.Random(args.corpus_seed)
+    corpus = [make_document(rng, args.paragraphs, args.sentences) for _ in range(max(args.docs))]
+
+    results = []
+    for mode in args.modes:
+        for max_tokens in args.max_tokens:
+            for size in args.docs:
+                result = run_case(corpus[:size], mode, max_tokens, args.classify_workers, args.check_workers)
+                results.append(result)
+                print(f"{mode:6s} max_tokens={max_tokens:<4d} docs={size:<4d} {result['docs_per_s']:8.2f} docs/s  "
+                      f"p50={result['statement_latency_s']['p50'] * 1000:7.1f} ms  "
+                      f"p95={result['statement_latency_s']['p95'] * 1000:7.1f} ms  "
+                      f"p99={result['statement_latency_s']['p99'] * 1000:7.1f} ms  "
+                      f"calls/stmt={result['llm_calls_per_statement']:.2f}", file=sys.stderr)
+    server.shutdown()
+
+    report = {
+        "config": {"latency": args.latency, "median_ms": args.median_ms, "error_rate": args.error_rate,
+                   "rate_limit_rate": args.rate_limit_rate, "paragraphs": args.paragraphs,
+                   "sentences": args.sentences, "classify_workers": args.classify_workers,
+                   "check_workers": args.check_workers},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    else:
+        print(json.dumps(report, indent=2))
+
+    failed = failures(results)
+    for line in failed:
+        print(f"FAILED {line}", file=sys.stderr)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
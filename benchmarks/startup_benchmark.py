@@ -0,0 +1,71 @@
+# benchmarks/startup_benchmark.py
+"""
+Measure CLI startup cost: the time a fresh interpreter needs to import
+hallucination_detection.main and build a CheckAggregator, which is what every
+short-lived `python -m hallucination_detection.main` worker pays before its
+first LLM call. No API calls are made.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 10] [--json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP_SNIPPET = """
+import sys, time, json
+start = time.perf_counter()
+import hallucination_detection.main
+imported = time.perf_counter()
+from hallucination_detection.check_aggregator import CheckAggregator
+aggregator = CheckAggregator()
+built = time.perf_counter()
+heavy = [m for m in ("scholarly", "arxiv", "newsapi", "cerebras.cloud.sdk") if m in sys.modules]
+print(json.dumps({"import_s": imported - start, "construct_s": built - imported, "heavy_modules": heavy}))
+"""
+
+
+def run_once() -> dict:
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", STARTUP_SNIPPET],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["wall_s"] = wall
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark hallucination_detection CLI startup time")
+    parser.add_argument("--runs", type=int, default=10, help="Number of fresh interpreters to start")
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable summary")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    summary = {"runs": args.runs, "heavy_modules": runs[-1]["heavy_modules"]}
+    for field in ("wall_s", "import_s", "construct_s"):
+        values = [r[field] for r in runs]
+        summary[field] = {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for field in ("wall_s", "import_s", "construct_s"):
+            stats = summary[field]
+            print(f"{field:12s} median={stats['median'] * 1000:8.1f} ms  "
+                  f"min={stats['min'] * 1000:8.1f} ms  max={stats['max'] * 1000:8.1f} ms")
+        print(f"heavy modules loaded at startup: {summary['heavy_modules'] or 'none'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# hallucination_detection/batch.py
+"""
+Multi-document batch scoring.
+
+Documents from a directory, glob or JSONL file are fanned out across a process
+pool; each worker keeps one warm CheckAggregator and checks a document's
+statements concurrently. Finished document ids are appended to a checkpoint
+file, so an interrupted run resumes without re-scoring them. Results are
+written as sharded JSONL (or Parquet when pyarrow is installed).
+
+Usage:
+    python -m hallucination_detection.batch INPUT --output-dir results/ [--workers 4]
+"""
+
+import argparse
+import asyncio
+import glob
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .deadline import default_budget
+from .debug_logger import set_debug_level, debug_print, DEBUG_ERROR, DEBUG_INFO, DEBUG_WARNING
+
+CHECKPOINT_FILE = "checkpoint.txt"
+
+# Per-process state, built once by the pool initializer.
+_worker_parser = None
+_worker_aggregator = None
+_worker_concurrency = None
+_worker_budget = None
+
+
+def iter_documents(source: str, text_field: str = "text", id_field: str = "id") -> Iterator[Tuple[str, str]]:
+    """
+    Yield (doc_id, text) from a directory of .txt files, a glob pattern or a
+    JSONL file with one document object per line.
+    """
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "**", "*.txt"), recursive=True))
+        yield from _iter_text_files(paths, source)
+    elif source.endswith(".jsonl") and os.path.isfile(source):
+        with open(source, "r") as f:
+            for line_num, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                yield str(record.get(id_field, line_num)), record[text_field]
+    else:
+        paths = sorted(glob.glob(source, recursive=True))
+        if not paths and os.path.isfile(source):
+            paths = [source]
+        yield from _iter_text_files(paths, os.path.commonpath(paths) if len(paths) > 1 else "")
+
+
+def _iter_text_files(paths: List[str], root: str) -> Iterator[Tuple[str, str]]:
+    for path in paths:
+        with open(path, "r") as f:
+            yield (os.path.relpath(path, root) if root else path), f.read()
+
+
+def load_checkpoint(output_dir: str) -> Set[str]:
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+class ShardWriter:
+    """
+    Writes result rows into numbered shards of at most shard_size documents
+    and records document ids in the checkpoint once their rows are on disk.
+    """
+
+    def __init__(self, output_dir: str, shard_size: int = 1000, fmt: str = "jsonl"):
+        # Fail before any document is scored if Parquet output is unavailable.
+        if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            raise ImportError("Parquet output needs pyarrow; install it or use --format jsonl")
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.fmt = fmt
+        os.makedirs(output_dir, exist_ok=True)
+        self._checkpoint = open(os.path.join(output_dir, CHECKPOINT_FILE), "a")
+        self._shard_index = self._next_shard_index()
+        self._shard_docs = 0
+        self._jsonl = None
+        self._pending_rows: List[Dict] = []
+        self._pending_ids: List[str] = []
+
+    def _next_shard_index(self) -> int:
+        existing = glob.glob(os.path.join(self.output_dir, "part-*.*"))
+        indices = [int(os.path.basename(p).split("-")[1].split(".")[0]) for p in existing]
+        return max(indices, default=-1) + 1
+
+    def _shard_path(self) -> str:
+        return os.path.join(self.output_dir, f"part-{self._shard_index:05d}.{self.fmt}")
+
+    def add(self, doc_id: str, rows: List[Dict]) -> None:
+        if self.fmt == "jsonl":
+            if self._jsonl is None:
+                self._jsonl = open(self._shard_path(), "a")
+            for row in rows:
+                self._jsonl.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self._jsonl.flush()
+            self._mark_done([doc_id])
+        else:
+            self._pending_rows.extend(rows)
+            self._pending_ids.append(doc_id)
+        self._shard_docs += 1
+        if self._shard_docs >= self.shard_size:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        if self.fmt == "jsonl":
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+        elif self._pending_ids:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.Table.from_pylist(self._pending_rows), self._shard_path())
+            self._mark_done(self._pending_ids)
+            self._pending_rows, self._pending_ids = [], []
+        if self._shard_docs:
+            self._shard_index += 1
+            self._shard_docs = 0
+
+    def _mark_done(self, doc_ids: List[str]) -> None:
+        for doc_id in doc_ids:
+            self._checkpoint.write(doc_id + "\n")
+        self._checkpoint.flush()
+        os.fsync(self._checkpoint.fileno())
+
+    def close(self) -> None:
+        self._rotate()
+        self._checkpoint.close()
+
+
+def _init_worker(max_concurrency: int, debug_level: int, budget: Optional[float] = None) -> None:
+    global _worker_parser, _worker_aggregator, _worker_concurrency, _worker_budget
+    from .check_aggregator import CheckAggregator
+    from .llm import get_registry
+    from .llm_cache import LLMResponseCache
+    from .llm_cassette import Cassette
+    from .statement_parser import StatementParser
+
+    set_debug_level(debug_level)
+    cache_path = os.environ.get("HALLUCINATION_LLM_CACHE")
+    if cache_path:
+        get_registry().set_cache(LLMResponseCache(cache_path))
+    # Workers append to a shared cassette file; each keeps its own in-memory index.
+    cassette = Cassette.from_env()
+    if cassette is not None:
+        get_registry().set_cassette(cassette)
+    _worker_parser = StatementParser(split_by_paragraph=True)
+    _worker_aggregator = CheckAggregator(max_concurrency=max_concurrency)
+    _worker_concurrency = max_concurrency
+    _worker_budget = budget
+
+
+def _score_in_worker(doc_id: str, text: str) -> Tuple[str, List[Dict]]:
+    from .pipeline import ascore_document
+
+    results = asyncio.run(ascore_document(text, _worker_parser, _worker_aggregator, _worker_concurrency,
+                                          budget=_worker_budget))
+    return doc_id, [dict(result.to_dict(), doc_id=doc_id) for result in results]
+
+
+def run_batch(source: str, output_dir: str, workers: int = 4, max_concurrency: int = 8,
+              shard_size: int = 1000, fmt: str = "jsonl", text_field: str = "text",
+              id_field: str = "id", debug_level: int = DEBUG_WARNING,
+              budget: Optional[float] = None) -> Dict[str, int]:
+    """
+    Score every document in source that is not yet in the checkpoint.
+    Returns counts of scored, skipped and failed documents. With a budget,
+    each document gets that many seconds (see deadline.py).
+    """
+    done = load_checkpoint(output_dir)
+    writer = ShardWriter(output_dir, shard_size=shard_size, fmt=fmt)
+    counts = {"scored": 0, "skipped": 0, "failed": 0}
+    # Keep a bounded number of documents in flight so huge inputs are not read into memory.
+    max_in_flight = workers * 2
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(max_concurrency, debug_level, budget)) as pool:
+            in_flight: Dict = {}
+
+            def drain(return_when) -> None:
+                finished, _ = wait(list(in_flight), return_when=return_when)
+                for future in finished:
+                    doc_id = in_flight.pop(future)
+                    try:
+                        _, rows = future.result()
+                    except Exception as e:
+                        counts["failed"] += 1
+                        debug_print(DEBUG_ERROR, f"Failed to score document {doc_id}: {e}")
+                        continue
+                    writer.add(doc_id, rows)
+                    counts["scored"] += 1
+                    debug_print(DEBUG_INFO, f"Scored document {doc_id} ({len(rows)} statements)")
+
+            for doc_id, text in iter_documents(source, text_field=text_field, id_field=id_field):
+                if doc_id in done:
+                    counts["skipped"] += 1
+                    continue
+                if len(in_flight) >= max_in_flight:
+                    drain(FIRST_COMPLETED)
+                in_flight[pool.submit(_score_in_worker, doc_id, text)] = doc_id
+            while in_flight:
+                drain(FIRST_COMPLETED)
+    finally:
+        writer.close()
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Score many documents for potential hallucinations")
+    arg_parser.add_argument("source", help="Directory of .txt files, glob pattern, or JSONL file")
+    arg_parser.add_argument("--output-dir", required=True, help="Directory for result shards and checkpoint")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="In-flight LLM calls per worker")
+    arg_parser.add_argument("--shard-size", type=int, default=1000, help="Documents per output shard")
+    arg_parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl", help="Output format")
+    arg_parser.add_argument("--text-field", default="text", help="Text field for JSONL input")
+    arg_parser.add_argument("--id-field", default="id", help="Id field for JSONL input")
+    arg_parser.add_argument("--budget", type=float, default=default_budget(),
+                            help="Latency budget per document in seconds (HALLUCINATION_DOCUMENT_BUDGET)")
+    args = arg_parser.parse_args(argv)
+    if args.format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        arg_parser.error("--format parquet needs pyarrow installed")
+
+    set_debug_level(DEBUG_INFO)
+    counts = run_batch(args.source, args.output_dir, workers=args.workers, max_concurrency=args.concurrency,
+                       shard_size=args.shard_size, fmt=args.format, text_field=args.text_field,
+                       id_field=args.id_field, budget=args.budget)
+    print(json.dumps(counts))
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,40 +1,274 @@
 # hallucination_detection/check_aggregator.py
 
-from typing import Dict
+import asyncio
+import importlib
+import threading
+from contextlib import nullcontext
+from typing import ContextManager, Dict, List, Optional, Tuple, Type
 
+from .deadline import Deadline, deadline_scope, has_deadline
 from .domain_classification import DomainClassifier
 from .checks.base_check import BaseCheck
-from .checks.history_check import HistoryCheck
-from .checks.paper_check import PaperCheck
-from .checks.math_check import MathCheck
-from .checks.logic_check import LogicCheck
-from .checks.general_check import GeneralCheck
-from .checks.general_check import NoneCheck
-from .checks.latest_news_check import LatestNewsCheck
-from .debug_logger import debug_print, DEBUG_INFO
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE
+from .metrics import get_metrics
+from .verdict_store import VerdictStore
+
+# Domain -> (module, class name) of the check that handles it. Checks are
+# imported and constructed only when a statement is first routed to them.
+CHECK_REGISTRY: Dict[str, Tuple[str, str]] = {
+    "history": (".checks.history_check", "HistoryCheck"),
+    "paper": (".checks.paper_check", "PaperCheck"),
+    "math": (".checks.math_check", "MathCheck"),
+    "logic": (".checks.logic_check", "LogicCheck"),
+    "general": (".checks.general_check", "GeneralCheck"),
+    "latest_news": (".checks.latest_news_check", "LatestNewsCheck"),
+    "none": (".checks.general_check", "NoneCheck"),
+}
+
+FALLBACK_DOMAIN = "general"
+
+
+class LazyCheckMap:
+    """
+    Domain -> check mapping that imports and builds each check on first use
+    and then reuses the same instance.
+    """
+
+    def __init__(self, registry: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.registry = dict(registry or CHECK_REGISTRY)
+        self._checks: Dict[str, BaseCheck] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, domain: str) -> bool:
+        return domain in self.registry
+
+    def __getitem__(self, domain: str) -> BaseCheck:
+        check = self.get(domain)
+        if check is None:
+            raise KeyError(domain)
+        return check
+
+    def get(self, domain: str, default: Optional[BaseCheck] = None) -> Optional[BaseCheck]:
+        if domain not in self.registry:
+            return default
+        check = self._checks.get(domain)
+        if check is None:
+            with self._lock:
+                check = self._checks.get(domain)
+                if check is None:
+                    check = self.get_class(domain)()
+                    self._checks[domain] = check
+                    debug_print(DEBUG_VERBOSE, "Constructed %s for domain '%s'", check.__class__.__name__, domain)
+        return check
+
+    def get_class(self, domain: str) -> Type[BaseCheck]:
+        module_name, class_name = self.registry[domain]
+        return getattr(importlib.import_module(module_name, __package__), class_name)
+
+    def loaded(self) -> Dict[str, BaseCheck]:
+        """Checks constructed so far."""
+        return dict(self._checks)
+
+    def versions(self) -> Dict[str, str]:
+        """Version of every registered check, read without constructing it."""
+        return {domain: self.get_class(domain).version for domain in self.registry}
+
 
 class CheckAggregator:
     """
     Aggregates multiple domain checks. Chooses the correct check based on domain classification.
     """
 
-    def __init__(self):
-        # Pre-instantiate or lazy-load checks as needed
-        self.check_map: Dict[str, BaseCheck] = {
-            "history": HistoryCheck(),
-            "paper": PaperCheck(),
-            "math": MathCheck(),
-            "logic": LogicCheck(),
-            "general": GeneralCheck(),
-            "latest_news": LatestNewsCheck(),
-            "none": NoneCheck(),
-        }
+    def __init__(self, max_concurrency: int = 8, verdict_store: Optional[VerdictStore] = None,
+                 budget: Optional[float] = None):
+        """
+        :param max_concurrency: Maximum number of statements checked at once by
+            check_statements_async.
+        :param verdict_store: Optional store of earlier verdicts; statements found
+            in it (exactly or as near-duplicates) are not re-classified or re-checked.
+        :param budget: Seconds each check_statement(s) call may take when the caller
+            has not started a document deadline; statements left without time get
+            a None score (unverified) instead of a guessed one.
+        """
+        self.max_concurrency = max_concurrency
+        self.verdict_store = verdict_store
+        self.budget = budget
+        # Checks are imported and built the first time a domain is routed to them
+        self.check_map = LazyCheckMap()
+        self._versions: Optional[Dict[str, str]] = None
         self.domain_classifier = DomainClassifier()
 
-    def check_statement(self, text: str) -> tuple[float, str]:
-        debug_print(DEBUG_INFO, f"Aggregator is about to classify and check: {text}")
-        domain = self.domain_classifier.classify(text)
-        checker = self.check_map.get(domain, GeneralCheck())
-        debug_print(DEBUG_INFO, f"Domain classified as '{domain}'. Using '{checker.__class__.__name__}'")
-        score = checker.check_fact(text)
+    def check_statement(self, text: str) -> tuple[Optional[float], str]:
+        cached = self.lookup_verdict(text)
+        if cached is not None:
+            return cached
+        debug_print(DEBUG_INFO, "Aggregator is about to classify and check: %s", text)
+        metrics = get_metrics()
+        with self._deadline_scope():
+            with metrics.timer("stage_seconds", stage="classify"):
+                domain = self.domain_classifier.classify(text)
+            checker = self.get_checker(domain)
+            debug_print(DEBUG_INFO, "Domain classified as '%s'. Using '%s'", domain, checker.__class__.__name__)
+            with metrics.timer("stage_seconds", stage="check"), \
+                    metrics.timer("check_seconds", domain=domain, check=checker.__class__.__name__):
+                score = checker.check_fact(text)
+        self.store_verdict(text, score, domain)
         return score, domain
+
+    async def check_statement_async(self, text: str) -> tuple[Optional[float], str]:
+        cached = self.lookup_verdict(text)
+        if cached is not None:
+            return cached
+        debug_print(DEBUG_INFO, "Aggregator is about to classify and check: %s", text)
+        metrics = get_metrics()
+        with self._deadline_scope():
+            with metrics.timer("stage_seconds", stage="classify"):
+                domain = await self.domain_classifier.aclassify(text)
+            checker = self.get_checker(domain)
+            debug_print(DEBUG_INFO, "Domain classified as '%s'. Using '%s'", domain, checker.__class__.__name__)
+            with metrics.timer("stage_seconds", stage="check"), \
+                    metrics.timer("check_seconds", domain=domain, check=checker.__class__.__name__):
+                score = await checker.acheck_fact(text)
+        self.store_verdict(text, score, domain)
+        return score, domain
+
+    def check_statements(self, statements: List[str]) -> List[tuple[Optional[float], str]]:
+        """
+        Classify all statements, then check each domain's statements with a
+        single batched check_facts call. Results are returned in input order.
+        """
+        with self._deadline_scope():
+            return self._check_statements(statements)
+
+    def _check_statements(self, statements: List[str]) -> List[tuple[Optional[float], str]]:
+        results, pending = self._lookup_verdicts(statements)
+        pending_texts = [statements[i] for i in pending]
+        metrics = get_metrics()
+        with metrics.timer("stage_seconds", stage="classify"):
+            domains = [self.domain_classifier.classify(text) for text in pending_texts]
+        scores: List[Optional[float]] = [0.0] * len(pending_texts)
+        for domain, indices in self._group_by_domain(domains).items():
+            checker = self.get_checker(domain)
+            debug_print(DEBUG_INFO, "Checking %d '%s' statements with '%s'", len(indices), domain,
+                        checker.__class__.__name__)
+            with metrics.timer("stage_seconds", stage="check"), \
+                    metrics.timer("check_seconds", domain=domain, check=checker.__class__.__name__):
+                domain_scores = checker.check_facts([pending_texts[i] for i in indices])
+            for i, score in zip(indices, domain_scores):
+                scores[i] = score
+        return self._merge_results(statements, results, pending, scores, domains)
+
+    async def check_statements_async(self, statements: List[str],
+                                     max_concurrency: Optional[int] = None,
+                                     batch_by_domain: bool = True) -> List[tuple[Optional[float], str]]:
+        """
+        Classify and check all statements concurrently, with at most
+        max_concurrency calls in flight. Results are returned in input order.
+
+        With batch_by_domain, statements are first classified concurrently and
+        then each domain's statements are checked with one batched call;
+        otherwise every statement is checked on its own.
+        """
+        with self._deadline_scope():
+            return await self._check_statements_async(statements, max_concurrency, batch_by_domain)
+
+    async def _check_statements_async(self, statements: List[str], max_concurrency: Optional[int],
+                                      batch_by_domain: bool) -> List[tuple[Optional[float], str]]:
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        if not batch_by_domain:
+            async def bounded_check(text: str) -> tuple[Optional[float], str]:
+                async with semaphore:
+                    return await self.check_statement_async(text)
+
+            return list(await asyncio.gather(*(bounded_check(text) for text in statements)))
+
+        results, pending = self._lookup_verdicts(statements)
+        pending_texts = [statements[i] for i in pending]
+
+        async def bounded_classify(text: str) -> str:
+            async with semaphore:
+                return await self.domain_classifier.aclassify(text)
+
+        metrics = get_metrics()
+        with metrics.timer("stage_seconds", stage="classify"):
+            domains = list(await asyncio.gather(*(bounded_classify(text) for text in pending_texts)))
+        groups = self._group_by_domain(domains)
+
+        async def bounded_check_group(domain: str, indices: List[int]) -> List[Optional[float]]:
+            checker = self.get_checker(domain)
+            debug_print(DEBUG_INFO, "Checking %d '%s' statements with '%s'", len(indices), domain,
+                        checker.__class__.__name__)
+            async with semaphore:
+                with metrics.timer("check_seconds", domain=domain, check=checker.__class__.__name__):
+                    return await checker.acheck_facts([pending_texts[i] for i in indices])
+
+        with metrics.timer("stage_seconds", stage="check"):
+            group_scores = await asyncio.gather(
+                *(bounded_check_group(domain, indices) for domain, indices in groups.items())
+            )
+        scores: List[Optional[float]] = [0.0] * len(pending_texts)
+        for indices, domain_scores in zip(groups.values(), group_scores):
+            for i, score in zip(indices, domain_scores):
+                scores[i] = score
+        return self._merge_results(statements, results, pending, scores, domains)
+
+    def get_checker(self, domain: str) -> BaseCheck:
+        """Return the check for a domain, falling back to the general check."""
+        return self.check_map.get(domain) or self.check_map[FALLBACK_DOMAIN]
+
+    def close(self) -> None:
+        """Stop the worker threads of every check built so far."""
+        for check in self.check_map.loaded().values():
+            check.close()
+
+    def _deadline_scope(self) -> ContextManager:
+        """A deadline of self.budget, unless the caller already runs under one."""
+        if self.budget is None or has_deadline():
+            return nullcontext()
+        return deadline_scope(Deadline(self.budget))
+
+    def _check_versions(self) -> Dict[str, str]:
+        if self._versions is None:
+            self._versions = self.check_map.versions()
+        return self._versions
+
+    def lookup_verdict(self, text: str) -> Optional[tuple[float, str]]:
+        """Return a stored (score, domain) for the statement, if any."""
+        if self.verdict_store is None:
+            return None
+        cached = self.verdict_store.lookup(text, self._check_versions())
+        if cached is not None:
+            debug_print(DEBUG_INFO, "Reusing stored verdict for: %s", text)
+        return cached
+
+    def store_verdict(self, text: str, score: Optional[float], domain: str) -> None:
+        # Unverified statements (no score) are checked again next time.
+        if self.verdict_store is not None and score is not None:
+            version = self._check_versions().get(domain)
+            if version is not None:
+                self.verdict_store.store(text, score, domain, version)
+
+    def _lookup_verdicts(self, statements: List[str]) -> tuple[List[Optional[tuple[float, str]]], List[int]]:
+        """
+        Look up stored verdicts. Returns per-statement results (None where
+        missing) and the indices of statements that still need checking.
+        """
+        results = [self.lookup_verdict(text) for text in statements]
+        pending = [i for i, result in enumerate(results) if result is None]
+        return results, pending
+
+    def _merge_results(self, statements: List[str], results: List[Optional[tuple[float, str]]],
+                       pending: List[int], scores: List[Optional[float]],
+                       domains: List[str]) -> List[tuple[Optional[float], str]]:
+        for i, score, domain in zip(pending, scores, domains):
+            results[i] = (score, domain)
+            self.store_verdict(statements[i], score, domain)
+        return results
+
+    @staticmethod
+    def _group_by_domain(domains: List[str]) -> Dict[str, List[int]]:
+        groups: Dict[str, List[int]] = {}
+        for i, domain in enumerate(domains):
+            groups.setdefault(domain, []).append(i)
+        return groups
@@ -1,28 +1,305 @@
 # hallucination_detection/checks/base_check.py
 
+import asyncio
+import math
+import re
+import threading
 from abc import ABC, abstractmethod
-from ..debug_logger import debug_print, DEBUG_INFO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from ..deadline import SMALL_MODEL, UNVERIFIED, bind_context, current_deadline, record_degradation
+from ..debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE, DEBUG_WARNING
+from ..evidence_index import Passage, get_evidence_index
 from ..llm import LLMContainer
+from ..llm_scheduler import LLMCallCancelled, LLMDeadlineExceeded
+from ..metrics import get_metrics
+
+# Maximum number of statements packed into a single batched verification prompt.
+DEFAULT_MAX_BATCH_SIZE = 20
+
+# Matches a numbered score line such as "3. 0.85", "3) 0.85" or "3: score 0.85".
+_NUMBERED_SCORE_RE = re.compile(r"^\s*(\d+)\s*[\.\):\-]\s*(.+?)\s*$")
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+_RATIO_RE = re.compile(r"(\d+(?:\.\d+)?)\s*/\s*(10|100)\b")
+_NUMBER_RE = re.compile(r"(?<![\d.])\d*\.?\d+")
+
+SCORING_MODES = ("free", "bucketed")
+# The single-statement instruction bucketed mode replaces, and its replacement.
+SCORE_INSTRUCTION = "Only respond with a number between 0 and 1, nothing else."
+BUCKET_INSTRUCTION = "Only respond with a single digit from 0 to 9, nothing else."
+# Bucketed mode also moves the template's "Rate ... from 0 (...) to 1 (...)." scale onto 0-9.
+_SCALE_RE = re.compile(r"Rate (it |each one |)from 0 \(([^)]*)\) to 1 \(([^)]*)\)\.")
+_MODERATE_SCORE = "moderate score around 0.5"
+# Output caps: a bucketed answer is one token; a free-form score fits in a few.
+FREE_SCORE_MAX_TOKENS = 8
+BATCH_TOKENS_PER_ENTRY = 8
+# Float noise tolerated around a bare [0, 1] score (e.g. "1.0000001").
+_SCORE_EPSILON = 1e-6
+
+
+def extract_score(text: str) -> Optional[float]:
+    """
+    Find a score in [0, 1] in a model answer: a bare number in [0, 1], a
+    percentage, an "x/10" or "x/100" ratio, or the first number in [0, 1]
+    embedded in text. None when there is none, including a bare number
+    outside [0, 1] such as "7" or "85".
+    """
+    text = text.strip()
+    try:
+        value = float(text)
+    except ValueError:
+        pass
+    else:
+        if -_SCORE_EPSILON <= value <= 1.0 + _SCORE_EPSILON:
+            return max(0.0, min(1.0, value))
+        return None
+    match = _PERCENT_RE.search(text)
+    if match and float(match.group(1)) <= 100:
+        return float(match.group(1)) / 100
+    match = _RATIO_RE.search(text)
+    if match and float(match.group(1)) <= float(match.group(2)):
+        return float(match.group(1)) / float(match.group(2))
+    for match in _NUMBER_RE.finditer(text):
+        value = float(match.group(0))
+        if 0.0 <= value <= 1.0:
+            return value
+    return None
+
+
+def score_from_logprobs(top_logprobs: Optional[Dict[str, float]], min_mass: float = 0.5) -> Optional[float]:
+    """
+    Expected bucketed score over the digit tokens 0-9 among the first
+    token's alternatives, or None if they carry less than min_mass of the
+    probability (the model meant to say something else).
+    """
+    if not top_logprobs:
+        return None
+    mass = [0.0] * 10
+    for token, logprob in top_logprobs.items():
+        token = token.strip()
+        if len(token) == 1 and token.isdigit():
+            mass[int(token)] += math.exp(logprob)
+    total = sum(mass)
+    if total < min_mass:
+        return None
+    return sum(digit / 9 * p for digit, p in enumerate(mass)) / total
+
+
+def bucketed_template(prompt_template: str) -> Optional[str]:
+    """
+    The single-statement template rewritten to ask for one digit on a 0-9
+    scale (scale sentence, instruction and any "around 0.5" hint), or None
+    when it does not state a 0-1 scale with SCORE_INSTRUCTION.
+    """
+    if SCORE_INSTRUCTION not in prompt_template or not _SCALE_RE.search(prompt_template):
+        return None
+    template = _SCALE_RE.sub(r"Rate \1on a scale from 0 (\2) to 9 (\3).", prompt_template)
+    template = template.replace(_MODERATE_SCORE, "moderate score around 4 or 5")
+    return template.replace(SCORE_INSTRUCTION, BUCKET_INSTRUCTION)
+
+
+class CascadeConfig:
+    """
+    Small-to-large model cascade for a check: every statement is scored by the
+    small model first, and only scores strictly inside the uncertainty band
+    (low, high) or unparseable responses are re-scored by the large model.
+    """
+
+    def __init__(self,
+                 small_model: str = "llama3.1-8b",
+                 large_model: str = "llama3.3-70b",
+                 low: float = 0.25,
+                 high: float = 0.75,
+                 llm: str = "cerebras"):
+        """
+        :param small_model: Model that scores every statement first.
+        :param large_model: Model that re-scores uncertain or unparseable ones.
+        :param low: Small-model scores at or below this are accepted as false.
+        :param high: Small-model scores at or above this are accepted as true.
+        :param llm: Provider serving both models.
+        """
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError("cascade band must satisfy 0 <= low <= high <= 1")
+        self.small_model = small_model
+        self.large_model = large_model
+        self.low = low
+        self.high = high
+        self.llm = llm
+
+    def is_confident(self, score: float) -> bool:
+        return score <= self.low or score >= self.high
+
+
+class EnsembleConfig:
+    """
+    Several provider/models scoring the same statement concurrently. As soon
+    as `agree` of the answers received so far lie within `tolerance` of each
+    other, their weighted mean is the score and the remaining calls are
+    cancelled; otherwise the weighted mean of every parsed answer is used.
+    """
+
+    def __init__(self,
+                 members: Sequence[Tuple[str, str, float]],
+                 agree: int = 2,
+                 tolerance: float = 0.15):
+        """
+        :param members: (provider, model, weight) per ensemble member.
+        :param agree: Answers that must agree to stop early; at least 1.
+        :param tolerance: Largest spread (max - min) of agreeing scores.
+        """
+        if not members:
+            raise ValueError("an ensemble needs at least one member")
+        if not 1 <= agree <= len(members):
+            raise ValueError("agree must be between 1 and the number of members")
+        self.members = [(llm, model, float(weight)) for llm, model, weight in members]
+        self.agree = agree
+        self.tolerance = tolerance
+
+    def consensus(self, answers: List[Tuple[float, float]]) -> Optional[List[Tuple[float, float]]]:
+        """
+        The largest group of (weight, score) answers within tolerance, if it
+        has at least `agree` members.
+        """
+        ordered = sorted(answers, key=lambda answer: answer[1])
+        best: List[Tuple[float, float]] = []
+        start = 0
+        for end in range(len(ordered)):
+            while ordered[end][1] - ordered[start][1] > self.tolerance:
+                start += 1
+            if end - start + 1 > len(best):
+                best = ordered[start:end + 1]
+        return best if len(best) >= self.agree else None
+
+    @staticmethod
+    def combine(answers: List[Tuple[float, float]]) -> float:
+        total = sum(weight for weight, _ in answers)
+        if total <= 0:
+            return sum(score for _, score in answers) / len(answers)
+        return sum(weight * score for weight, score in answers) / total
+
 
 class BaseCheck(ABC):
     """
     Abstract base class for all checks.
     """
 
+    # Bump when a check's prompt or scoring changes to invalidate stored verdicts.
+    version: str = "1"
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+    # TTL (seconds) for cached LLM responses of this check; None uses the cache default.
+    cache_ttl: Optional[float] = None
+    # Small-to-large model cascade for LLM scoring; None scores with the requested model only.
+    cascade: Optional[CascadeConfig] = None
+    # Concurrent multi-model scoring with early consensus; takes precedence over the cascade.
+    ensemble: Optional[EnsembleConfig] = None
+    # "bucketed" asks for one 0-9 digit and scores from its log-probabilities; providers
+    # that do not report them are asked for a 0-1 number instead, as in "free" mode.
+    scoring_mode: str = "bucketed"
+    # Provider/model that scores once the document deadline leaves room only for the
+    # small model (see deadline.py); a cascade's small model takes precedence.
+    small_model: Tuple[str, str] = ("cerebras", "llama3.1-8b")
+
     def __init__(self):
         self.llm_container = LLMContainer()
+        self.llm_container.register_llm(*self._small_model())
+        # (provider, model) pairs seen answering without log-probabilities; scored free-form.
+        self._no_logprobs = set()
+        if self.cascade is not None:
+            self.llm_container.register_llm(self.cascade.llm, self.cascade.small_model)
+            self.llm_container.register_llm(self.cascade.llm, self.cascade.large_model)
+        self._ensemble_executor = None
+        if self.ensemble is not None:
+            for llm, model, _ in self.ensemble.members:
+                self.llm_container.register_llm(llm, model)
+            # Cancelled calls may still be finishing, so leave room beyond one statement's fan-out.
+            self._ensemble_executor = ThreadPoolExecutor(max_workers=4 * len(self.ensemble.members),
+                                                         thread_name_prefix="ensemble")
+
+    @property
+    def lane(self) -> str:
+        """Scheduler lane for this check's LLM calls, so checks share capacity fairly."""
+        return f"check:{self.__class__.__name__}"
+
+    def retrieve(self, statement: str, k: int = 3) -> List[Passage]:
+        """
+        Top-k evidence passages for the statement from the local evidence
+        index, or an empty list when no index is configured.
+        """
+        index = get_evidence_index()
+        if index is None:
+            return []
+        passages = index.retrieve(statement, k)
+        debug_print(DEBUG_INFO, "Retrieved %d evidence passages for '%s'", len(passages), statement)
+        return passages
+
+    @staticmethod
+    def format_evidence(passages: List[Passage], max_chars: int = 600) -> str:
+        """
+        Render passages for a single-statement prompt. Braces are escaped
+        because the result is embedded in a template passed to str.format.
+        """
+        lines = [f"- ({p.source}) {p.text[:max_chars]}" for p in passages]
+        return "\n        ".join(lines).replace("{", "{{").replace("}", "}}")
+
+    @staticmethod
+    def evidence_entry(text: str, passages: List[Passage], max_chars: int = 300) -> str:
+        """A batch prompt entry: the statement followed by its evidence passages."""
+        if not passages:
+            return f"{text}\n   Evidence: none"
+        return f"{text}\n   Evidence: " + " | ".join(p.text[:max_chars] for p in passages)
 
     @abstractmethod
-    def check_fact(self, text: str) -> float:
+    def check_fact(self, text: str) -> Optional[float]:
         """
         Implementations should return a "believability" or "confidence" score 
-        indicating how likely the statement is true or not.
+        indicating how likely the statement is true or not, or None when the
+        document deadline ran out before the statement could be verified.
         """
         pass
 
-    def get_llm_truth_score(self, text: str, prompt_template: str, llm: str = "cerebras", model: str = "llama3.1-8b") -> float:
+    async def acheck_fact(self, text: str) -> Optional[float]:
+        """
+        Async variant of check_fact. By default the synchronous check runs in a
+        worker thread, so any check (including ones making blocking lookups)
+        can be awaited concurrently with others.
+        """
+        return await asyncio.to_thread(self.check_fact, text)
+
+    def check_facts(self, texts: List[str]) -> List[Optional[float]]:
+        """
+        Score several statements of this check's domain at once. Returns one
+        score (or None for unverified) per input text, in order. Subclasses
+        backed by an LLM override this to pack the statements into a single
+        numbered prompt.
+        """
+        return [self.check_fact(text) for text in texts]
+
+    async def acheck_facts(self, texts: List[str]) -> List[Optional[float]]:
+        """
+        Async variant of check_facts.
+        """
+        return await asyncio.to_thread(self.check_facts, texts)
+
+    def close(self) -> None:
+        """
+        Stop the check's worker threads. Calls still running are not waited
+        for; the check must not be used afterwards.
+        """
+        if self._ensemble_executor is not None:
+            self._ensemble_executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_llm_truth_score(self, text: str, prompt_template: str, llm: str = "cerebras",
+                            model: str = "llama3.1-8b") -> Optional[float]:
         """
         Get truth score from LLM for a given text using specified prompt template.
+
+        When the check has an ensemble or a cascade, llm and model are ignored.
+        An ensemble asks all its members concurrently and stops at the first
+        consensus; a cascade's small model scores first and its large model is
+        asked only when that score is uncertain or unparseable. Once the
+        document deadline runs low only the small model is asked, and once it
+        runs out the statement is left unverified. A statement no model gave a
+        parseable score for is unverified as well, rather than scored 0.5.
         
         Args:
             text: Text to analyze
@@ -30,20 +307,271 @@ class BaseCheck(ABC):
             model: LLM model to use
             
         Returns:
-            float: Truth score between 0 and 1
+            float: Truth score between 0 and 1, or None if unverified
         """
+        check = self.__class__.__name__
+        deadline = current_deadline()
+        if deadline.degraded(UNVERIFIED, check):
+            return None
+        try:
+            if deadline.degraded(SMALL_MODEL, check):
+                return self._query_truth_score(text, prompt_template, *self._small_model())
+
+            if self.ensemble is not None:
+                def query(member_llm: str, member_model: str, cancel: threading.Event) -> Dict[int, float]:
+                    score = self._query_truth_score(text, prompt_template, member_llm, member_model, cancel)
+                    return {} if score is None else {0: score}
+
+                return self._ensemble_scores(1, query).get(0)
+
+            if self.cascade is None:
+                return self._query_truth_score(text, prompt_template, llm, model)
+
+            cascade = self.cascade
+            score = self._query_truth_score(text, prompt_template, cascade.llm, cascade.small_model)
+            if not self._cascade_accepts(score, 1):
+                try:
+                    large_score = self._query_truth_score(text, prompt_template, cascade.llm, cascade.large_model)
+                except LLMDeadlineExceeded:
+                    if score is None:
+                        raise
+                    debug_print(DEBUG_INFO, "No time left to escalate; keeping the small model's score")
+                    large_score = None
+                if large_score is not None:
+                    score = large_score
+            return score
+        except LLMDeadlineExceeded as e:
+            debug_print(DEBUG_WARNING, "%s left a statement unverified: %s", check, e)
+            record_degradation(UNVERIFIED, check)
+            return None
+
+    def _small_model(self) -> Tuple[str, str]:
+        if self.cascade is not None:
+            return self.cascade.llm, self.cascade.small_model
+        return self.small_model
+
+    def _query_truth_score(self, text: str, prompt_template: str, llm: str, model: str,
+                           cancel: Optional[threading.Event] = None) -> Optional[float]:
+        """One single-statement scoring call; None when the response does not parse."""
         llm_client = self.llm_container.get_llm(llm, model)
-        prompt = prompt_template.format(text=text)
+        template = None
+        if self.scoring_mode == "bucketed" and (llm, model) not in self._no_logprobs:
+            template = bucketed_template(prompt_template)
+        bucketed = template is not None
         
-        response = llm_client.generate_text(prompt)
+        top_logprobs = None
+        if bucketed:
+            response, top_logprobs = llm_client.generate_with_logprobs(
+                template.format(text=text), cache_ttl=self.cache_ttl, lane=self.lane, cancel=cancel)
+            if top_logprobs is None:
+                # A lone digit without its probabilities is too coarse to trust; ask for a number.
+                debug_print(DEBUG_INFO, "%s:%s reports no log-probabilities; scoring free-form", llm, model)
+                self._no_logprobs.add((llm, model))
+                bucketed = False
+        if not bucketed:
+            prompt = prompt_template.format(text=text)
+            response = llm_client.generate_text(prompt, cache_ttl=self.cache_ttl, lane=self.lane, cancel=cancel,
+                                                max_tokens=FREE_SCORE_MAX_TOKENS, temperature=0.0)
+        debug_print(DEBUG_VERBOSE, "LLM returned response: %s", response)
         
-        try:
-            debug_print(DEBUG_INFO, f"LLM returned response: {response}")
-            score = float(response.strip())
-            score = max(0.0, min(1.0, score))
-            debug_print(DEBUG_INFO, f"LLM returned truth score: {score}")
-        except ValueError:
-            debug_print(DEBUG_INFO, f"Failed to parse LLM response, using default score")
-            score = 0.5
-            
+        score = score_from_logprobs(top_logprobs)
+        outcome = "logprobs"
+        if score is None:
+            score = self._parse_single_score(response, bucketed)
+            outcome = "ok" if score is not None else "failure"
+        get_metrics().inc("score_parses_total", check=self.__class__.__name__, outcome=outcome)
+        if score is None:
+            debug_print(DEBUG_WARNING, "Unparseable score from %s: %r", model, response)
+        else:
+            debug_print(DEBUG_INFO, "LLM (%s) returned truth score: %s", model, score)
         return score
+
+    @staticmethod
+    def _parse_single_score(response: str, bucketed: bool) -> Optional[float]:
+        """A bare digit is a 0-9 bucket in bucketed mode; anything else goes through extract_score."""
+        answer = response.strip()
+        if bucketed and len(answer) == 1 and answer.isdigit():
+            return int(answer) / 9
+        return extract_score(answer)
+
+    def _cascade_accepts(self, score: Optional[float], count: int) -> bool:
+        """Whether a small-model score stands; records the cascade decision."""
+        if score is not None and self.cascade.is_confident(score):
+            outcome, reason = "accepted", "confident"
+        else:
+            outcome, reason = "escalated", "parse" if score is None else "band"
+        get_metrics().inc("cascade_total", count, check=self.__class__.__name__, outcome=outcome, reason=reason)
+        if outcome == "escalated":
+            debug_print(DEBUG_VERBOSE, "Cascade escalating %d statement(s) to %s (%s)",
+                        count, self.cascade.large_model, reason)
+        return outcome == "accepted"
+
+    def _ensemble_scores(self, count: int,
+                         query: Callable[[str, str, threading.Event], Dict[int, float]]) -> Dict[int, float]:
+        """
+        Run query(llm, model, cancel) -> {index: score} for every ensemble member
+        concurrently and combine the answers per index. Returns as soon as every
+        index has a consensus, cancelling the members still pending; indices no
+        member scored are missing from the result. Raises LLMDeadlineExceeded
+        when every member ran out of time.
+        """
+        ensemble = self.ensemble
+        check = self.__class__.__name__
+        metrics = get_metrics()
+        cancel = threading.Event()
+        # Members run under the caller's deadline.
+        futures = {self._ensemble_executor.submit(bind_context(query), llm, model, cancel): (llm, model, weight)
+                   for llm, model, weight in ensemble.members}
+        answers: Dict[int, List[Tuple[float, float]]] = {i: [] for i in range(count)}
+        received = 0
+        out_of_time: List[LLMDeadlineExceeded] = []
+        try:
+            for future in as_completed(futures):
+                llm, model, weight = futures[future]
+                received += 1
+                try:
+                    parsed = future.result()
+                except LLMCallCancelled:
+                    continue
+                except LLMDeadlineExceeded as e:
+                    out_of_time.append(e)
+                    continue
+                except Exception as e:
+                    debug_print(DEBUG_WARNING, "Ensemble member %s:%s failed: %s", llm, model, e)
+                    continue
+                for i, score in parsed.items():
+                    answers[i].append((weight, score))
+                if received < len(futures) and all(ensemble.consensus(answers[i]) for i in range(count)):
+                    debug_print(DEBUG_VERBOSE, "Ensemble consensus after %d of %d members",
+                                received, len(futures))
+                    break
+        finally:
+            cancel.set()
+            for future in futures:
+                future.cancel()
+        metrics.inc("ensemble_total", check=check, outcome="early" if received < len(futures) else "complete")
+        metrics.inc("ensemble_members_skipped_total", len(futures) - received, check=check)
+        if len(out_of_time) == len(futures):
+            raise out_of_time[0]
+
+        scores: Dict[int, float] = {}
+        for i, index_answers in answers.items():
+            if index_answers:
+                scores[i] = ensemble.combine(ensemble.consensus(index_answers) or index_answers)
+        return scores
+
+    def get_llm_truth_scores(self, texts: List[str], batch_prompt_template: str,
+                             llm: str = "cerebras", model: str = "llama3.1-8b",
+                             fallback: Optional[Callable[[str], Optional[float]]] = None) -> List[Optional[float]]:
+        """
+        Get truth scores for several texts from one LLM call per batch.
+        With a cascade, uncertain entries are re-batched for the large model.
+
+        Args:
+            texts: Texts to analyze
+            batch_prompt_template: Prompt template with {count} and {statements} placeholders
+            model: LLM model to use
+            fallback: Single-statement scorer used to retry entries that are
+                missing or malformed in the batched response (defaults to check_fact)
+
+        Returns:
+            List[Optional[float]]: Truth scores between 0 and 1 (None if unverified), one per text
+        """
+        fallback = fallback or self.check_fact
+        scores: List[Optional[float]] = []
+        for start in range(0, len(texts), self.max_batch_size):
+            batch = texts[start:start + self.max_batch_size]
+            scores.extend(self._score_batch(batch, batch_prompt_template, llm, model, fallback))
+        return scores
+
+    def _score_batch(self, batch: List[str], batch_prompt_template: str, llm: str, model: str,
+                     fallback: Callable[[str], Optional[float]]) -> List[Optional[float]]:
+        check = self.__class__.__name__
+        deadline = current_deadline()
+        if deadline.degraded(UNVERIFIED, check, len(batch)):
+            return [None] * len(batch)
+        if len(batch) == 1:
+            return [fallback(batch[0])]
+
+        parsed: Dict[int, float] = {}
+        out_of_time = False
+        try:
+            if deadline.degraded(SMALL_MODEL, check, len(batch)):
+                parsed = self._query_batch_scores(batch, batch_prompt_template, *self._small_model())
+            elif self.ensemble is not None:
+                def query(member_llm: str, member_model: str, cancel: threading.Event) -> Dict[int, float]:
+                    return self._query_batch_scores(batch, batch_prompt_template, member_llm, member_model, cancel)
+
+                parsed = self._ensemble_scores(len(batch), query)
+            elif self.cascade is None:
+                parsed = self._query_batch_scores(batch, batch_prompt_template, llm, model)
+            else:
+                cascade = self.cascade
+                parsed = self._query_batch_scores(batch, batch_prompt_template, cascade.llm, cascade.small_model)
+                escalate = [i for i in range(len(batch)) if not self._cascade_accepts(parsed.get(i), 1)]
+                if escalate:
+                    # Out of time here, the small model's parsed scores still stand.
+                    large = self._query_batch_scores([batch[i] for i in escalate], batch_prompt_template,
+                                                     cascade.llm, cascade.large_model)
+                    for j, i in enumerate(escalate):
+                        if j in large:
+                            parsed[i] = large[j]
+        except LLMDeadlineExceeded as e:
+            debug_print(DEBUG_WARNING, "%s batch ran out of time: %s", check, e)
+            out_of_time = True
+
+        scores: List[Optional[float]] = []
+        for i, text in enumerate(batch):
+            if i in parsed:
+                scores.append(parsed[i])
+            elif out_of_time:
+                record_degradation(UNVERIFIED, check)
+                scores.append(None)
+            else:
+                debug_print(DEBUG_INFO, "Missing or malformed batch score for entry %d, retrying individually", i + 1)
+                scores.append(fallback(text))
+        return scores
+
+    def _query_batch_scores(self, batch: List[str], batch_prompt_template: str, llm: str,
+                            model: str, cancel: Optional[threading.Event] = None) -> Dict[int, float]:
+        """One numbered-prompt call; returns the {index: score} entries that parsed."""
+        llm_client = self.llm_container.get_llm(llm, model)
+        numbered = "\n".join(f"{i + 1}. {text}" for i, text in enumerate(batch))
+        prompt = batch_prompt_template.format(count=len(batch), statements=numbered)
+
+        response = llm_client.generate_text(prompt, cache_ttl=self.cache_ttl, lane=self.lane, cancel=cancel,
+                                            max_tokens=BATCH_TOKENS_PER_ENTRY * len(batch) + 8, temperature=0.0)
+        debug_print(DEBUG_VERBOSE, "LLM (%s) returned batch response: %s", model, response)
+        parsed = self._parse_numbered_scores(response, len(batch))
+        metrics = get_metrics()
+        check = self.__class__.__name__
+        metrics.inc("score_parses_total", len(parsed), check=check, outcome="ok")
+        if len(parsed) < len(batch):
+            metrics.inc("score_parses_total", len(batch) - len(parsed), check=check, outcome="failure")
+        return parsed
+
+    @staticmethod
+    def _parse_numbered_scores(response: str, count: int) -> Dict[int, float]:
+        """
+        Parse "N. score" lines into a {zero-based index: score} map; the score
+        may be embedded in text (see extract_score). Entries outside 1..count,
+        duplicates and lines without a score are dropped.
+        """
+        parsed: Dict[int, float] = {}
+        duplicates = set()
+        for line in response.splitlines():
+            match = _NUMBERED_SCORE_RE.match(line)
+            if not match:
+                continue
+            index = int(match.group(1)) - 1
+            if not 0 <= index < count:
+                continue
+            if index in parsed:
+                duplicates.add(index)
+                continue
+            score = extract_score(match.group(2))
+            if score is not None:
+                parsed[index] = score
+        for index in duplicates:
+            del parsed[index]
+        return parsed
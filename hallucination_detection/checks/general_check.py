@@ -1,17 +1,18 @@
 # hallucination_detection/checks/general_check.py
 
-from .base_check import BaseCheck
+from .base_check import BaseCheck, CascadeConfig
 from ..debug_logger import debug_print, DEBUG_INFO
+from typing import List, Optional
 
 class GeneralCheck(BaseCheck):
     """
-    Check for general facts using LLM verification.
+    Check for general facts using LLM verification,
+    grounded in local evidence passages when an evidence index is configured.
     """
-    def __init__(self):
-        super().__init__()
-        self.llm_container.register_llm("cerebras", "llama3.1-8b")
+    version = "6"
+    cascade = CascadeConfig("llama3.1-8b", "llama3.3-70b", low=0.3, high=0.7)
 
-    def check_fact(self, text: str) -> float:
+    def check_fact(self, text: str) -> Optional[float]:
         debug_print(DEBUG_INFO, f"[GeneralCheck] Checking general fact: {text}")
         
         prompt_template = """Analyze the following general statement and determine its truthfulness.
@@ -23,10 +24,59 @@ class GeneralCheck(BaseCheck):
         Statement: {text}
         Truth score:"""
         
+        passages = self.retrieve(text)
+        if passages:
+            prompt_template = """Analyze the following general statement and determine its truthfulness
+        using the evidence passages below where they are relevant.
+        Rate it from 0 (completely false) to 1 (completely true).
+        Only respond with a number between 0 and 1, nothing else.
+        Consider common knowledge, real-world facts, and general information.
+        If you're not completely sure, give a moderate score around 0.5.
+
+        Evidence:
+        """ + self.format_evidence(passages) + """
+
+        Statement: {text}
+        Truth score:"""
+
         score = self.get_llm_truth_score(text, prompt_template)
         debug_print(DEBUG_INFO, f"[GeneralCheck] Score for '{text}': {score}")
         return score
 
+    def check_facts(self, texts: List[str]) -> List[Optional[float]]:
+        debug_print(DEBUG_INFO, f"[GeneralCheck] Checking {len(texts)} general facts in one batch")
+
+        batch_prompt_template = """Analyze each of the following {count} general statements and determine its truthfulness.
+        Rate each one from 0 (completely false) to 1 (completely true).
+        Respond with exactly {count} lines in the form "<number>. <score>", one per statement, nothing else.
+        Consider common knowledge, real-world facts, and general information.
+        If you're not completely sure about a statement, give it a moderate score around 0.5.
+
+        Statements:
+        {statements}
+        Scores:"""
+
+        evidence = [self.retrieve(text) for text in texts]
+        if any(evidence):
+            batch_prompt_template = """Each of the following {count} general statements is listed with evidence passages.
+        Using the evidence where it is relevant, determine the truthfulness of each statement.
+        Rate each one from 0 (completely false) to 1 (completely true).
+        Respond with exactly {count} lines in the form "<number>. <score>", one per statement, nothing else.
+        Consider common knowledge, real-world facts, and general information.
+        If you're not completely sure about a statement, give it a moderate score around 0.5.
+
+        Statements:
+        {statements}
+        Scores:"""
+            entries = [self.evidence_entry(text, passages) for text, passages in zip(texts, evidence)]
+            entry_to_text = dict(zip(entries, texts))
+            scores = self.get_llm_truth_scores(entries, batch_prompt_template,
+                                               fallback=lambda entry: self.check_fact(entry_to_text[entry]))
+        else:
+            scores = self.get_llm_truth_scores(texts, batch_prompt_template)
+        debug_print(DEBUG_INFO, f"[GeneralCheck] Batch scores: {scores}")
+        return scores
+
 
 class NoneCheck(BaseCheck):
     """
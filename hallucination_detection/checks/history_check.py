@@ -1,19 +1,20 @@
 # hallucination_detection/checks/history_check.py
 
-from .base_check import BaseCheck
+from .base_check import BaseCheck, CascadeConfig
 from ..debug_logger import debug_print, DEBUG_INFO
-from ..llm import LLMContainer
+from ..llm_cache import LONG_TTL
+from typing import List, Optional
 
 class HistoryCheck(BaseCheck):
     """
-    Check for historical statements using LLM verification.
+    Check for historical statements using LLM verification,
+    grounded in local evidence passages when an evidence index is configured.
     """
-    def __init__(self):
-        super().__init__()
-        self.llm_container = LLMContainer()
-        self.llm_container.register_llm("cerebras", "llama3.1-8b")
+    version = "6"
+    cache_ttl = LONG_TTL
+    cascade = CascadeConfig("llama3.1-8b", "llama3.3-70b", low=0.3, high=0.7)
 
-    def check_fact(self, text: str) -> float:
+    def check_fact(self, text: str) -> Optional[float]:
         debug_print(DEBUG_INFO, f"[HistoryCheck] Checking historical fact: {text}")
         
         prompt_template = """Analyze the following historical statement and determine its truthfulness.
@@ -23,6 +24,49 @@ class HistoryCheck(BaseCheck):
         Statement: {text}
         Truth score:"""
         
+        passages = self.retrieve(text)
+        if passages:
+            prompt_template = """Analyze the following historical statement and determine its truthfulness
+        using the evidence passages below where they are relevant.
+        Rate it from 0 (completely false) to 1 (completely true).
+        Only respond with a number between 0 and 1, nothing else.
+
+        Evidence:
+        """ + self.format_evidence(passages) + """
+
+        Statement: {text}
+        Truth score:"""
+
         score = self.get_llm_truth_score(text, prompt_template)
         debug_print(DEBUG_INFO, f"[HistoryCheck] Score for '{text}': {score}")
         return score
+
+    def check_facts(self, texts: List[str]) -> List[Optional[float]]:
+        debug_print(DEBUG_INFO, f"[HistoryCheck] Checking {len(texts)} historical facts in one batch")
+
+        batch_prompt_template = """Analyze each of the following {count} historical statements and determine its truthfulness.
+        Rate each one from 0 (completely false) to 1 (completely true).
+        Respond with exactly {count} lines in the form "<number>. <score>", one per statement, nothing else.
+
+        Statements:
+        {statements}
+        Scores:"""
+
+        evidence = [self.retrieve(text) for text in texts]
+        if any(evidence):
+            batch_prompt_template = """Each of the following {count} historical statements is listed with evidence passages.
+        Using the evidence where it is relevant, determine the truthfulness of each statement.
+        Rate each one from 0 (completely false) to 1 (completely true).
+        Respond with exactly {count} lines in the form "<number>. <score>", one per statement, nothing else.
+
+        Statements:
+        {statements}
+        Scores:"""
+            entries = [self.evidence_entry(text, passages) for text, passages in zip(texts, evidence)]
+            entry_to_text = dict(zip(entries, texts))
+            scores = self.get_llm_truth_scores(entries, batch_prompt_template,
+                                               fallback=lambda entry: self.check_fact(entry_to_text[entry]))
+        else:
+            scores = self.get_llm_truth_scores(texts, batch_prompt_template)
+        debug_print(DEBUG_INFO, f"[HistoryCheck] Batch scores: {scores}")
+        return scores
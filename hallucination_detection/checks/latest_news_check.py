@@ -1,74 +1,219 @@
 # hallucination_detection/checks/latest_news_check.py
 
 from .base_check import BaseCheck
+from ..deadline import NO_EXTERNAL, UNVERIFIED, bind_context, current_deadline, record_degradation
 from ..debug_logger import debug_print, DEBUG_INFO
-from newsapi import NewsApiClient
-from datetime import datetime, timedelta
+from ..llm_cache import SHORT_TTL
+from ..metrics import get_metrics
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, timedelta
+import math
 import os
-from typing import List, Dict
 import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# NewsAPI rejects queries longer than 500 characters.
+MAX_QUERY_LENGTH = 500
+_STOPWORDS = {
+    "that", "this", "with", "from", "have", "has", "were", "been", "will", "would", "about", "after",
+    "before", "their", "there", "they", "what", "when", "which", "while", "into", "than", "then",
+    "also", "over", "more", "most", "some", "such", "only", "other", "said", "says", "week",
+}
 
 class LatestNewsCheck(BaseCheck):
     """
     Check latest news using NewsAPI and LLM verification.
     """
-    def __init__(self):
+    cache_ttl = SHORT_TTL
+    version = "5"
+
+    def __init__(self, max_queries: int = 3, page_size: int = 50, news_cache_ttl: float = SHORT_TTL,
+                 news_timeout: float = 10.0):
+        """
+        :param max_queries: Maximum NewsAPI requests per document.
+        :param page_size: Articles requested per query (pooled and ranked locally).
+        :param news_cache_ttl: Seconds a NewsAPI response is reused for the same keywords and window.
+        :param news_timeout: Seconds to wait for NewsAPI, further capped by the document deadline.
+        """
         super().__init__()
+        self.max_queries = max_queries
+        self.page_size = page_size
+        self.news_cache_ttl = news_cache_ttl
+        self.news_timeout = news_timeout
+        # Stalled requests cannot be interrupted, so leave room for later documents' queries.
+        self._executor = ThreadPoolExecutor(max_workers=2 * max_queries, thread_name_prefix="newsapi")
+        self._news_cache: Dict[Tuple[frozenset, Tuple[str, str]], Tuple[float, List[Dict]]] = {}
+        self._cache_lock = threading.Lock()
+        self._window_day: Optional[date] = None
+        self._window: Tuple[str, str] = ("", "")
         self.llm_container.register_llm("cerebras", "llama3.3-70b")
         api_key = os.environ.get('NEWS_API_KEY')
         if not api_key:
             debug_print(DEBUG_INFO, "NEWS_API_KEY not found in environment variables")
             self.news_api = None
         else:
+            from newsapi import NewsApiClient
             self.news_api = NewsApiClient(api_key=api_key)
         
-    def _search_news(self, text: str) -> List[Dict]:
-        """Search recent news articles related to the statement."""
-        if not self.news_api:
-            debug_print(DEBUG_INFO, "NewsAPI client not initialized")
-            return []
+    def close(self) -> None:
+        super().close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
-        # Extract key terms from text
-        if not isinstance(text, str):
-            debug_print(DEBUG_INFO, f"Invalid input type: {type(text)}")
-            return []
+    def _news_window(self) -> Tuple[str, str]:
+        """Last 7 days as (from, to) dates; computed once per day."""
+        today = date.today()
+        if self._window_day != today:
+            self._window = ((today - timedelta(days=7)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d'))
+            self._window_day = today
+        return self._window
 
+    @staticmethod
+    def _extract_keywords(text: str) -> List[str]:
         keywords = re.sub(r'[^\w\s]', '', text).split()
-        keywords = [w for w in keywords if len(w) > 3]  # Filter short words
-        
-        if not keywords:
+        keywords = [w for w in keywords if len(w) > 3 and w.lower() not in _STOPWORDS]  # Filter short words
+        return list(dict.fromkeys(keywords))
+
+    def _query_news(self, keywords: List[str], window: Tuple[str, str]) -> List[Dict]:
+        """One NewsAPI request for an OR of keywords, cached by (keyword set, window)."""
+        key = (frozenset(k.lower() for k in keywords), window)
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._news_cache.get(key)
+            if cached and cached[0] > now:
+                debug_print(DEBUG_INFO, f"NewsAPI response served from cache ({len(cached[1])} articles)")
+                return cached[1]
+
+        query = ' OR '.join(keywords)
+        debug_print(DEBUG_INFO, f"Searching news with query: {query}")
+        response = self.news_api.get_everything(
+            q=query,
+            from_param=window[0],
+            to=window[1],
+            language='en',
+            sort_by='relevancy',
+            page_size=self.page_size
+        )
+        articles = response.get('articles', [])
+        debug_print(DEBUG_INFO, f"Found {len(articles)} articles")
+        with self._cache_lock:
+            self._news_cache[key] = (now + self.news_cache_ttl, articles)
+            expired = [k for k, (expires, _) in self._news_cache.items() if expires <= now]
+            for k in expired:
+                del self._news_cache[k]
+        return articles
+
+    def _search_news_batch(self, texts: List[str]) -> List[Optional[List[Dict]]]:
+        """
+        Retrieve news for all statements of a document with a few merged
+        queries, then rank the pooled articles locally for each statement.
+        Returns up to 3 relevant articles per statement, or None for statements
+        that could not be searched: out of time, or none of their keywords fit
+        in the max_queries merged queries.
+        """
+        results: List[Optional[List[Dict]]] = [[] for _ in texts]
+        if not self.news_api:
+            debug_print(DEBUG_INFO, "NewsAPI client not initialized")
+            return results
+        deadline = current_deadline()
+        if deadline.degraded(NO_EXTERNAL, self.__class__.__name__, len(texts)):
+            record_degradation(UNVERIFIED, self.__class__.__name__, len(texts))
+            return [None] * len(texts)
+
+        statement_keywords = [self._extract_keywords(t) if isinstance(t, str) else [] for t in texts]
+        # Keywords shared by more statements go first, so a capped query still covers most statements.
+        frequency = Counter(k.lower() for keywords in statement_keywords for k in set(keywords))
+        merged: Dict[str, str] = {}
+        for keywords in statement_keywords:
+            for k in keywords:
+                merged.setdefault(k.lower(), k)
+        ordered = sorted(merged, key=lambda k: -frequency[k])
+        if not ordered:
             debug_print(DEBUG_INFO, "No valid keywords extracted")
-            return []
+            return results
 
-        # Get news from last 7 days
-        from_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-        
-        try:
-            query = ' OR '.join(keywords)
-            debug_print(DEBUG_INFO, f"Searching news with query: {query}")
-            
-            response = self.news_api.get_everything(
-                q=query,
-                from_param=from_date,
-                language='en',
-                sort_by='relevancy',
-                page_size=5
-            )
-            
-            articles = response.get('articles', [])
-            debug_print(DEBUG_INFO, f"Found {len(articles)} articles")
-            return articles
-            
-        except Exception as e:
-            debug_print(DEBUG_INFO, f"NewsAPI search failed: {str(e)}")
+        queries: List[List[str]] = [[]]
+        dropped = 0
+        for k in ordered:
+            if len(' OR '.join(queries[-1] + [merged[k]])) > MAX_QUERY_LENGTH:
+                if len(queries) >= self.max_queries:
+                    dropped += 1
+                    continue
+                queries.append([])
+            queries[-1].append(merged[k])
+        # Statements none of whose keywords were searched are unverified, not scored as unsupported.
+        searched = {k.lower() for query_keywords in queries for k in query_keywords}
+        unsearched = [i for i, keywords in enumerate(statement_keywords)
+                      if keywords and searched.isdisjoint(k.lower() for k in keywords)]
+        if dropped:
+            debug_print(DEBUG_INFO, f"{dropped} keyword(s) did not fit in {self.max_queries} NewsAPI queries; "
+                                    f"{len(unsearched)} statement(s) left unsearched")
+            metrics = get_metrics()
+            metrics.inc("news_keywords_dropped_total", dropped)
+            if unsearched:
+                metrics.inc("news_statements_unsearched_total", len(unsearched))
+
+        window = self._news_window()
+        futures = [self._executor.submit(bind_context(self._query_news), query_keywords, window)
+                   for query_keywords in queries]
+        _, timed_out = wait(futures, timeout=deadline.timeout(self.news_timeout))
+        for future in timed_out:
+            future.cancel()
+        if timed_out:
+            debug_print(DEBUG_INFO, f"{len(timed_out)} NewsAPI search(es) timed out")
+        pool: Dict[str, Dict] = {}
+        for future in futures:
+            if future in timed_out:
+                continue
+            try:
+                for article in future.result():
+                    pool.setdefault(article.get('url') or article.get('title') or str(len(pool)), article)
+            except Exception as e:
+                debug_print(DEBUG_INFO, f"NewsAPI search failed: {str(e)}")
+        articles = list(pool.values())
+        # Without every answer, finding no articles does not mean there are none.
+        missing: Optional[List[Dict]] = None if timed_out else []
+
+        article_terms = [set(re.sub(r'[^\w\s]', '', f"{a.get('title') or ''} {a.get('description') or ''}").lower().split())
+                         for a in articles]
+        document_frequency = Counter(term for terms in article_terms for term in terms)
+        for i, keywords in enumerate(statement_keywords):
+            terms = {k.lower() for k in keywords}
+            ranked = []
+            for article, a_terms in zip(articles, article_terms):
+                overlap = terms & a_terms
+                if overlap:
+                    score = sum(math.log(1 + len(articles) / document_frequency[t]) for t in overlap)
+                    ranked.append((score, article))
+            ranked.sort(key=lambda item: -item[0])
+            results[i] = [article for _, article in ranked[:3]] or missing
+        for i in unsearched:
+            results[i] = None
+        if timed_out:
+            unverified = sum(1 for result in results if result is None) - len(unsearched)
+            if unverified:
+                record_degradation(UNVERIFIED, self.__class__.__name__, unverified)
+        return results
+
+    def _search_news(self, text: str) -> Optional[List[Dict]]:
+        """Search recent news articles related to the statement."""
+        if not isinstance(text, str):
+            debug_print(DEBUG_INFO, f"Invalid input type: {type(text)}")
             return []
+        return self._search_news_batch([text])[0]
 
-    def check_fact(self, text: str) -> float:
+    def check_fact(self, text: str) -> Optional[float]:
         debug_print(DEBUG_INFO, f"[LatestNewsCheck] Checking latest news: {text}")
         
         # First search news articles
-        articles = self._search_news(text)
-        
+        return self._score_with_articles(text, self._search_news(text))
+
+    def _score_with_articles(self, text: str, articles: Optional[List[Dict]]) -> Optional[float]:
+        if articles is None:
+            debug_print(DEBUG_INFO, "News search did not cover the statement; statement unverified")
+            return None
         if not articles:
             debug_print(DEBUG_INFO, "No relevant news articles found")
             return 0.1
@@ -99,3 +244,49 @@ class LatestNewsCheck(BaseCheck):
         
         debug_print(DEBUG_INFO, f"[LatestNewsCheck] Score for '{text}': {score}")
         return score
+
+    def check_facts(self, texts: List[str]) -> List[Optional[float]]:
+        debug_print(DEBUG_INFO, f"[LatestNewsCheck] Checking {len(texts)} latest news statements in one batch")
+
+        # One retrieval for the whole document: statements from the same story share keywords.
+
+        scores: List[Optional[float]] = [0.1] * len(texts)
+        entries: List[str] = []
+        entry_indices: List[int] = []
+        entry_to_statement: Dict[str, Tuple[str, List[Dict]]] = {}
+        for i, (text, articles) in enumerate(zip(texts, self._search_news_batch(texts))):
+            if articles is None:
+                debug_print(DEBUG_INFO, f"News search did not cover '{text}'; statement unverified")
+                scores[i] = None
+                continue
+            if not articles:
+                debug_print(DEBUG_INFO, f"No relevant news articles found for '{text}'")
+                continue
+            headlines = "; ".join(a['title'] for a in articles[:3])  # Use top 3 articles
+            entry = f"{text}\n   Headlines: {headlines}"
+            entries.append(entry)
+            entry_indices.append(i)
+            entry_to_statement[entry] = (text, articles)
+
+        if not entries:
+            return scores
+
+        batch_prompt_template = """Each of the following {count} statements is listed with recent news headlines related to it.
+        Analyze if each statement is consistent with its headlines.
+        Rate each one from 0 (completely inconsistent) to 1 (completely consistent).
+        Respond with exactly {count} lines in the form "<number>. <score>", one per statement, nothing else.
+        If unsure about a statement, give it a lower score.
+
+        Statements:
+        {statements}
+        Consistency scores:"""
+
+        entry_scores = self.get_llm_truth_scores(
+            entries, batch_prompt_template, "cerebras", "llama3.3-70b",
+            fallback=lambda entry: self._score_with_articles(*entry_to_statement[entry])
+        )
+        for i, score in zip(entry_indices, entry_scores):
+            scores[i] = score
+
+        debug_print(DEBUG_INFO, f"[LatestNewsCheck] Batch scores: {scores}")
+        return scores
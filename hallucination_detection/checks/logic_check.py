@@ -1,17 +1,15 @@
 # hallucination_detection/checks/logic_check.py
 
-from .base_check import BaseCheck
+from .base_check import BaseCheck, CascadeConfig
 from ..debug_logger import debug_print, DEBUG_INFO
+from typing import List, Optional
 
 class LogicCheck(BaseCheck):
     """Check for logical statements using LLM verification."""
-    
-    def __init__(self):
-        super().__init__()
-        self.llm_container.register_llm("cerebras", "llama3.1-8b")
-        self.llm_container.register_llm("cerebras", "llama3.3-70b")
+    version = "5"
+    cascade = CascadeConfig("llama3.1-8b", "llama3.3-70b", low=0.2, high=0.8)
 
-    def check_fact(self, text: str) -> float:
+    def check_fact(self, text: str) -> Optional[float]:
         debug_print(DEBUG_INFO, f"[LogicCheck] Checking logical statement: {text}")
         
         prompt_template = """Analyze the following logical statement and determine its validity.
@@ -24,3 +22,18 @@ class LogicCheck(BaseCheck):
         score = self.get_llm_truth_score(text, prompt_template, "cerebras", "llama3.3-70b")
         debug_print(DEBUG_INFO, f"[LogicCheck] Score for '{text}': {score}")
         return score
+
+    def check_facts(self, texts: List[str]) -> List[Optional[float]]:
+        debug_print(DEBUG_INFO, f"[LogicCheck] Checking {len(texts)} logical statements in one batch")
+
+        batch_prompt_template = """Analyze each of the following {count} logical statements and determine its validity.
+        Rate each one from 0 (completely invalid) to 1 (completely valid).
+        Respond with exactly {count} lines in the form "<number>. <score>", one per statement, nothing else.
+
+        Statements:
+        {statements}
+        Scores:"""
+
+        scores = self.get_llm_truth_scores(texts, batch_prompt_template, "cerebras", "llama3.3-70b")
+        debug_print(DEBUG_INFO, f"[LogicCheck] Batch scores: {scores}")
+        return scores
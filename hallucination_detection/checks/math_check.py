@@ -1,18 +1,28 @@
 # hallucination_detection/checks/math_check.py
 
-from .base_check import BaseCheck
+from .base_check import BaseCheck, CascadeConfig
 from ..debug_logger import debug_print, DEBUG_INFO
+from ..llm_cache import LONG_TTL
+from .math_verifier import verify_math_statement
+from typing import List, Optional
 
 class MathCheck(BaseCheck):
     """
     Check for mathematical statements using LLM verification.
     """
-    def __init__(self):
-        super().__init__()
-        self.llm_container.register_llm("cerebras", "llama3.3-70b")
+    cache_ttl = LONG_TTL
+    version = "6"
+    # The prompt asks for conservative scores, so only near-certain small-model verdicts stand.
+    cascade = CascadeConfig("llama3.1-8b", "llama3.3-70b", low=0.1, high=0.9)
 
-    def check_fact(self, text: str) -> float:
+    def check_fact(self, text: str) -> Optional[float]:
         debug_print(DEBUG_INFO, f"[MathCheck] Checking math problem: {text}")
+
+        # Exact local verification first; only unparseable statements reach the LLM
+        local_score = verify_math_statement(text)
+        if local_score is not None:
+            debug_print(DEBUG_INFO, f"[MathCheck] Local score for '{text}': {local_score}")
+            return local_score
         
         prompt_template = """Analyze the following mathematical statement and determine if it is correct.
         Rate it from 0 (completely incorrect) to 1 (completely correct).
@@ -26,3 +36,28 @@ class MathCheck(BaseCheck):
         score = self.get_llm_truth_score(text, prompt_template, "cerebras", "llama3.3-70b")
         debug_print(DEBUG_INFO, f"[MathCheck] Score for '{text}': {score}")
         return score
+
+    def check_facts(self, texts: List[str]) -> List[Optional[float]]:
+        debug_print(DEBUG_INFO, f"[MathCheck] Checking {len(texts)} math problems in one batch")
+
+        scores = [verify_math_statement(text) for text in texts]
+        remaining = [i for i, score in enumerate(scores) if score is None]
+        if not remaining:
+            return scores
+
+        batch_prompt_template = """Analyze each of the following {count} mathematical statements and determine if it is correct.
+        Rate each one from 0 (completely incorrect) to 1 (completely correct).
+        Respond with exactly {count} lines in the form "<number>. <score>", one per statement, nothing else.
+        Pay attention to numerical calculations, inequalities, and mathematical properties.
+        Be conservative - if you're not completely sure about a statement, give it a lower score.
+
+        Statements:
+        {statements}
+        Scores:"""
+
+        llm_scores = self.get_llm_truth_scores([texts[i] for i in remaining], batch_prompt_template,
+                                               "cerebras", "llama3.3-70b")
+        for i, score in zip(remaining, llm_scores):
+            scores[i] = score
+        debug_print(DEBUG_INFO, f"[MathCheck] Batch scores: {scores}")
+        return scores
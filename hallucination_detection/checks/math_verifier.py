@@ -0,0 +1,332 @@
+# hallucination_detection/checks/math_verifier.py
+"""
+Local, exact verifier for simple math statements.
+
+Handles arithmetic equalities and inequalities ("2 + 2 = 5", "3 * 4 is greater
+than 10"), percentages ("15% of 200 is 30") and simple number-theory
+predicates ("17 is prime", "12 is divisible by 4"). Expressions are parsed by
+a small recursive-descent parser over exact fractions; nothing is passed to
+eval. Statements that do not parse are left to the LLM.
+"""
+
+import math
+import re
+from fractions import Fraction
+from typing import Callable, List, Optional, Tuple
+
+from ..debug_logger import debug_print, DEBUG_INFO
+
+SCORE_TRUE = 1.0
+SCORE_FALSE = 0.0
+# Stated value matches the exact result only after rounding to the stated precision
+# (e.g. "1 / 3 = 0.333").
+SCORE_ROUNDED = 0.9
+
+# Guards against statements that would take unbounded time or memory.
+_MAX_EXPONENT = 1000
+_MAX_DIGITS = 4000
+_MAX_PRIME_CHECK = 1 << 64
+
+_REPLACEMENTS = [
+    ("×", "*"), ("÷", "/"), ("−", "-"), ("–", "-"),
+    ("≤", "<="), ("≥", ">="), ("≠", "!="),
+    ("multiplied by", "*"), ("divided by", "/"), ("to the power of", "^"),
+    ("the square root of", "sqrt "), ("square root of", "sqrt "),
+    ("plus", "+"), ("minus", "-"), ("times", "*"), ("squared", "^ 2"), ("cubed", "^ 3"),
+]
+
+# Relations, longest phrases first: (phrase, comparison on Fractions, is an equality).
+_RELATIONS: List[Tuple[str, Callable[[Fraction, Fraction], bool], bool]] = [
+    ("is greater than or equal to", lambda a, b: a >= b, False),
+    ("is less than or equal to", lambda a, b: a <= b, False),
+    ("is not equal to", lambda a, b: a != b, False),
+    ("does not equal", lambda a, b: a != b, False),
+    ("is greater than", lambda a, b: a > b, False),
+    ("is more than", lambda a, b: a > b, False),
+    ("is larger than", lambda a, b: a > b, False),
+    ("is less than", lambda a, b: a < b, False),
+    ("is smaller than", lambda a, b: a < b, False),
+    ("is at least", lambda a, b: a >= b, False),
+    ("is at most", lambda a, b: a <= b, False),
+    ("is equal to", lambda a, b: a == b, True),
+    ("equals", lambda a, b: a == b, True),
+    ("is not", lambda a, b: a != b, False),
+    ("is", lambda a, b: a == b, True),
+    (">=", lambda a, b: a >= b, False),
+    ("<=", lambda a, b: a <= b, False),
+    ("!=", lambda a, b: a != b, False),
+    ("==", lambda a, b: a == b, True),
+    ("=", lambda a, b: a == b, True),
+    (">", lambda a, b: a > b, False),
+    ("<", lambda a, b: a < b, False),
+]
+
+_HEDGES = ("approximately", "about", "around", "roughly", "nearly", "almost", "~", "≈")
+
+_TOKEN_RE = re.compile(r"\s*(?:(\d+(?:\.\d+)?|\.\d+)|(sqrt)|(\*\*|[-+*/^()%])|(of))")
+_NUMBER_LITERAL_RE = re.compile(r"^-?(\d+)(?:\.(\d+))?$")
+
+
+class _ParseError(ValueError):
+    pass
+
+
+class _ExpressionParser:
+    """
+    Recursive-descent parser for + - * / ^ (or **), unary minus, parentheses,
+    sqrt and "N% of X", evaluated exactly with Fractions.
+    """
+
+    def __init__(self, text: str):
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        tokens, pos = [], 0
+        text = text.strip()
+        while pos < len(text):
+            match = _TOKEN_RE.match(text, pos)
+            if not match or match.end() == pos:
+                raise _ParseError(f"Unexpected input at: {text[pos:]!r}")
+            tokens.append(next(group for group in match.groups() if group is not None))
+            pos = match.end()
+            while pos < len(text) and text[pos].isspace():
+                pos += 1
+        if not tokens:
+            raise _ParseError("Empty expression")
+        return tokens
+
+    def parse(self) -> Fraction:
+        value = self._expression()
+        if self.pos != len(self.tokens):
+            raise _ParseError(f"Trailing tokens: {self.tokens[self.pos:]}")
+        return value
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise _ParseError("Unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def _expression(self) -> Fraction:
+        value = self._term()
+        while self._peek() in ("+", "-"):
+            if self._take() == "+":
+                value += self._term()
+            else:
+                value -= self._term()
+        return value
+
+    def _term(self) -> Fraction:
+        value = self._unary()
+        while self._peek() in ("*", "/"):
+            op = self._take()
+            rhs = self._unary()
+            if op == "*":
+                value *= rhs
+            else:
+                if rhs == 0:
+                    raise _ParseError("Division by zero")
+                value /= rhs
+        return value
+
+    def _unary(self) -> Fraction:
+        if self._peek() == "-":
+            self._take()
+            return -self._unary()
+        if self._peek() == "+":
+            self._take()
+            return self._unary()
+        return self._power()
+
+    def _power(self) -> Fraction:
+        base = self._postfix()
+        if self._peek() in ("^", "**"):
+            self._take()
+            exponent = self._unary()  # right-associative
+            if exponent.denominator != 1 or abs(exponent) > _MAX_EXPONENT:
+                raise _ParseError("Unsupported exponent")
+            if base == 0 and exponent < 0:
+                raise _ParseError("Division by zero")
+            magnitude = max(abs(base.numerator), abs(base.denominator))
+            if magnitude.bit_length() * abs(exponent.numerator) > _MAX_DIGITS * 4:
+                raise _ParseError("Result too large")
+            return base ** int(exponent)
+        return base
+
+    def _postfix(self) -> Fraction:
+        value = self._primary()
+        if self._peek() == "%":
+            self._take()
+            value /= 100
+            if self._peek() == "of":
+                self._take()
+                value *= self._unary()
+        return value
+
+    def _primary(self) -> Fraction:
+        token = self._take()
+        if token == "(":
+            value = self._expression()
+            if self._take() != ")":
+                raise _ParseError("Unbalanced parentheses")
+            return value
+        if token == "sqrt":
+            return self._exact_sqrt(self._postfix())
+        if token[0].isdigit() or token[0] == ".":
+            if len(token) > _MAX_DIGITS:
+                raise _ParseError("Number too long")
+            return Fraction(token)
+        raise _ParseError(f"Unexpected token: {token!r}")
+
+    @staticmethod
+    def _exact_sqrt(value: Fraction) -> Fraction:
+        if value < 0:
+            raise _ParseError("Square root of a negative number")
+        num, den = _isqrt_exact(value.numerator), _isqrt_exact(value.denominator)
+        if num is None or den is None:
+            raise _ParseError("Irrational square root")
+        return Fraction(num, den)
+
+
+def _isqrt_exact(n: int) -> Optional[int]:
+    root = math.isqrt(n)
+    return root if root * root == n else None
+
+
+def _is_prime(n: int) -> bool:
+    """Deterministic Miller-Rabin for n < 2**64."""
+    if n < 2:
+        return False
+    small_primes = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+    for p in small_primes:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in small_primes:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _normalize(text: str) -> str:
+    text = text.strip().lower()
+    text = re.sub(r"[.!;]+$", "", text).strip()
+    text = re.sub(r"(?<=\d),(?=\d{3}\b)", "", text)  # 1,000 -> 1000
+    for old, new in _REPLACEMENTS:
+        text = re.sub(rf"(?<![a-z]){re.escape(old)}(?![a-z])", f" {new} ", text)
+    text = re.sub(r"\bpercent\b", "%", text)
+    text = re.sub(r"^(?:the )?(?:number|integer|result of|value of) ", "", text)
+    return " ".join(text.split())
+
+
+def _evaluate(expression: str) -> Fraction:
+    return _ExpressionParser(expression).parse()
+
+
+def _as_integer(value: Fraction) -> int:
+    if value.denominator != 1:
+        raise _ParseError("Not an integer")
+    return value.numerator
+
+
+def _check_predicate(text: str) -> Optional[bool]:
+    match = re.match(r"^(.+?) is (not )?(?:an? )?(prime|composite|even|odd|perfect square)(?: number)?$", text)
+    if match:
+        value = _evaluate(match.group(1))
+        kind = match.group(3)
+        if value.denominator != 1:
+            result = False
+        else:
+            n = value.numerator
+            if kind in ("prime", "composite") and abs(n) >= _MAX_PRIME_CHECK:
+                raise _ParseError("Number too large for a primality check")
+            if kind == "prime":
+                result = _is_prime(n)
+            elif kind == "composite":
+                result = n > 3 and not _is_prime(n)
+            elif kind == "even":
+                result = n % 2 == 0
+            elif kind == "odd":
+                result = n % 2 == 1
+            else:
+                result = n >= 0 and _isqrt_exact(n) is not None
+        return result != bool(match.group(2))
+
+    match = re.match(r"^(.+?) is (not )?(?:evenly )?divisible by (.+)$", text)
+    if match:
+        a, b = _as_integer(_evaluate(match.group(1))), _as_integer(_evaluate(match.group(3)))
+        if b == 0:
+            raise _ParseError("Divisibility by zero")
+        return (a % b == 0) != bool(match.group(2))
+
+    match = re.match(r"^(.+?) is (not )?an? (factor|divisor|multiple) of (.+)$", text)
+    if match:
+        a, b = _as_integer(_evaluate(match.group(1))), _as_integer(_evaluate(match.group(4)))
+        divisor, dividend = (a, b) if match.group(3) != "multiple" else (b, a)
+        if divisor == 0:
+            raise _ParseError("Divisibility by zero")
+        return (dividend % divisor == 0) != bool(match.group(2))
+    return None
+
+
+def _matches_rounded(actual: Fraction, stated_text: str) -> bool:
+    """True if the stated decimal literal equals actual rounded to its precision."""
+    literal = _NUMBER_LITERAL_RE.match(stated_text.replace(" ", ""))
+    if not literal or not literal.group(2):
+        return False
+    places = len(literal.group(2))
+    return round(actual, places) == Fraction(stated_text.replace(" ", ""))
+
+
+def verify_math_statement(text: str) -> Optional[float]:
+    """
+    Return SCORE_TRUE/SCORE_FALSE (or SCORE_ROUNDED) for a statement that can
+    be checked exactly, or None if it cannot be parsed and needs the LLM.
+    """
+    normalized = _normalize(text)
+    if not normalized or not re.search(r"\d", normalized) or any(h in normalized for h in _HEDGES):
+        return None
+
+    try:
+        predicate = _check_predicate(normalized)
+        if predicate is not None:
+            debug_print(DEBUG_INFO, f"[MathVerifier] Predicate '{text}' evaluated to {predicate}")
+            return SCORE_TRUE if predicate else SCORE_FALSE
+    except (_ParseError, ZeroDivisionError, OverflowError):
+        pass
+
+    for phrase, compare, is_equality in _RELATIONS:
+        pattern = rf"^(.+?)\s*{re.escape(phrase)}\s*(.+)$" if not phrase[0].isalpha() \
+            else rf"^(.+?) {re.escape(phrase)} (.+)$"
+        match = re.match(pattern, normalized)
+        if not match:
+            continue
+        try:
+            lhs, rhs = _evaluate(match.group(1)), _evaluate(match.group(2))
+        except (_ParseError, ZeroDivisionError, OverflowError):
+            continue
+        result = compare(lhs, rhs)
+        debug_print(DEBUG_INFO, f"[MathVerifier] '{text}' evaluated to {result}")
+        if result:
+            return SCORE_TRUE
+        if is_equality and (_matches_rounded(lhs, match.group(2)) or _matches_rounded(rhs, match.group(1))):
+            # Equality that only holds after rounding to the stated precision.
+            return SCORE_ROUNDED
+        return SCORE_FALSE
+    return None
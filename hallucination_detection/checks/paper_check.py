@@ -1,53 +1,168 @@
 # hallucination_detection/checks/paper_check.py
 
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Tuple
+
 from .base_check import BaseCheck
+from .paper_index import PaperTitleIndex, normalize_title
+from ..deadline import NO_EXTERNAL, UNVERIFIED, current_deadline, record_degradation
 from ..debug_logger import debug_print, DEBUG_INFO
-from scholarly import scholarly
-import arxiv
-import re
+
+SCORE_SCHOLAR = 0.95
+SCORE_ARXIV = 0.90
+SCORE_INDEX = 0.95
+SCORE_NOT_FOUND = 0.1
+
+DEFAULT_BACKEND_TIMEOUTS = {"scholar": 10.0, "arxiv": 10.0}
+DEFAULT_TITLE_CACHE_SIZE = 4096
+
 
 class PaperCheck(BaseCheck):
     """
     Check for academic paper references using Google Scholar and arXiv.
+
+    Known titles resolve from an optional offline index (see paper_index.py,
+    path from index_path or HALLUCINATION_PAPER_INDEX). Otherwise both backends
+    are queried concurrently and the first positive answer wins; each backend
+    has its own timeout, and answered lookups are cached by normalized title.
+    Once the document deadline runs low only the index is consulted, and
+    titles it does not know are left unverified (None).
     """
-    def __init__(self):
+    def __init__(self, index_path: Optional[str] = None,
+                 backend_timeouts: Optional[Dict[str, float]] = None,
+                 cache_size: int = DEFAULT_TITLE_CACHE_SIZE):
+        """
+        :param index_path: Offline title index built with paper_index.py.
+        :param backend_timeouts: Seconds to wait for each backend ("scholar", "arxiv").
+        :param cache_size: Maximum number of titles kept in the result cache.
+        """
+        # Search clients are heavy imports, so load them only when the check is built.
+        from scholarly import scholarly
+        import arxiv
         self.scholar_client = scholarly
+        self.arxiv = arxiv
         self.arxiv_client = arxiv.Client()
 
-    def check_fact(self, text: str) -> float:
-        debug_print(DEBUG_INFO, f"[PaperCheck] Checking paper fact: {text}")
-        
+        self.backend_timeouts = dict(DEFAULT_BACKEND_TIMEOUTS, **(backend_timeouts or {}))
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Stalled backend calls cannot be interrupted, so give them room to finish
+        # without blocking lookups for later statements.
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="paper-lookup")
+
+        index_path = index_path or os.environ.get("HALLUCINATION_PAPER_INDEX")
+        self.index = PaperTitleIndex.load(index_path) if index_path and os.path.exists(index_path) else None
+
+    def close(self) -> None:
+        # BaseCheck.__init__ is not run for this check, so it has no ensemble executor.
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def extract_title(text: str) -> str:
         # Extract potential paper title using simple heuristic
         title_match = re.search(r'"([^"]*)"', text) or re.search(r"'([^']*)'", text)
-        if title_match:
-            paper_title = title_match.group(1)
-        else:
-            paper_title = text
-            
+        return title_match.group(1) if title_match else text
+
+    def check_fact(self, text: str) -> Optional[float]:
+        debug_print(DEBUG_INFO, f"[PaperCheck] Checking paper fact: {text}")
+        paper_title = self.extract_title(text)
         debug_print(DEBUG_INFO, f"Searching for paper: {paper_title}")
-        
-        # Try Google Scholar first
-        try:
-            search_query = scholarly.search_pubs(paper_title)
-            first_result = next(search_query, None)
-            if first_result:
-                debug_print(DEBUG_INFO, "Found paper in Google Scholar")
-                return 0.95
-        except Exception as e:
-            debug_print(DEBUG_INFO, f"Google Scholar search failed: {e}")
-
-        # Try arXiv if Google Scholar fails
-        try:
-            search = arxiv.Search(
-                query=paper_title,
-                max_results=1
-            )
-            results = list(self.arxiv_client.results(search))
-            if results:
-                debug_print(DEBUG_INFO, "Found paper in arXiv")
-                return 0.90
-        except Exception as e:
-            debug_print(DEBUG_INFO, f"arXiv search failed: {e}")
 
+        if self.index is not None:
+            match = self.index.lookup(paper_title)
+            if match:
+                debug_print(DEBUG_INFO, f"Found paper in offline index: {match[0]} ({match[2]:.2f})")
+                return SCORE_INDEX
+
+        key = normalize_title(paper_title)
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                debug_print(DEBUG_INFO, "Paper lookup served from cache")
+                return self._cache[key]
+
+        if current_deadline().degraded(NO_EXTERNAL, self.__class__.__name__):
+            debug_print(DEBUG_INFO, "No time left for Scholar or arXiv; paper unverified")
+            record_degradation(UNVERIFIED, self.__class__.__name__)
+            return None
+
+        score, definitive = self._search_backends(paper_title)
+        if definitive:
+            with self._cache_lock:
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return score
+
+    def _search_backends(self, paper_title: str) -> Tuple[Optional[float], bool]:
+        """
+        Query all backends concurrently. Returns (score, definitive), where
+        definitive is False if a backend failed or timed out before any
+        positive answer, so the result should not be cached. The score is
+        None when the document deadline cut a lookup short.
+        """
+        backends: Dict[str, Callable[[str], Optional[float]]] = {
+            "scholar": self._search_scholar,
+            "arxiv": self._search_arxiv,
+        }
+        start = time.monotonic()
+        futures = {self._executor.submit(search, paper_title): name for name, search in backends.items()}
+        budget = current_deadline().timeout()
+        deadlines = {name: start + (self.backend_timeouts[name] if budget is None
+                                    else min(self.backend_timeouts[name], budget))
+                     for name in backends}
+        definitive = True
+        cut_short = False
+
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            expired = {f for f in pending if deadlines[futures[f]] <= now}
+            for future in expired:
+                debug_print(DEBUG_INFO, f"{futures[future]} search timed out")
+                future.cancel()
+                definitive = False
+                cut_short = cut_short or budget is not None and budget < self.backend_timeouts[futures[future]]
+            pending -= expired
+            if not pending:
+                break
+            timeout = min(deadlines[futures[f]] for f in pending) - now
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    score = future.result()
+                except Exception as e:
+                    debug_print(DEBUG_INFO, f"{name} search failed: {e}")
+                    definitive = False
+                    continue
+                if score is not None:
+                    debug_print(DEBUG_INFO, f"Found paper via {name} in {time.monotonic() - start:.2f}s")
+                    for other in pending:
+                        other.cancel()
+                    return score, True
+
+        if cut_short:
+            debug_print(DEBUG_INFO, "Paper lookup cut short by the document deadline; paper unverified")
+            record_degradation(UNVERIFIED, self.__class__.__name__)
+            return None, False
         debug_print(DEBUG_INFO, "Paper not found in either database")
-        return 0.1  # Low score if paper not found
+        return SCORE_NOT_FOUND, definitive  # Low score if paper not found
+
+    def _search_scholar(self, paper_title: str) -> Optional[float]:
+        search_query = self.scholar_client.search_pubs(paper_title)
+        return SCORE_SCHOLAR if next(search_query, None) else None
+
+    def _search_arxiv(self, paper_title: str) -> Optional[float]:
+        search = self.arxiv.Search(
+            query=paper_title,
+            max_results=1
+        )
+        return SCORE_ARXIV if list(self.arxiv_client.results(search)) else None
@@ -0,0 +1,166 @@
+# hallucination_detection/checks/paper_index.py
+"""
+Offline paper title index for PaperCheck.
+
+Titles from an arXiv metadata dump (the JSON-lines snapshot with "id" and
+"title" fields per record) are normalized and indexed by character trigrams.
+Lookups generate candidates from the query's rarest trigrams and rank them by
+trigram Jaccard similarity, so known papers resolve locally in milliseconds
+even when the quoted title has small typos or different punctuation.
+
+Build an index from a dump:
+    python -m hallucination_detection.checks.paper_index build arxiv-metadata-oai-snapshot.json \
+        --output paper_index.jsonl
+"""
+
+import argparse
+import json
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE
+
+DEFAULT_MIN_SIMILARITY = 0.8
+# Number of rarest query trigrams used to generate candidates.
+_CANDIDATE_TRIGRAMS = 8
+_MAX_CANDIDATES = 200
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, strip accents, LaTeX markup and punctuation, and collapse whitespace."""
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(ch for ch in title if not unicodedata.combining(ch))
+    title = re.sub(r"\\[a-zA-Z]+|[{}$]", " ", title.lower())
+    title = re.sub(r"[^a-z0-9]+", " ", title)
+    return " ".join(title.split())
+
+
+def trigrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def iter_arxiv_dump(path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (arxiv_id, title) from an arXiv metadata JSON-lines dump."""
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            title = record.get("title")
+            if title:
+                yield str(record.get("id", "")), " ".join(title.split())
+
+
+class PaperTitleIndex:
+    """
+    In-memory trigram index over normalized paper titles.
+    """
+
+    def __init__(self, min_similarity: float = DEFAULT_MIN_SIMILARITY):
+        """
+        :param min_similarity: Minimum trigram Jaccard similarity for a fuzzy match.
+        """
+        self.min_similarity = min_similarity
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self._exact: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def add(self, paper_id: str, title: str) -> None:
+        normalized = normalize_title(title)
+        if not normalized or normalized in self._exact:
+            return
+        doc = len(self.titles)
+        self.ids.append(paper_id)
+        self.titles.append(title)
+        self._exact[normalized] = doc
+        for gram in trigrams(normalized):
+            self._postings[gram].append(doc)
+
+    def add_all(self, records: Iterable[Tuple[str, str]]) -> None:
+        for paper_id, title in records:
+            self.add(paper_id, title)
+
+    def lookup(self, title: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Return (paper_id, title, similarity) of the best match at or above
+        min_similarity, or None.
+        """
+        normalized = normalize_title(title)
+        if not normalized:
+            return None
+        doc = self._exact.get(normalized)
+        if doc is not None:
+            return self.ids[doc], self.titles[doc], 1.0
+
+        query = trigrams(normalized)
+        known = sorted((g for g in query if g in self._postings), key=lambda g: len(self._postings[g]))
+        # A match above min_similarity must share at least this many trigrams with the query,
+        # so it contains at least one of the rarest len(query) - needed + 1 trigrams.
+        needed = int(self.min_similarity * len(query))
+        counts: Dict[int, int] = defaultdict(int)
+        for gram in known[:max(_CANDIDATE_TRIGRAMS, len(query) - needed + 1)]:
+            for doc in self._postings[gram]:
+                counts[doc] += 1
+        candidates = sorted(counts, key=counts.get, reverse=True)[:_MAX_CANDIDATES]
+
+        best, best_score = None, 0.0
+        for doc in candidates:
+            grams = trigrams(normalize_title(self.titles[doc]))
+            score = len(query & grams) / len(query | grams)
+            if score > best_score:
+                best, best_score = doc, score
+        debug_print(DEBUG_VERBOSE, f"Paper index: {len(candidates)} candidates for '{title}', best {best_score:.2f}")
+        if best is None or best_score < self.min_similarity:
+            return None
+        return self.ids[best], self.titles[best], best_score
+
+    def save(self, path: str) -> None:
+        """Write the index as JSON lines of [paper_id, title]; postings are rebuilt on load."""
+        with open(path, "w") as f:
+            for paper_id, title in zip(self.ids, self.titles):
+                f.write(json.dumps([paper_id, title], ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(cls, path: str, min_similarity: float = DEFAULT_MIN_SIMILARITY) -> "PaperTitleIndex":
+        index = cls(min_similarity=min_similarity)
+        with open(path, "r") as f:
+            index.add_all(tuple(json.loads(line)) for line in f if line.strip())
+        debug_print(DEBUG_INFO, f"Loaded paper index with {len(index)} titles from {path}")
+        return index
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Build or query the offline paper title index")
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="Index titles from an arXiv metadata JSON-lines dump")
+    build_cmd.add_argument("dump")
+    build_cmd.add_argument("--output", required=True)
+    lookup_cmd = sub.add_parser("lookup", help="Look up titles in an index")
+    lookup_cmd.add_argument("index")
+    lookup_cmd.add_argument("titles", nargs="+")
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "build":
+        index = PaperTitleIndex()
+        index.add_all(iter_arxiv_dump(args.dump))
+        index.save(args.output)
+        print(f"Indexed {len(index)} titles into {args.output}")
+    else:
+        index = PaperTitleIndex.load(args.index)
+        for title in args.titles:
+            match = index.lookup(title)
+            print(f"{match[0]}\t{match[2]:.2f}\t{match[1]}" if match else f"-\t-\t{title}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# hallucination_detection/deadline.py
+"""
+Per-document latency budgets with graceful degradation.
+
+A Deadline starts when a document (or service request) arrives and is made
+current with deadline_scope. The classifier, the statement parser, the checks
+and LLMClient read it with current_deadline() rather than taking it as an
+argument through every layer, and LLM calls are given at most the time left.
+Threads do not inherit the current deadline, so work handed to another thread
+is wrapped with bind_context.
+
+As the budget runs down, stages degrade in a fixed order (Deadline.level).
+Each cut-off leaves room for at least one small-model call before the next,
+so short budgets still pass through every level rather than jumping to
+UNVERIFIED:
+    FULL         everything as configured
+    NO_EXTERNAL  skip external lookups (Google Scholar, arXiv, NewsAPI)
+    SMALL_MODEL  also classify, extract and score with the small model only
+                 (no cascade escalation, no ensemble)
+    UNVERIFIED   start no further calls; statements get no score (None) and
+                 are reported as unverified
+"""
+
+import contextvars
+import functools
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from .metrics import get_metrics
+
+FULL, NO_EXTERNAL, SMALL_MODEL, UNVERIFIED = range(4)
+LEVEL_NAMES = ("full", "no_external", "small_model", "unverified")
+
+# Fraction of the budget left below which external lookups, then large models, are dropped.
+NO_EXTERNAL_BELOW = 0.5
+SMALL_MODEL_BELOW = 0.25
+# Seconds left below which no call is started, since it could not finish in time.
+MIN_CALL_SECONDS = 0.5
+# Time one small-model call is expected to take; the margin kept between cut-offs.
+SMALL_CALL_SECONDS = 0.5
+
+BUDGET_ENV = "HALLUCINATION_DOCUMENT_BUDGET"
+
+
+class Deadline:
+    """
+    A latency budget that started at construction time.
+    """
+
+    def __init__(self,
+                 budget: Optional[float],
+                 no_external_below: float = NO_EXTERNAL_BELOW,
+                 small_model_below: float = SMALL_MODEL_BELOW,
+                 min_call_seconds: float = MIN_CALL_SECONDS,
+                 small_call_seconds: float = SMALL_CALL_SECONDS):
+        """
+        :param budget: Seconds available; None means no deadline.
+        :param no_external_below: Fraction of the budget left below which external lookups are skipped.
+        :param small_model_below: Fraction of the budget left below which only the small model is used.
+        :param min_call_seconds: Seconds left below which statements are left unverified.
+        :param small_call_seconds: Expected duration of one small-model call. The small-model cut-off
+            is at least min_call_seconds plus this, and the no-external one at least this beyond it.
+        """
+        self.budget = budget
+        self.expires = None if budget is None else time.monotonic() + budget
+        self.no_external_below = no_external_below
+        self.small_model_below = small_model_below
+        self.min_call_seconds = min_call_seconds
+        self.small_call_seconds = small_call_seconds
+        if budget is not None:
+            self.small_model_seconds = max(small_model_below * budget, min_call_seconds + small_call_seconds)
+            self.no_external_seconds = max(no_external_below * budget, self.small_model_seconds + small_call_seconds)
+
+    @property
+    def unlimited(self) -> bool:
+        return self.expires is None
+
+    def remaining(self) -> float:
+        """Seconds left (may be negative once expired); infinite without a deadline."""
+        if self.expires is None:
+            return math.inf
+        return self.expires - time.monotonic()
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """Seconds a call may take: the time left, capped at cap. None when neither limits it."""
+        if self.expires is None:
+            return cap
+        remaining = max(0.0, self.remaining())
+        return remaining if cap is None else min(cap, remaining)
+
+    def level(self) -> int:
+        """Current degradation level (FULL, NO_EXTERNAL, SMALL_MODEL or UNVERIFIED)."""
+        if self.expires is None:
+            return FULL
+        remaining = self.remaining()
+        if remaining < self.min_call_seconds or self.budget <= 0:
+            return UNVERIFIED
+        if remaining < self.small_model_seconds:
+            return SMALL_MODEL
+        if remaining < self.no_external_seconds:
+            return NO_EXTERNAL
+        return FULL
+
+    def degraded(self, level: int, stage: str, count: int = 1) -> bool:
+        """
+        Whether the budget has run down to level. If so, records that stage
+        degraded to it for count statements.
+        """
+        if self.level() < level:
+            return False
+        record_degradation(level, stage, count)
+        return True
+
+    def __repr__(self) -> str:
+        if self.expires is None:
+            return "Deadline(None)"
+        return f"Deadline({self.budget}, remaining={self.remaining():.3f}, level={LEVEL_NAMES[self.level()]})"
+
+
+_NO_DEADLINE = Deadline(None)
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def record_degradation(level: int, stage: str, count: int = 1) -> None:
+    get_metrics().inc("deadline_degradations_total", count, stage=stage, level=LEVEL_NAMES[level])
+
+
+def current_deadline() -> Deadline:
+    """The deadline of the work in progress; an unlimited one outside any deadline_scope."""
+    return _current.get() or _NO_DEADLINE
+
+
+def has_deadline() -> bool:
+    return _current.get() is not None
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Deadline]:
+    """Make deadline current for the enclosed code; None leaves the current one in place."""
+    if deadline is None:
+        yield current_deadline()
+        return
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    fn bound to a copy of the caller's context (and so its deadline), for
+    running in another thread. Bind once per submission: a context cannot be
+    entered by two threads at once.
+    """
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def default_budget() -> Optional[float]:
+    """Document budget in seconds from HALLUCINATION_DOCUMENT_BUDGET, if set."""
+    value = os.environ.get(BUDGET_ENV)
+    return float(value) if value else None
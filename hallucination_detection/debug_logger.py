@@ -1,8 +1,15 @@
 # hallucination_detection/debug_logger.py
 """
 Simple debug-level logging utility.
+
+Messages may use %-style arguments, which are only formatted when the level
+is enabled:
+    debug_print(DEBUG_VERBOSE, "Prompt for %s: %s", model, prompt)
 """
 
+import sys
+from typing import TextIO
+
 # Debug level constants
 DEBUG_NONE = 0
 DEBUG_ERROR = 1
@@ -12,11 +19,22 @@ DEBUG_VERBOSE = 4
 
 # Global debug level. Adjust as needed.
 DEBUG_LEVEL = DEBUG_WARNING
+# Debug output goes to stderr so stdout stays free for results.
+DEBUG_STREAM: TextIO = sys.stderr
 
 def set_debug_level(level: int):
     global DEBUG_LEVEL
     DEBUG_LEVEL = level
 
-def debug_print(level: int, message: str):
+def set_debug_stream(stream: TextIO):
+    global DEBUG_STREAM
+    DEBUG_STREAM = stream
+
+def debug_enabled(level: int) -> bool:
+    return DEBUG_LEVEL >= level
+
+def debug_print(level: int, message: str, *args):
     if DEBUG_LEVEL >= level:
-        print(f"[DBG] {message}")
+        if args:
+            message = message % args
+        print(f"[DBG] {message}", file=DEBUG_STREAM)
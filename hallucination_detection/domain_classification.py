@@ -1,8 +1,16 @@
 # hallucination_detection/domain_classification.py
 
-from typing import Optional
-from .debug_logger import debug_print, DEBUG_INFO
+import threading
+from typing import Dict, Optional
+from .deadline import SMALL_MODEL, UNVERIFIED, current_deadline
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_WARNING
 from .llm import LLMContainer
+from .llm_scheduler import LLMDeadlineExceeded
+from .local_classifier import LLM_ONLY_DOMAINS, LocalDomainClassifier
+
+# Model that classifies, and the one used once the document deadline runs low.
+CLASSIFY_MODEL = "llama3.3-70b"
+DEGRADED_CLASSIFY_MODEL = "llama3.1-8b"
 
 class DomainClassifier:
     """
@@ -10,31 +18,118 @@ class DomainClassifier:
     'history', 'paper', 'math', 'logic', 'general', 'latest_news', etc.
     """
 
-    def __init__(self):
+    def __init__(self, use_local: bool = True, local_threshold: float = 0.85):
+        """
+        :param use_local: Answer high-confidence cases with the local pre-classifier.
+        :param local_threshold: Minimum local confidence; below it the LLM decides.
+        """
         self.llm_container = LLMContainer()
-        self.llm_container.register_llm("cerebras", "llama3.3-70b")
+        self.llm_container.register_llm("cerebras", CLASSIFY_MODEL)
+        self.llm_container.register_llm("cerebras", DEGRADED_CLASSIFY_MODEL)
         self.domains = ["history", "paper", "math", "logic", "latest_news", "general", "none"]
+        self.local_classifier = LocalDomainClassifier(threshold=local_threshold) if use_local else None
+        self.local_calls = 0
+        self.llm_calls = 0
+        self._stats_lock = threading.Lock()
 
     def classify(self, text: str) -> Optional[str]:
         """
-        Uses LLM to classify the domain of the input text.
+        Uses LLM to classify the domain of the input text. Once the document
+        deadline runs low the small model classifies, and once it runs out
+        the local classifier's best guess is used.
         """
-        debug_print(DEBUG_INFO, f"Classifying domain for text: {text}")
+        debug_print(DEBUG_INFO, "Classifying domain for text: %s", text)
 
-        llm_client = self.llm_container.get_llm("cerebras", "llama3.3-70b")
-        
-        prompt = f"""Classify the following text into one of these domains: {', '.join(self.domains)}
+        local_domain = self._classify_locally(text)
+        if local_domain is not None:
+            return local_domain
+
+        model = self._llm_model()
+        if model is None:
+            return self._best_local_guess(text)
+        llm_client = self.llm_container.get_llm("cerebras", model)
+        try:
+            response = llm_client.generate_text(self._build_prompt(text), lane="classify")
+        except LLMDeadlineExceeded as e:
+            debug_print(DEBUG_WARNING, "Classification ran out of time: %s", e)
+            return self._best_local_guess(text)
+        return self._parse_response(response)
+
+    async def aclassify(self, text: str) -> Optional[str]:
+        """
+        Async variant of classify.
+        """
+        debug_print(DEBUG_INFO, "Classifying domain for text: %s", text)
+
+        local_domain = self._classify_locally(text)
+        if local_domain is not None:
+            return local_domain
+
+        model = self._llm_model()
+        if model is None:
+            return self._best_local_guess(text)
+        llm_client = self.llm_container.get_llm("cerebras", model)
+        try:
+            response = await llm_client.agenerate_text(self._build_prompt(text), lane="classify")
+        except LLMDeadlineExceeded as e:
+            debug_print(DEBUG_WARNING, "Classification ran out of time: %s", e)
+            return self._best_local_guess(text)
+        return self._parse_response(response)
+
+    def stats(self) -> Dict[str, float]:
+        """Local vs. LLM classification counts and the fraction of LLM calls saved."""
+        total = self.local_calls + self.llm_calls
+        return {
+            "local_calls": self.local_calls,
+            "llm_calls": self.llm_calls,
+            "saved_fraction": self.local_calls / total if total else 0.0,
+        }
+
+    def _classify_locally(self, text: str) -> Optional[str]:
+        domain = None
+        if self.local_classifier is not None:
+            domain, confidence = self.local_classifier.predict(text)
+            if domain is not None:
+                debug_print(DEBUG_INFO, "Local classifier chose '%s' (%.2f)", domain, confidence)
+        with self._stats_lock:
+            if domain is not None:
+                self.local_calls += 1
+            else:
+                self.llm_calls += 1
+        return domain
+
+    @staticmethod
+    def _llm_model() -> Optional[str]:
+        """Model to classify with under the current deadline; None when no call fits."""
+        deadline = current_deadline()
+        if deadline.degraded(UNVERIFIED, "classify"):
+            return None
+        if deadline.degraded(SMALL_MODEL, "classify"):
+            return DEGRADED_CLASSIFY_MODEL
+        return CLASSIFY_MODEL
+
+    def _best_local_guess(self, text: str) -> str:
+        """The local classifier's top checked domain regardless of confidence, else general."""
+        if self.local_classifier is None or not self.local_classifier.weights:
+            return "general"
+        probabilities = self.local_classifier.probabilities(text)
+        domain = max((d for d in probabilities if d not in LLM_ONLY_DOMAINS), key=probabilities.get)
+        debug_print(DEBUG_INFO, "No time to classify with the LLM; local guess '%s' (%.2f)",
+                    domain, probabilities[domain])
+        return domain
+
+    def _build_prompt(self, text: str) -> str:
+        return f"""Classify the following text into one of these domains: {', '.join(self.domains)}
         Only respond with the domain name, nothing else. If it is just a point of view or adjective sentence， return 'none'. Be conservative with math category except there is clear math formula. Pay attention on the reference which can be in paper category.
         
         Text: {text}"""
 
-        response = llm_client.generate_text(prompt)
-
+    def _parse_response(self, response) -> str:
         # Extract content from ChatCompletionResponse
         content = response.choices[0].message.content if hasattr(response, 'choices') else response
 
         # Clean up response to get just the domain
-        debug_print(DEBUG_INFO, f"LLM return classification: {content}")
+        debug_print(DEBUG_INFO, "LLM return classification: %s", content)
         predicted_domain = content.strip().lower()
         
         # Validate the response is one of our expected domains
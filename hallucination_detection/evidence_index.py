@@ -0,0 +1,383 @@
+# hallucination_detection/evidence_index.py
+"""
+Local evidence retrieval with an on-disk BM25 index.
+
+`ingest` splits local corpora (directories or globs of .txt files, JSONL files
+with a text field) into passages and writes an inverted index that is
+memory-mapped at query time:
+
+    meta.json          passage count, average length and BM25 parameters
+    terms.txt          the vocabulary, sorted and concatenated
+    term_offsets.u64   byte offset of each term in terms.txt (plus the end)
+    term_postings.u64  [start, length] of each term's postings
+    doc_ids.u32        posting passage ids, per term sorted by impact (descending)
+    impacts.f32        precomputed BM25 weight of the term in that passage
+    passages.jsonl     passage records; offsets.u64 holds their byte offsets
+
+The build keeps at most run_postings postings in memory, spilling sorted runs
+to disk and merging them one term at a time. Opening an index reads only
+meta.json; terms are found by binary search in the mapped vocabulary. Because
+impacts are precomputed and postings are impact-ordered, a query only sums the
+first max_postings_per_term entries of each term, so its cost does not grow
+with the corpus beyond the logarithmic term lookup.
+
+Usage:
+    python -m hallucination_detection.evidence_index ingest wiki.jsonl news/ --output evidence_index/
+    python -m hallucination_detection.evidence_index search evidence_index/ "The Eiffel Tower opened in 1889"
+
+Checks use it through BaseCheck.retrieve(); the index is opened from
+HALLUCINATION_EVIDENCE_INDEX.
+"""
+
+import argparse
+import glob
+import heapq
+import itertools
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import tempfile
+import threading
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE
+
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+DEFAULT_PASSAGE_WORDS = 120
+DEFAULT_MAX_POSTINGS_PER_TERM = 10_000
+# Postings held in memory while building before a sorted run is spilled to disk.
+DEFAULT_RUN_POSTINGS = 2_000_000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "he", "in", "is", "it",
+    "its", "of", "on", "or", "she", "that", "the", "their", "they", "this", "to", "was", "were", "which",
+    "with", "will", "would",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class Passage:
+    """A retrieved passage and its BM25 score."""
+    passage_id: int
+    text: str
+    source: str
+    score: float
+
+
+def split_passages(text: str, max_words: int = DEFAULT_PASSAGE_WORDS) -> Iterator[str]:
+    """Split on blank lines, then cut long paragraphs into max_words windows."""
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        for start in range(0, len(words), max_words):
+            chunk = " ".join(words[start:start + max_words])
+            if chunk:
+                yield chunk
+
+
+def iter_corpus(sources: List[str], text_field: str = "text",
+                max_words: int = DEFAULT_PASSAGE_WORDS) -> Iterator[Tuple[str, str]]:
+    """Yield (source, passage_text) from directories, globs, .txt and .jsonl files."""
+    for source in sources:
+        if os.path.isdir(source):
+            paths = sorted(glob.glob(os.path.join(source, "**", "*.txt"), recursive=True)
+                           + glob.glob(os.path.join(source, "**", "*.jsonl"), recursive=True))
+        else:
+            paths = sorted(glob.glob(source, recursive=True)) or [source]
+        for path in paths:
+            if path.endswith(".jsonl"):
+                with open(path, "r") as f:
+                    for line_num, line in enumerate(f, start=1):
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        label = record.get("title") or record.get("id") or f"{path}:{line_num}"
+                        for passage in split_passages(record.get(text_field) or "", max_words):
+                            yield str(label), passage
+            else:
+                with open(path, "r") as f:
+                    for passage in split_passages(f.read(), max_words):
+                        yield path, passage
+
+
+class _ArrayWriter:
+    """Appends typed values to a binary file in fixed-size chunks."""
+
+    def __init__(self, path: str, typecode: str, chunk: int = 65536):
+        self._file = open(path, "wb")
+        self._values = array(typecode)
+        self._chunk = chunk
+        self.count = 0
+
+    def extend(self, values: Iterable) -> None:
+        before = len(self._values)
+        self._values.extend(values)
+        self.count += len(self._values) - before
+        if len(self._values) >= self._chunk:
+            self._values.tofile(self._file)
+            del self._values[:]
+
+    def close(self) -> None:
+        self._values.tofile(self._file)
+        self._file.close()
+
+
+def _write_run(postings: Dict[str, Tuple[array, array]], path: str) -> None:
+    """One sorted run: a "term<TAB>ids<TAB>tfs" line per term, in term order."""
+    with open(path, "w") as f:
+        for term in sorted(postings):
+            ids, tfs = postings[term]
+            f.write(f"{term}\t{','.join(map(str, ids))}\t{','.join(map(str, tfs))}\n")
+
+
+def _read_run(f: IO[str]) -> Iterator[Tuple[str, str, str]]:
+    for line in f:
+        term, ids, tfs = line.rstrip("\n").split("\t")
+        yield term, ids, tfs
+
+
+def build_index(passages: Iterable[Tuple[str, str]], output_dir: str,
+                k1: float = DEFAULT_K1, b: float = DEFAULT_B,
+                run_postings: int = DEFAULT_RUN_POSTINGS) -> int:
+    """
+    Write an index for (source, text) passages to output_dir. Returns the
+    number of passages indexed. At most run_postings postings are held in
+    memory; beyond that they are spilled to sorted runs and merged on disk.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output_dir, prefix="runs-") as runs_dir:
+        run_paths: List[str] = []
+        postings: Dict[str, Tuple[array, array]] = {}
+        buffered = 0
+        total_length = 0
+        offsets = _ArrayWriter(os.path.join(output_dir, "offsets.u64"), "Q")
+        doc_lengths = _ArrayWriter(os.path.join(runs_dir, "lengths.u32"), "I")
+        with open(os.path.join(output_dir, "passages.jsonl"), "wb") as passages_file:
+            for passage_id, (source, text) in enumerate(passages):
+                offsets.extend((passages_file.tell(),))
+                passages_file.write((json.dumps({"source": source, "text": text}, ensure_ascii=False) + "\n").encode())
+                tokens = tokenize(text)
+                doc_lengths.extend((len(tokens),))
+                total_length += len(tokens)
+                counts: Dict[str, int] = defaultdict(int)
+                for token in tokens:
+                    counts[token] += 1
+                for term, tf in counts.items():
+                    entry = postings.get(term)
+                    if entry is None:
+                        entry = postings[term] = (array("I"), array("I"))
+                    entry[0].append(passage_id)
+                    entry[1].append(tf)
+                buffered += len(counts)
+                if buffered >= run_postings:
+                    run_paths.append(os.path.join(runs_dir, f"run-{len(run_paths):05d}.tsv"))
+                    _write_run(postings, run_paths[-1])
+                    postings, buffered = {}, 0
+        if postings:
+            run_paths.append(os.path.join(runs_dir, f"run-{len(run_paths):05d}.tsv"))
+            _write_run(postings, run_paths[-1])
+            postings = {}
+        offsets.close()
+        doc_lengths.close()
+
+        num_passages = doc_lengths.count
+        avgdl = (total_length / num_passages) if num_passages else 0.0
+        lengths_map, lengths = _map_array(os.path.join(runs_dir, "lengths.u32"), "I")
+        doc_ids_out = _ArrayWriter(os.path.join(output_dir, "doc_ids.u32"), "I")
+        impacts_out = _ArrayWriter(os.path.join(output_dir, "impacts.f32"), "f")
+        term_offsets = _ArrayWriter(os.path.join(output_dir, "term_offsets.u64"), "Q")
+        term_postings = _ArrayWriter(os.path.join(output_dir, "term_postings.u64"), "Q")
+        run_files = [open(path, "r") for path in run_paths]
+        try:
+            with open(os.path.join(output_dir, "terms.txt"), "wb") as terms_file:
+                # Runs cover consecutive passage ranges, so merging keeps each term's ids ascending.
+                merged = heapq.merge(*(_read_run(f) for f in run_files), key=lambda run: run[0])
+                for term, parts in itertools.groupby(merged, key=lambda run: run[0]):
+                    ids, tfs = array("I"), array("I")
+                    for _, part_ids, part_tfs in parts:
+                        ids.extend(map(int, part_ids.split(",")))
+                        tfs.extend(map(int, part_tfs.split(",")))
+                    idf = math.log(1 + (num_passages - len(ids) + 0.5) / (len(ids) + 0.5))
+                    weighted = []
+                    for passage_id, tf in zip(ids, tfs):
+                        norm = k1 * (1 - b + b * lengths[passage_id] / avgdl)
+                        weighted.append((idf * tf * (k1 + 1) / (tf + norm), passage_id))
+                    weighted.sort(reverse=True)
+                    term_offsets.extend((terms_file.tell(),))
+                    terms_file.write(term.encode())
+                    term_postings.extend((doc_ids_out.count, len(weighted)))
+                    doc_ids_out.extend(passage_id for _, passage_id in weighted)
+                    impacts_out.extend(impact for impact, _ in weighted)
+                term_offsets.extend((terms_file.tell(),))
+        finally:
+            for f in run_files:
+                f.close()
+            lengths.release()
+            if lengths_map is not None:
+                lengths_map.close()
+        for writer in (doc_ids_out, impacts_out, term_offsets, term_postings):
+            writer.close()
+
+    num_terms = term_postings.count // 2
+    with open(os.path.join(output_dir, "meta.json"), "w") as f:
+        json.dump({"num_passages": num_passages, "avgdl": avgdl, "k1": k1, "b": b, "terms": num_terms}, f)
+    debug_print(DEBUG_INFO, f"Indexed {num_passages} passages ({num_terms} terms, {len(run_paths)} runs) "
+                            f"into {output_dir}")
+    return num_passages
+
+
+def _map_array(path: str, typecode: str) -> Tuple[Optional[mmap.mmap], memoryview]:
+    size = os.path.getsize(path)
+    if size == 0:
+        return None, memoryview(array(typecode))
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped, memoryview(mapped).cast("B").cast(typecode)
+
+
+class EvidenceIndex:
+    """
+    Read-only BM25 index opened from a directory written by build_index().
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str, max_postings_per_term: int = DEFAULT_MAX_POSTINGS_PER_TERM):
+        """
+        :param path: Index directory.
+        :param max_postings_per_term: Impact-ordered postings scanned per query term;
+            lower is faster, higher is closer to exhaustive BM25.
+        """
+        self.path = path
+        self.max_postings_per_term = max_postings_per_term
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        if not os.path.exists(os.path.join(path, "terms.txt")):
+            raise ValueError(f"{path} was built by an older version without a mapped vocabulary; "
+                             f"rebuild it with 'ingest'")
+        self._maps = []
+        self._views = []
+        for name, typecode in (("doc_ids.u32", "I"), ("impacts.f32", "f"), ("offsets.u64", "Q"),
+                               ("terms.txt", "B"), ("term_offsets.u64", "Q"), ("term_postings.u64", "Q")):
+            mapped, view = _map_array(os.path.join(path, name), typecode)
+            self._maps.append(mapped)
+            self._views.append(view)
+            setattr(self, "_" + name.split(".")[0], view)
+        self._num_terms = len(self._term_postings) // 2
+        self._passages_file = open(os.path.join(path, "passages.jsonl"), "rb")
+        self._read_lock = threading.Lock()
+        debug_print(DEBUG_INFO, f"Opened evidence index {path} ({self.meta['num_passages']} passages)")
+
+    def __len__(self) -> int:
+        return self.meta["num_passages"]
+
+    def _term(self, i: int) -> bytes:
+        return bytes(self._terms[self._term_offsets[i]:self._term_offsets[i + 1]])
+
+    def postings_range(self, term: str) -> Optional[Tuple[int, int]]:
+        """(start, length) of the term's postings, by binary search over the sorted vocabulary."""
+        key = term.encode()
+        lo, hi = 0, self._num_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._num_terms or self._term(lo) != key:
+            return None
+        return self._term_postings[2 * lo], self._term_postings[2 * lo + 1]
+
+    def retrieve(self, statement: str, k: int = 5) -> List[Passage]:
+        """Top-k passages for the statement by BM25 score."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(statement)):
+            entry = self.postings_range(term)
+            if entry is None:
+                continue
+            start, length = entry
+            end = start + min(length, self.max_postings_per_term)
+            for passage_id, impact in zip(self._doc_ids[start:end], self._impacts[start:end]):
+                scores[passage_id] += impact
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        debug_print(DEBUG_VERBOSE, f"Evidence index: {len(scores)} candidates for '{statement}'")
+        return [self._passage(passage_id, score) for passage_id, score in top]
+
+    def _passage(self, passage_id: int, score: float) -> Passage:
+        with self._read_lock:
+            self._passages_file.seek(self._offsets[passage_id])
+            record = json.loads(self._passages_file.readline())
+        return Passage(passage_id=passage_id, text=record["text"], source=record["source"], score=score)
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        for mapped in self._maps:
+            if mapped is not None:
+                mapped.close()
+        self._passages_file.close()
+
+
+_evidence_index: Optional[EvidenceIndex] = None
+_evidence_index_loaded = False
+_evidence_lock = threading.Lock()
+
+
+def get_evidence_index() -> Optional[EvidenceIndex]:
+    """
+    Process-wide index from HALLUCINATION_EVIDENCE_INDEX, opened on first
+    use; None when no index is configured.
+    """
+    global _evidence_index, _evidence_index_loaded
+    with _evidence_lock:
+        if not _evidence_index_loaded:
+            path = os.environ.get("HALLUCINATION_EVIDENCE_INDEX")
+            if path and os.path.exists(os.path.join(path, "meta.json")):
+                _evidence_index = EvidenceIndex(path)
+            _evidence_index_loaded = True
+        return _evidence_index
+
+
+def set_evidence_index(index: Optional[EvidenceIndex]) -> None:
+    global _evidence_index, _evidence_index_loaded
+    with _evidence_lock:
+        _evidence_index = index
+        _evidence_index_loaded = True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Build or query the local evidence index")
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+    ingest_cmd = sub.add_parser("ingest", help="Index .txt/.jsonl corpora (files, directories or globs)")
+    ingest_cmd.add_argument("sources", nargs="+")
+    ingest_cmd.add_argument("--output", required=True, help="Index directory")
+    ingest_cmd.add_argument("--text-field", default="text", help="Text field for JSONL input")
+    ingest_cmd.add_argument("--passage-words", type=int, default=DEFAULT_PASSAGE_WORDS)
+    search_cmd = sub.add_parser("search", help="Retrieve passages for a statement")
+    search_cmd.add_argument("index")
+    search_cmd.add_argument("statement")
+    search_cmd.add_argument("-k", type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "ingest":
+        count = build_index(iter_corpus(args.sources, args.text_field, args.passage_words), args.output)
+        print(f"Indexed {count} passages into {args.output}")
+    else:
+        index = EvidenceIndex(args.index)
+        for passage in index.retrieve(args.statement, args.k):
+            print(f"{passage.score:.2f}\t{passage.source}\t{passage.text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,23 +4,288 @@ This module provides a container (LLMContainer) that holds multiple LLM clients.
 A client can specify which LLM engine and model to use.
 """
 
-from typing import Dict
+from typing import Any, Dict, Optional, Tuple
 from .debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE
+from .llm_cache import LLMResponseCache, make_cache_key
+from .llm_cassette import Cassette
+from .deadline import current_deadline
+from .metrics import get_metrics
+from .llm_scheduler import (DEFAULT_LANE, LLMCallCancelled, LLMDeadlineExceeded, ProviderScheduler,
+                            RateLimitConfig, call_with_retries)
+import asyncio
+import json
 import os
-from cerebras.cloud.sdk import Cerebras
+import threading
+import time
+
+# Connection pool defaults shared by every provider SDK client in the process.
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+
+class LLMClientRegistry:
+    """
+    Process-wide, thread-safe registry of LLM clients.
+
+    Holds one LLMClient per provider/model and one long-lived, connection-pooled
+    SDK client per provider, so every check, classifier and parser reuses the
+    same HTTP connections instead of paying a TLS handshake per prompt.
+    """
+
+    def __init__(self,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY):
+        self._lock = threading.RLock()
+        self._clients: Dict[Tuple[str, str], "LLMClient"] = {}
+        self._sdk_clients: Dict[str, Any] = {}
+        self.cache: Optional[LLMResponseCache] = None
+        self.cassette: Optional[Cassette] = None
+        self._schedulers: Dict[Tuple[str, str], ProviderScheduler] = {}
+        self._rate_limits: Dict[Tuple[str, Optional[str]], RateLimitConfig] = {}
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+
+    def configure_pool(self,
+                       max_connections: Optional[int] = None,
+                       max_keepalive_connections: Optional[int] = None,
+                       keepalive_expiry: Optional[float] = None) -> None:
+        """
+        Adjust pool size and keep-alive. Already-built SDK clients are closed and
+        rebuilt lazily with the new settings on their next use.
+        """
+        with self._lock:
+            if max_connections is not None:
+                self.max_connections = max_connections
+            if max_keepalive_connections is not None:
+                self.max_keepalive_connections = max_keepalive_connections
+            if keepalive_expiry is not None:
+                self.keepalive_expiry = keepalive_expiry
+            self._close_sdk_clients()
+            debug_print(DEBUG_INFO, f"Configured LLM connection pool: max_connections={self.max_connections}, "
+                                    f"max_keepalive={self.max_keepalive_connections}, "
+                                    f"keepalive_expiry={self.keepalive_expiry}")
+
+    def set_cache(self, cache: Optional[LLMResponseCache]) -> None:
+        """
+        Enable (or, with None, disable) the response cache for every client.
+        """
+        with self._lock:
+            self.cache = cache
+            debug_print(DEBUG_INFO, f"LLM response cache {'enabled' if cache else 'disabled'}")
+
+    def set_cassette(self, cassette: Optional[Cassette]) -> None:
+        """
+        Record responses to, or replay them from, a cassette for every client
+        (None disables it).
+        """
+        with self._lock:
+            self.cassette = cassette
+            debug_print(DEBUG_INFO, "LLM cassette %s", f"{cassette.mode}: {cassette.path}" if cassette else "disabled")
+
+    def configure_rate_limit(self, llm_name: str, model_name: Optional[str] = None,
+                             config: Optional[RateLimitConfig] = None, **kwargs) -> None:
+        """
+        Set scheduling limits for a provider (all models) or one provider/model.
+        Either pass a RateLimitConfig or its keyword arguments.
+        """
+        config = config or RateLimitConfig(**kwargs)
+        with self._lock:
+            self._rate_limits[(llm_name.lower(), model_name)] = config
+            # Rebuild affected schedulers with the new config on next use.
+            for key in [k for k in self._schedulers if k[0] == llm_name.lower()
+                        and (model_name is None or k[1] == model_name)]:
+                del self._schedulers[key]
+
+    def get_scheduler(self, llm_name: str, model_name: str) -> ProviderScheduler:
+        key = (llm_name.lower(), model_name)
+        with self._lock:
+            scheduler = self._schedulers.get(key)
+            if scheduler is None:
+                config = (self._rate_limits.get(key) or self._rate_limits.get((key[0], None))
+                          or RateLimitConfig())
+                scheduler = ProviderScheduler(f"{key[0]}:{model_name}", config)
+                self._schedulers[key] = scheduler
+            return scheduler
+
+    def scheduler_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {scheduler.name: scheduler.stats() for scheduler in self._schedulers.values()}
+
+    def get_or_create(self, llm_name: str, model_name: str) -> "LLMClient":
+        key = (llm_name.lower(), model_name)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = LLMClient(name=llm_name, model=model_name, registry=self)
+                self._clients[key] = client
+            return client
+
+    def get_sdk_client(self, llm_name: str) -> Any:
+        """
+        Return the shared SDK client for a provider, building it on first use.
+        """
+        provider = llm_name.lower()
+        with self._lock:
+            sdk_client = self._sdk_clients.get(provider)
+            if sdk_client is None:
+                sdk_client = self._build_sdk_client(provider)
+                self._sdk_clients[provider] = sdk_client
+            return sdk_client
+
+    def _build_sdk_client(self, provider: str) -> Any:
+        if provider == "cerebras":
+            # Imported here so the SDK is only loaded by processes that call it.
+            import httpx
+            from cerebras.cloud.sdk import Cerebras
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+            debug_print(DEBUG_VERBOSE, "Created pooled Cerebras SDK client")
+            return Cerebras(
+                api_key=os.environ.get("CEREBRAS_API_KEY"),  # This is the default and can be omitted
+                # Point at a compatible endpoint (e.g. benchmarks/mock_llm_server.py); None uses the default.
+                base_url=os.environ.get("CEREBRAS_BASE_URL"),
+                http_client=http_client,
+                max_retries=0,  # Retries are handled by the scheduler
+            )
+        raise ValueError(f"No SDK client available for provider: {provider}")
+
+    def _close_sdk_clients(self) -> None:
+        for provider, sdk_client in self._sdk_clients.items():
+            try:
+                sdk_client.close()
+            except Exception as e:
+                debug_print(DEBUG_VERBOSE, f"Failed to close SDK client for {provider}: {e}")
+        self._sdk_clients.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_sdk_clients()
+            if self.cassette is not None:
+                self.cassette.close()
+
+
+_registry = LLMClientRegistry()
+
+
+def get_registry() -> LLMClientRegistry:
+    """Return the process-wide LLM client registry."""
+    return _registry
+
 
 class LLMClient:
     """
     Mock implementation of a generic LLM client.
     In practice, you might connect to OpenAI, Anthropic, or any other service.
     """
-    def __init__(self, name: str, model: str):
+    def __init__(self, name: str, model: str, registry: Optional[LLMClientRegistry] = None):
         self.name = name
         self.model = model
+        self.registry = registry or _registry
         debug_print(DEBUG_VERBOSE, f"Initialized LLMClient with name={name}, model={model}")
 
-    def generate_text(self, prompt: str) -> str:
-        debug_print(DEBUG_INFO, f"LLMClient generating text for prompt: {prompt}")
+    def generate_text(self, prompt: str, cache_ttl: Optional[float] = None,
+                      lane: str = DEFAULT_LANE, timeout: Optional[float] = None,
+                      cancel: Optional[threading.Event] = None,
+                      max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                      response_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate a response for the prompt. When the registry has a response
+        cache, identical requests are served from it; cache_ttl overrides the
+        cache's default TTL for the stored entry (0 disables storing). With a
+        cassette on the registry, recorded responses are replayed and live
+        ones recorded.
+
+        Provider calls go through the registry's scheduler for this
+        provider/model: lane selects the fair-queueing lane and timeout the
+        per-call deadline (including retries), which is further capped at the
+        time left in the current document deadline (see deadline.py). Raises
+        LLMCallError when the call fails after retries, LLMDeadlineExceeded
+        when no time is left, and LLMCallCancelled once cancel is set before
+        the request is sent.
+
+        max_tokens, temperature and response_format are passed to providers
+        that support them and are part of the cache key.
+        """
+        params = {name: value for name, value in (("max_tokens", max_tokens), ("temperature", temperature),
+                                                  ("response_format", response_format)) if value is not None}
+        return self._generate_recorded(prompt, params, cache_ttl, lane, timeout, cancel)
+
+    def generate_with_logprobs(self, prompt: str, max_tokens: int = 1, top_logprobs: int = 10,
+                               temperature: float = 0.0, cache_ttl: Optional[float] = None,
+                               lane: str = DEFAULT_LANE, timeout: Optional[float] = None,
+                               cancel: Optional[threading.Event] = None) -> Tuple[str, Optional[Dict[str, float]]]:
+        """
+        Generate a short answer and return it with the top log-probabilities of
+        its first token ({token: logprob}), or None for them when the provider
+        does not report log-probabilities.
+        """
+        params = {"max_tokens": max_tokens, "temperature": temperature, "logprobs": True,
+                  "top_logprobs": top_logprobs}
+        payload = self._generate_recorded(prompt, params, cache_ttl, lane, timeout, cancel)
+        try:
+            decoded = json.loads(payload)
+            return decoded["text"], decoded["top"]
+        except (ValueError, KeyError, TypeError):
+            return payload, None
+
+    def _generate_recorded(self, prompt: str, params: Dict[str, Any], cache_ttl: Optional[float], lane: str,
+                           timeout: Optional[float], cancel: Optional[threading.Event]) -> str:
+        cassette = self.registry.cassette
+        if cassette is not None:
+            replayed = cassette.lookup(self.name, self.model, prompt, params)
+            if replayed is not None:
+                return replayed
+
+        response, cacheable = self._generate_cached(prompt, cache_ttl, lane, timeout, cancel, params)
+        if cassette is not None and cacheable:
+            cassette.record(self.name, self.model, prompt, response, params)
+        return response
+
+    def _generate_cached(self, prompt: str, cache_ttl: Optional[float], lane: str,
+                         timeout: Optional[float], cancel: Optional[threading.Event] = None,
+                         params: Optional[Dict[str, Any]] = None) -> Tuple[str, bool]:
+        cache = self.registry.cache
+        if cache is None:
+            return self._generate(prompt, lane, timeout, cancel, params)
+
+        key = make_cache_key(self.name, self.model, prompt, params)
+        cached = cache.get(key)
+        get_metrics().inc("llm_cache_requests_total", result="hit" if cached is not None else "miss")
+        if cached is not None:
+            debug_print(DEBUG_VERBOSE, "LLM cache hit for %s:%s", self.name, self.model)
+            return cached, True
+        response, cacheable = self._generate(prompt, lane, timeout, cancel, params)
+        if cacheable:
+            cache.set(key, response, cache_ttl)
+        return response, cacheable
+
+    def _generate(self, prompt: str, lane: str = DEFAULT_LANE, timeout: Optional[float] = None,
+                  cancel: Optional[threading.Event] = None,
+                  params: Optional[Dict[str, Any]] = None) -> Tuple[str, bool]:
+        """
+        Call the provider. Returns the response text and whether it is a real
+        answer that may be cached. When params request logprobs, the text is a
+        JSON object {"text": ..., "top": {token: logprob} or null}.
+        """
+        params = params or {}
+        budget_left = current_deadline().timeout()
+        if budget_left is not None:
+            if budget_left <= 0:
+                raise LLMDeadlineExceeded(f"{self.name}:{self.model} call not started, document deadline passed")
+            timeout = budget_left if timeout is None else min(timeout, budget_left)
+        debug_print(DEBUG_VERBOSE, "LLMClient generating text for prompt: %s", prompt)
+        cacheable = True
+        metrics = get_metrics()
+        labels = {"provider": self.name.lower(), "model": self.model, "lane": lane}
+        metrics.inc("llm_calls_total", **labels)
         
         if self.name.lower() == "openai":
             response = f"[OpenAI-{self.model}] Processing with GPT: {prompt}"
@@ -29,34 +294,82 @@ class LLMClient:
         elif self.name.lower() == "cohere":
             response = f"[Cohere-{self.model}] Processing with Command: {prompt}"
         elif self.name.lower() == "cerebras":
-            client = Cerebras(
-                api_key=os.environ.get("CEREBRAS_API_KEY"),  # This is the default and can be omitted
-            )
-            chat_completion = client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt,
-                    }
-                ],
-                model=self.model
-            )
+            client = self.registry.get_sdk_client(self.name)
+            scheduler = self.registry.get_scheduler(self.name, self.model)
+            start = time.perf_counter()
+            try:
+                chat_completion = call_with_retries(
+                    scheduler,
+                    lambda remaining: client.chat.completions.create(
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": prompt,
+                            }
+                        ],
+                        model=self.model,
+                        timeout=remaining,
+                        **params,
+                    ),
+                    lane=lane,
+                    timeout=timeout,
+                    cancel=cancel,
+                )
+            except LLMCallCancelled:
+                raise
+            except Exception:
+                metrics.inc("llm_errors_total", **labels)
+                raise
+            finally:
+                metrics.observe("llm_call_seconds", time.perf_counter() - start, **labels)
+            usage = getattr(chat_completion, "usage", None)
+            for kind in ("prompt", "completion"):
+                tokens = getattr(usage, f"{kind}_tokens", None)
+                if isinstance(tokens, int):
+                    metrics.inc("llm_tokens_total", tokens, kind=kind, **labels)
             try:
                 response = chat_completion.choices[0].message.content
-                debug_print(DEBUG_INFO, f"Successfully extracted content from Cerebras response")
+                debug_print(DEBUG_VERBOSE, "Successfully extracted content from Cerebras response")
             except (AttributeError, IndexError):
-                debug_print(DEBUG_INFO, f"Failed to extract content from Cerebras response")
+                debug_print(DEBUG_INFO, "Failed to extract content from Cerebras response")
                 response = f"[cerebras-{self.model}] Error processing prompt"
+                cacheable = False
+            if params.get("logprobs") and cacheable:
+                response = json.dumps({"text": response, "top": _first_token_logprobs(chat_completion)})
         else:
             response = f"[{self.name}-{self.model}] Response to prompt: {prompt}"
         
-        return response
+        return response, cacheable
+
+    async def agenerate_text(self, prompt: str, cache_ttl: Optional[float] = None,
+                             lane: str = DEFAULT_LANE, timeout: Optional[float] = None,
+                             cancel: Optional[threading.Event] = None,
+                             max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                             response_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Async variant of generate_text. The blocking SDK call runs in a worker
+        thread and shares the registry's pooled (thread-safe) HTTP client.
+        """
+        return await asyncio.to_thread(self.generate_text, prompt, cache_ttl, lane, timeout, cancel,
+                                       max_tokens=max_tokens, temperature=temperature,
+                                       response_format=response_format)
+
+def _first_token_logprobs(chat_completion: Any) -> Optional[Dict[str, float]]:
+    """{token: logprob} of the first generated token's alternatives, if reported."""
+    try:
+        first = chat_completion.choices[0].logprobs.content[0]
+        return {alt.token: float(alt.logprob) for alt in first.top_logprobs}
+    except (AttributeError, IndexError, TypeError):
+        return None
 
 class LLMContainer:
     """
     Stores and retrieves multiple LLM clients by name/model.
+    Clients are shared through the process-wide LLMClientRegistry, so two
+    containers registering the same provider/model get the same client.
     """
-    def __init__(self):
+    def __init__(self, registry: Optional[LLMClientRegistry] = None):
+        self.registry = registry or _registry
         self._clients: Dict[str, LLMClient] = {}
         debug_print(DEBUG_VERBOSE, "Initialized an empty LLMContainer")
 
@@ -78,7 +391,7 @@ class LLMContainer:
             debug_print(DEBUG_INFO, f"No specific configuration for {llm_name}")
             product_key = None
 
-        client = LLMClient(name=llm_name, model=model_name)
+        client = self.registry.get_or_create(llm_name, model_name)
         key = self._make_key(llm_name, model_name)
         self._clients[key] = client
         debug_print(DEBUG_INFO, f"Registered LLM: {key}")
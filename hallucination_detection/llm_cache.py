@@ -0,0 +1,178 @@
+# hallucination_detection/llm_cache.py
+"""
+Persistent on-disk cache for LLM responses.
+
+Entries are keyed by provider, model, prompt hash and decoding parameters and
+stored in a local SQLite database, so identical prompts are answered without an
+API call across runs and across worker processes sharing the same file.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "hallucination_detection", "llm_cache.sqlite3")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 24 * 60 * 60
+
+# Suggested TTLs for callers with different freshness requirements.
+SHORT_TTL = 15 * 60
+LONG_TTL = 30 * 24 * 60 * 60
+
+
+def make_cache_key(provider: str, model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build a stable cache key from provider, model, prompt hash and decoding parameters.
+    """
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps([provider.lower(), model, prompt_hash, params or {}], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed response cache with per-entry TTL and LRU eviction under a
+    byte budget.
+
+    The database runs in WAL mode with a busy timeout, so several processes can
+    read and write the same cache file concurrently. Each thread uses its own
+    connection. Hit/miss/eviction counters are kept per process.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 default_ttl: float = DEFAULT_TTL, evict_every: int = 32):
+        """
+        :param path: SQLite database file, shared by every process using the cache.
+        :param max_bytes: Byte budget for stored keys and responses.
+        :param default_ttl: TTL in seconds for entries stored without an explicit one.
+        :param evict_every: Run the expiry/LRU sweep once every this many writes.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evict_every = max(1, evict_every)
+        self._writes = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+        debug_print(DEBUG_INFO, f"Opened LLM response cache at {path} (max_bytes={max_bytes})")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection must not be reused across a fork.
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute("SELECT response, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            if row is not None:
+                conn.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now))
+            self._count(misses=1)
+            return None
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        self._count(hits=1)
+        return row[0]
+
+    def set(self, key: str, response: str, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        size = len(key) + len(response.encode("utf-8"))
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, response, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, response, size, now + ttl, now),
+        )
+        with self._stats_lock:
+            self._writes += 1
+            sweep = self._writes % self.evict_every == 0
+        if sweep:
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """
+        Drop expired entries, then least-recently-used ones until the cache fits
+        in max_bytes.
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            removed = 0
+            if total > self.max_bytes:
+                victims = []
+                cursor = conn.execute("SELECT key, size FROM entries ORDER BY last_access")
+                for key, size in cursor:
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((key,))
+                    total -= size
+                cursor.close()
+                conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+                removed = len(victims)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if expired or removed:
+            self._count(evictions=expired + removed)
+            debug_print(DEBUG_VERBOSE, f"LLM cache evicted {expired} expired and {removed} LRU entries")
+
+    def evict(self) -> None:
+        """Run the expiry/LRU sweep now."""
+        self._evict(self._connection(), time.time())
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM entries")
+
+    def _count(self, hits: int = 0, misses: int = 0, evictions: int = 0) -> None:
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def stats(self) -> Dict[str, Any]:
+        row = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": row[0],
+            "bytes": row[1],
+        }
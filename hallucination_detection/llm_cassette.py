@@ -0,0 +1,134 @@
+# hallucination_detection/llm_cassette.py
+"""
+Record-and-replay of LLM responses.
+
+A cassette is an append-only JSON-lines file of {"k": key, "r": response}
+records, keyed like the response cache (provider, model, prompt hash and
+decoding parameters). In "record" mode every live response is appended; in
+"replay" mode responses are served from memory and misses either fail
+(strict) or pass through to the live provider and are appended, so the next
+replay hits.
+
+Enable for every client through the registry:
+    get_registry().set_cassette(Cassette("day.cassette.jsonl", mode="replay", strict=True))
+or with HALLUCINATION_CASSETTE / HALLUCINATION_CASSETTE_MODE (record, replay,
+replay-strict) in main and the batch CLI.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE
+from .llm_cache import make_cache_key
+from .llm_scheduler import LLMCallError
+
+CASSETTE_MODES = ("record", "replay")
+
+
+class CassetteMissError(LLMCallError):
+    """A strict replay found no recorded response for a prompt."""
+
+
+class Cassette:
+    """
+    In-memory index over an append-only cassette file. Safe to share between
+    threads; several processes may append to the same file.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", strict: bool = False):
+        """
+        :param path: Cassette file (created on first write).
+        :param mode: "record" to call providers and append every response,
+            "replay" to serve recorded responses.
+        :param strict: In replay mode, raise CassetteMissError on a miss instead
+            of calling the provider.
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"mode must be one of {CASSETTE_MODES}")
+        self.path = path
+        self.mode = mode
+        self.strict = strict
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._responses: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """Cassette configured by HALLUCINATION_CASSETTE(_MODE), or None."""
+        path = os.environ.get("HALLUCINATION_CASSETTE")
+        if not path:
+            return None
+        mode = os.environ.get("HALLUCINATION_CASSETTE_MODE", "replay")
+        return cls(path, mode="replay" if mode == "replay-strict" else mode, strict=mode == "replay-strict")
+
+    def _load(self) -> None:
+        skipped = 0
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._responses[record["k"]] = record["r"]
+                except (ValueError, KeyError, TypeError):
+                    # A torn last line from an interrupted writer.
+                    skipped += 1
+        debug_print(DEBUG_INFO, "Loaded %d cassette entries from %s (%d unreadable lines)",
+                    len(self._responses), self.path, skipped)
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def lookup(self, provider: str, model: str, prompt: str,
+               params: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Return the recorded response in replay mode, None when the caller
+        should call the provider. Raises CassetteMissError on a strict miss.
+        """
+        if self.mode != "replay":
+            return None
+        key = make_cache_key(provider, model, prompt, params)
+        with self._lock:
+            response = self._responses.get(key)
+            if response is not None:
+                self.hits += 1
+                return response
+            self.misses += 1
+        if self.strict:
+            raise CassetteMissError(f"No recorded response for {provider}:{model} prompt {key[:12]}")
+        debug_print(DEBUG_VERBOSE, "Cassette miss for %s:%s, calling provider", provider, model)
+        return None
+
+    def record(self, provider: str, model: str, prompt: str, response: str,
+               params: Optional[Dict[str, Any]] = None) -> None:
+        key = make_cache_key(provider, model, prompt, params)
+        line = json.dumps({"k": key, "r": response}, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self.mode == "replay" and key in self._responses:
+                return
+            self._responses[key] = response
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "a")
+            # One write per record so concurrent appenders do not interleave lines.
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._responses), "hits": self.hits, "misses": self.misses,
+                    "recorded": self.recorded}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,267 @@
+# hallucination_detection/llm_scheduler.py
+"""
+Per-provider/model call scheduling for LLM requests.
+
+Each provider/model gets a ProviderScheduler that combines:
+  - a token bucket bounding the request rate,
+  - adaptive concurrency (AIMD) driven by observed 429s and latencies,
+  - fair round-robin admission between lanes (e.g. classification vs. bulk
+    verification), so one caller cannot starve another,
+and call_with_retries() adds jittered exponential backoff under a per-call
+deadline.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE, DEBUG_WARNING
+
+DEFAULT_LANE = "default"
+
+
+class LLMCallError(Exception):
+    """An LLM call failed after retries."""
+
+
+class LLMDeadlineExceeded(LLMCallError):
+    """An LLM call could not complete before its deadline."""
+
+
+class LLMCallCancelled(LLMCallError):
+    """The caller no longer needs the result (e.g. an ensemble already agreed)."""
+
+
+class RateLimitConfig:
+    """
+    Scheduling settings for one provider/model.
+    """
+
+    def __init__(self,
+                 requests_per_second: float = 10.0,
+                 burst: int = 20,
+                 initial_concurrency: int = 8,
+                 min_concurrency: int = 1,
+                 max_concurrency: int = 64,
+                 latency_target: float = 10.0,
+                 max_retries: int = 4,
+                 base_backoff: float = 0.5,
+                 max_backoff: float = 20.0,
+                 call_timeout: float = 60.0):
+        """
+        :param requests_per_second: Token bucket refill rate.
+        :param burst: Token bucket capacity.
+        :param initial_concurrency: Starting in-flight limit for AIMD.
+        :param min_concurrency: Lowest in-flight limit AIMD may shrink to.
+        :param max_concurrency: Highest in-flight limit AIMD may grow to.
+        :param latency_target: Calls slower than this (seconds) shrink the limit gently.
+        :param max_retries: Retries after the first attempt for retryable errors.
+        :param base_backoff: First backoff delay in seconds (doubled per retry, with jitter).
+        :param max_backoff: Upper bound on a single backoff delay.
+        :param call_timeout: Default deadline in seconds for a call including retries.
+        """
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.call_timeout = call_timeout
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: float) -> None:
+        """Take one token, waiting for a refill; raise if the deadline would pass."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                raise LLMDeadlineExceeded("Rate limit wait would exceed the call deadline")
+            time.sleep(wait)
+
+
+class ProviderScheduler:
+    """
+    Admission control for one provider/model: fair lanes, AIMD concurrency
+    limit and a token bucket.
+    """
+
+    def __init__(self, name: str, config: RateLimitConfig):
+        self.name = name
+        self.config = config
+        self.bucket = TokenBucket(config.requests_per_second, config.burst)
+        self.limit = float(config.initial_concurrency)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._lanes: Dict[str, Deque[object]] = {}
+        self._lane_order: Deque[str] = deque()
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    def acquire(self, lane: str, deadline: float) -> None:
+        ticket = object()
+        with self._cond:
+            if lane not in self._lanes:
+                self._lanes[lane] = deque()
+                self._lane_order.append(lane)
+            self._lanes[lane].append(ticket)
+            try:
+                while not (self.in_flight < int(self.limit) and self._next_ticket() is ticket):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise LLMDeadlineExceeded(f"Timed out waiting for a {self.name} slot")
+                    self._cond.wait(timeout=remaining)
+            except BaseException:
+                self._lanes[lane].remove(ticket)
+                self._cond.notify_all()
+                raise
+            self._lanes[lane].popleft()
+            # Served lane goes to the back of the round-robin order.
+            self._lane_order.remove(lane)
+            self._lane_order.append(lane)
+            self.in_flight += 1
+            self.calls += 1
+            self._cond.notify_all()
+        try:
+            self.bucket.acquire(deadline)
+        except BaseException:
+            self.release(latency=None)
+            raise
+
+    def _next_ticket(self) -> Optional[object]:
+        for lane in self._lane_order:
+            if self._lanes[lane]:
+                return self._lanes[lane][0]
+        return None
+
+    def release(self, latency: Optional[float], rate_limited: bool = False) -> None:
+        """Free a slot and adapt the concurrency limit to the call's outcome."""
+        config = self.config
+        with self._cond:
+            self.in_flight -= 1
+            if rate_limited:
+                self.rate_limited += 1
+                self.limit = max(config.min_concurrency, self.limit / 2)
+                debug_print(DEBUG_INFO, f"{self.name}: rate limited, concurrency limit -> {self.limit:.1f}")
+            elif latency is not None:
+                if latency > config.latency_target:
+                    self.limit = max(config.min_concurrency, self.limit * 0.9)
+                else:
+                    self.limit = min(config.max_concurrency, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def record_retry(self) -> None:
+        with self._cond:
+            self.retries += 1
+
+    def record_failure(self) -> None:
+        with self._cond:
+            self.failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "failures": self.failures,
+                "in_flight": self.in_flight,
+                "concurrency_limit": round(self.limit, 2),
+            }
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    status = _status_code(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    # Connection errors and timeouts carry no status code.
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name or isinstance(error, (TimeoutError, ConnectionError))
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retries(scheduler: ProviderScheduler, call: Callable[[float], Any],
+                      lane: str = DEFAULT_LANE, timeout: Optional[float] = None,
+                      cancel: Optional[threading.Event] = None) -> Any:
+    """
+    Run call(remaining_seconds) under the scheduler, retrying retryable errors
+    with jittered exponential backoff until the deadline. Raises LLMCallError
+    (or LLMDeadlineExceeded) when the call cannot succeed.
+
+    Setting cancel gives up with LLMCallCancelled before the next attempt and
+    during backoff; a request already sent to the provider runs to completion.
+    """
+    config = scheduler.config
+    deadline = time.monotonic() + (timeout if timeout is not None else config.call_timeout)
+    attempt = 0
+    while True:
+        scheduler.acquire(lane, deadline)
+        if cancel is not None and cancel.is_set():
+            scheduler.release(latency=None)
+            raise LLMCallCancelled(f"{scheduler.name} call cancelled")
+        start = time.monotonic()
+        try:
+            result = call(max(0.1, deadline - start))
+        except Exception as e:
+            rate_limited = _status_code(e) == 429
+            scheduler.release(latency=None, rate_limited=rate_limited)
+            if not _is_retryable(e) or attempt >= config.max_retries:
+                scheduler.record_failure()
+                raise LLMCallError(f"{scheduler.name} call failed after {attempt + 1} attempt(s): {e}") from e
+            delay = min(config.max_backoff, config.base_backoff * (2 ** attempt))
+            delay = random.uniform(delay / 2, delay)  # jitter
+            delay = max(delay, _retry_after(e) or 0.0)
+            if time.monotonic() + delay >= deadline:
+                scheduler.record_failure()
+                raise LLMDeadlineExceeded(f"{scheduler.name} call deadline exceeded after "
+                                          f"{attempt + 1} attempt(s): {e}") from e
+            debug_print(DEBUG_WARNING, f"{scheduler.name} call failed ({e}); retrying in {delay:.2f}s")
+            scheduler.record_retry()
+            if cancel is not None:
+                if cancel.wait(delay):
+                    raise LLMCallCancelled(f"{scheduler.name} call cancelled during backoff")
+            else:
+                time.sleep(delay)
+            attempt += 1
+            continue
+        latency = time.monotonic() - start
+        scheduler.release(latency=latency)
+        debug_print(DEBUG_VERBOSE, f"{scheduler.name} call completed in {latency:.2f}s")
+        return result
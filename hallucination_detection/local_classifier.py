@@ -0,0 +1,186 @@
+# hallucination_detection/local_classifier.py
+"""
+Local first-stage domain classifier.
+
+Regex/keyword features (years and eras, quoted titles and "et al.", operators
+and digits, recency words, opinion words, ...) feed a small linear softmax
+model whose weights ship with the package. DomainClassifier uses it to answer
+high-confidence cases without an LLM call and defers the rest.
+
+The shipped weights are fit on data/local_classifier_train.jsonl (JSONL lines
+of {"text": ..., "domain": ...}); refit them after changing the features:
+    python -m hallucination_detection.local_classifier train \
+        hallucination_detection/data/local_classifier_train.jsonl --from-scratch --epochs 100
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE
+
+DOMAINS = ["history", "paper", "math", "logic", "latest_news", "general", "none"]
+# Domains never answered locally: "none" skips checking altogether, so only the LLM may choose it.
+LLM_ONLY_DOMAINS = {"none"}
+DEFAULT_WEIGHTS_PATH = os.path.join(os.path.dirname(__file__), "data", "local_classifier_weights.json")
+
+_YEAR_RE = re.compile(r"\b(1\d{3}|20\d{2})\b")
+# Year ranges ("1861-1865", not followed by a comparison) and dates ("7/4/1776") are not arithmetic.
+_NOT_MATH_RE = re.compile(r"\b(?:1\d{3}|20\d{2})\s*[-–]\s*\d{2,4}\b(?!\s*[=<>≤≥])|\d+/\d+/\d+")
+_PATTERNS: Dict[str, re.Pattern] = {
+    "era": re.compile(r"\b(century|centuries|bc|bce|ad|dynasty|empire|emperor|kingdom|king|queen|pharaoh|"
+                      r"revolution|war|ancient|medieval|reign|colonial|civil rights|independence|treaty)\b"),
+    "history_verb": re.compile(r"\b(was founded|was born|died|invaded|conquered|signed|ruled|was assassinated|"
+                               r"declared|discovered|established)\b"),
+    "quoted_title": re.compile(r"[\"“][^\"”]{8,}[\"”]"),
+    "et_al": re.compile(r"\bet al\b"),
+    "paper_words": re.compile(r"\b(journal|conference|proceedings|arxiv|doi|preprint|paper|papers|study|"
+                              r"published in|peer reviewed|cited|authors?|neurips|icml|acl|nature|science)\b"),
+    "math_expression": re.compile(r"\d\s*[-+*/^=<>×÷≤≥]\s*\(?\d"),
+    "math_words": re.compile(r"\b(prime|divisible|equation|integer|sum of|product of|square root|squared|"
+                             r"percent|theorem|derivative|integral|factorial|multiple of|factor of|"
+                             r"plus|minus|times|divided by|equals)\b"),
+    "logic_words": re.compile(r"\b(if .+ then|therefore|implies|it follows|all .+ are|no .+ are|some .+ are|"
+                              r"consequently|hence|must be|valid argument|premise|conclusion)\b"),
+    "recency": re.compile(r"\b(today|yesterday|tonight|this week|last week|this month|recently|breaking|"
+                          r"announced|latest|currently|this year|just released|earlier today|on monday|"
+                          r"on tuesday|on wednesday|on thursday|on friday|on saturday|on sunday)\b"),
+    "opinion": re.compile(r"\b(i think|i believe|in my opinion|i feel|beautiful|amazing|wonderful|awesome|"
+                          r"terrible|delicious|boring|favorite|ugly|gorgeous|stunning)\b"),
+}
+
+
+def extract_features(text: str) -> Dict[str, float]:
+    """Sparse binary features of a statement."""
+    lowered = text.lower()
+    inputs = {"quoted_title": text, "math_expression": _NOT_MATH_RE.sub(" ", lowered)}
+    features: Dict[str, float] = {"bias": 1.0}
+    for name, pattern in _PATTERNS.items():
+        if pattern.search(inputs.get(name, lowered)):
+            features[name] = 1.0
+
+    current_year = datetime.now().year
+    years = [int(y) for y in _YEAR_RE.findall(text)]
+    if any(y <= current_year - 2 for y in years):
+        features["old_year"] = 1.0
+    if any(y >= current_year - 1 for y in years):
+        features["recent_year"] = 1.0
+
+    digits = sum(ch.isdigit() for ch in text)
+    if not digits:
+        features["no_digits"] = 1.0
+    symbols = sum(ch in "+-*/^=<>%()" for ch in text)
+    letters = sum(ch.isalpha() for ch in text)
+    if digits + symbols > letters:
+        features["mostly_numeric"] = 1.0
+    return features
+
+
+class LocalDomainClassifier:
+    """
+    Linear softmax model over extract_features(). Weights are stored as
+    {feature: {domain: weight}} in a JSON file.
+    """
+
+    def __init__(self, weights_path: str = DEFAULT_WEIGHTS_PATH, threshold: float = 0.85):
+        """
+        :param weights_path: JSON weights file.
+        :param threshold: Minimum softmax probability for a local answer; below
+            it, predict() returns None and the caller defers to the LLM.
+        """
+        self.weights_path = weights_path
+        self.threshold = threshold
+        self.weights: Dict[str, Dict[str, float]] = {}
+        if os.path.exists(weights_path):
+            with open(weights_path, "r") as f:
+                self.weights = json.load(f)
+        else:
+            debug_print(DEBUG_INFO, f"Local classifier weights not found: {weights_path}")
+
+    def probabilities(self, text: str) -> Dict[str, float]:
+        return self._probabilities_from_features(extract_features(text))
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Return (domain, confidence). domain is None when the confidence is
+        below the threshold or the domain is one only the LLM may choose.
+        """
+        probs = self.probabilities(text)
+        domain = max(probs, key=probs.get)
+        confidence = probs[domain]
+        debug_print(DEBUG_VERBOSE, f"Local classifier: {domain} ({confidence:.2f}) for '{text}'")
+        if confidence < self.threshold or domain in LLM_ONLY_DOMAINS:
+            return None, confidence
+        return domain, confidence
+
+    def train(self, examples: List[Tuple[str, str]], epochs: int = 30, learning_rate: float = 0.1,
+              l2: float = 1e-3) -> None:
+        """
+        Fit the weights with stochastic gradient descent on softmax cross-entropy,
+        starting from the current weights.
+        """
+        featurized = [(extract_features(text), domain) for text, domain in examples if domain in DOMAINS]
+        for _ in range(epochs):
+            for features, label in featurized:
+                probs = self._probabilities_from_features(features)
+                for name, value in features.items():
+                    row = self.weights.setdefault(name, {})
+                    for domain in DOMAINS:
+                        gradient = (probs[domain] - (1.0 if domain == label else 0.0)) * value
+                        weight = row.get(domain, 0.0)
+                        row[domain] = weight - learning_rate * (gradient + l2 * weight)
+
+    def _probabilities_from_features(self, features: Dict[str, float]) -> Dict[str, float]:
+        logits = {domain: sum(self.weights.get(name, {}).get(domain, 0.0) * value
+                              for name, value in features.items()) for domain in DOMAINS}
+        top = max(logits.values())
+        exp = {domain: math.exp(logit - top) for domain, logit in logits.items()}
+        total = sum(exp.values())
+        return {domain: value / total for domain, value in exp.items()}
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.weights_path
+        rounded = {name: {d: round(w, 4) for d, w in row.items()} for name, row in self.weights.items()}
+        with open(path, "w") as f:
+            json.dump(rounded, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Train or try the local domain pre-classifier")
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+    train_cmd = sub.add_parser("train", help="Fit weights from a JSONL file of {text, domain}")
+    train_cmd.add_argument("data")
+    train_cmd.add_argument("--output", default=DEFAULT_WEIGHTS_PATH)
+    train_cmd.add_argument("--epochs", type=int, default=30)
+    train_cmd.add_argument("--from-scratch", action="store_true",
+                           help="Start from zero weights instead of the current ones")
+    predict_cmd = sub.add_parser("predict", help="Classify statements given as arguments")
+    predict_cmd.add_argument("statements", nargs="+")
+    args = arg_parser.parse_args(argv)
+
+    classifier = LocalDomainClassifier()
+    if args.command == "train":
+        if args.from_scratch:
+            classifier.weights = {}
+        with open(args.data, "r") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        examples = [(r["text"], r["domain"]) for r in records]
+        classifier.train(examples, epochs=args.epochs)
+        classifier.save(args.output)
+        print(f"Trained on {len(examples)} examples, weights written to {args.output}")
+    else:
+        for statement in args.statements:
+            probs = classifier.probabilities(statement)
+            domain = max(probs, key=probs.get)
+            print(f"{domain}\t{probs[domain]:.2f}\t{statement}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,74 @@
 # hallucination_detection/main.py
 
+import argparse
+import asyncio
 import os
 import sys
 from pathlib import Path
 
 from hallucination_detection.check_aggregator import CheckAggregator
-from hallucination_detection.llm import LLMContainer
+from hallucination_detection.deadline import Deadline, deadline_scope, default_budget
+from hallucination_detection.llm import LLMContainer, get_registry
+from hallucination_detection.llm_cache import LLMResponseCache
+from hallucination_detection.llm_cassette import Cassette
+from hallucination_detection.metrics import get_metrics
+from hallucination_detection.result_store import GOOD, LOW_RISK, HIGH_RISK, UNVERIFIED, ResultStore
+from hallucination_detection.verdict_store import VerdictStore
 from hallucination_detection.debug_logger import set_debug_level, DEBUG_INFO, DEBUG_ERROR, debug_print
 from hallucination_detection.statement_parser import StatementParser
+from hallucination_detection.pipeline import stream_document, write_jsonl
 
-def main():
-    # Set desired debug level (e.g., DEBUG_INFO for more detail)
-    set_debug_level(DEBUG_INFO)
+# Risk band -> (label, explanation) for the summary report.
+RISK_DISPLAY = {
+    GOOD: ("✅ GOOD", "Highly reliable statement"),
+    LOW_RISK: ("⚠️ LOW_RISK", "Generally reliable but verify"),
+    HIGH_RISK: ("❌ HIGH_RISK", "Potential hallucination detected"),
+    UNVERIFIED: ("❔ UNVERIFIED", "Not checked within the document's time budget"),
+}
+
+def _fmt(score) -> str:
+    return "n/a" if score is None else f"{score:.2f}"
+
+async def _extract_all(parser: StatementParser, partitions):
+    return await asyncio.gather(*(parser.aextract_statements(p) for p in partitions))
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Detect potential hallucinations in a text document")
+    arg_parser.add_argument("--input", help="Text file to analyze (defaults to samples/sample1.txt)")
+    arg_parser.add_argument("--jsonl", action="store_true",
+                            help="Stream one JSON line per statement as soon as it is scored")
+    arg_parser.add_argument("--metrics-out",
+                            help="Write run metrics here at the end (Prometheus text for .prom/.txt, else JSON)")
+    arg_parser.add_argument("--results-out",
+                            help="Write statement results here (Parquet for .parquet, else a directory of .npy columns)")
+    arg_parser.add_argument("--budget", type=float, default=default_budget(),
+                            help="Latency budget for the document in seconds (HALLUCINATION_DOCUMENT_BUDGET); "
+                                 "statements left without time are reported as unverified")
+    return arg_parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Set desired debug level (e.g., DEBUG_INFO for more detail).
+    # JSONL mode keeps stdout machine-readable.
+    set_debug_level(DEBUG_ERROR if args.jsonl else DEBUG_INFO)
+
+    # Optionally cache LLM responses on disk across runs
+    cache_path = os.environ.get("HALLUCINATION_LLM_CACHE")
+    if cache_path:
+        get_registry().set_cache(LLMResponseCache(cache_path))
+
+    # Optionally record LLM responses to, or replay them from, a cassette
+    cassette = Cassette.from_env()
+    if cassette is not None:
+        get_registry().set_cassette(cassette)
+
+    # Optionally reuse verdicts of statements scored in earlier runs
+    verdict_store_path = os.environ.get("HALLUCINATION_VERDICT_STORE")
+    verdict_store = VerdictStore(path=verdict_store_path) if verdict_store_path else None
 
     # 1. Initialize aggregator
-    aggregator = CheckAggregator()
+    aggregator = CheckAggregator(verdict_store=verdict_store)
 
     # 2. LLM container with different LLMs
     llm_container = LLMContainer()
@@ -25,7 +79,7 @@ def main():
 
     # 3. Read sample text from file using relative path
     current_dir = Path(__file__).parent
-    sample_file = os.path.join(current_dir, "samples", "sample1.txt")
+    sample_file = args.input or os.path.join(current_dir, "samples", "sample1.txt")
     try:
         with open(sample_file, 'r') as f:
             sample_text = f.read()
@@ -37,60 +91,92 @@ def main():
         debug_print(DEBUG_ERROR, f"Error reading sample file: {str(e)}")
         return 1
 
-    # Create a StatementParser that partitions by paragraph first, limiting each partition to 10 words
-    parser = StatementParser(max_words=200, split_by_paragraph=True)
-    partitions = parser.partition_text(sample_text)
-
-    print("\nPartitions:")
-    for i, p in enumerate(partitions):
-        print(f"Partition {i+1}: {p}")
-
-    # Extract statements and check each
-    print("\nChecking statements:")
-    all_statements = []  # Store all analyzed statements
-    for i, partition in enumerate(partitions):
-        statements = parser.extract_statements(partition)
-        for j, statement in enumerate(statements):
-            score, domain = aggregator.check_statement(statement)
-            all_statements.append({
-                'statement': statement,
-                'score': score,
-                'domain': domain,
-                'partition': i+1,
-                'statement_num': j+1
-            })
-            print(f"  P{i+1}-S{j+1} => '{statement}' => score: {score} ({domain})")
+    # Create a StatementParser that partitions by paragraph first, packing whole sentences up to
+    # the extraction model's token budget
+    parser = StatementParser(split_by_paragraph=True)
+
+    if args.jsonl:
+        write_jsonl(stream_document(sample_text, parser=parser, aggregator=aggregator, budget=args.budget),
+                    sys.stdout)
+        aggregator.close()
+        if verdict_store is not None:
+            verdict_store.save()
+        if args.metrics_out:
+            get_metrics().write(args.metrics_out)
+        if cassette is not None:
+            cassette.close()
+        return 0
+
+    # One deadline covers partitioning, extraction, classification and checking
+    with deadline_scope(Deadline(args.budget) if args.budget is not None else None):
+        partitions = parser.partition_text(sample_text)
+
+        print("\nPartitions:")
+        for i, p in enumerate(partitions):
+            print(f"Partition {i+1}: {p}")
+
+        # Extract statements from every partition, then check them all concurrently
+        print("\nChecking statements:")
+        statements_per_partition = asyncio.run(_extract_all(parser, partitions))
+        flat_statements = [
+            (i, j, statement)
+            for i, statements in enumerate(statements_per_partition)
+            for j, statement in enumerate(statements)
+        ]
+        results = asyncio.run(aggregator.check_statements_async([s for _, _, s in flat_statements]))
+    aggregator.close()
+
+    store = ResultStore()  # Store all analyzed statements
+    for (i, j, statement), (score, domain) in zip(flat_statements, results):
+        store.append(statement, score, domain, i+1, j+1)
+        print(f"  P{i+1}-S{j+1} => '{statement}' => score: {score} ({domain})")
 
     # Generate summary report
     print("\n" + "="*80)
     print("STATEMENT ANALYSIS SUMMARY")
     print("="*80)
 
-    for result in all_statements:
+    # Risk levels for all statements at once
+    for result, band in zip(store.rows(), store.risk_bands().tolist()):
         stmt = result['statement']
         score = result['score']
         domain = result['domain'].upper()
-        
-        # Define risk levels with emojis
-        if score > 0.9:
-            risk_class = "✅ GOOD"
-            explanation = "Highly reliable statement"
-        elif score > 0.6:
-            risk_class = "⚠️ LOW_RISK"
-            explanation = "Generally reliable but verify"
-        else:
-            risk_class = "❌ HIGH_RISK"
-            explanation = "Potential hallucination detected"
+        risk_class, explanation = RISK_DISPLAY[band]
         
         print(f"\n[Statement P{result['partition']}-S{result['statement_num']}] [{domain}]")
         print(f"  Content: {stmt}")
         print(f"  Domain: {domain}")
-        print(f"  Final Score: {score:.2f}")
+        print(f"  Final Score: {_fmt(score)}")
         print(f"  Risk Level: {risk_class}")
         print(f"  Explanation: {explanation}")
         # debug_print(DEBUG_INFO, f"Statement {result['partition']}-{result['statement_num']} Classification: {risk_class} Domain: {domain}")
         print("-" * 60)
 
+    print("\nDomain summary:")
+    for domain, summary in store.domain_summary().items():
+        print(f"  {domain.upper():12s} statements: {summary['count']:4d}  mean: {_fmt(summary['mean'])}  "
+              f"min: {_fmt(summary['min'])}  high risk: {summary['high_risk']}  unverified: {summary['unverified']}")
+    if args.results_out:
+        if args.results_out.endswith(".parquet"):
+            store.write_parquet(args.results_out)
+        else:
+            store.save(args.results_out)
+        debug_print(DEBUG_INFO, "Results written to %s", args.results_out)
+
+    debug_print(DEBUG_INFO, "Domain classifier stats: %s", aggregator.domain_classifier.stats())
+    if verdict_store is not None:
+        verdict_store.save()
+        debug_print(DEBUG_INFO, "Verdict store stats: %s", verdict_store.stats())
+    if get_registry().cache is not None:
+        debug_print(DEBUG_INFO, "LLM cache stats: %s", get_registry().cache.stats())
+    if cassette is not None:
+        cassette.close()
+        debug_print(DEBUG_INFO, "Cassette stats: %s", cassette.stats())
+    debug_print(DEBUG_INFO, "LLM scheduler stats: %s", get_registry().scheduler_stats())
+    if args.metrics_out:
+        get_metrics().write(args.metrics_out)
+        debug_print(DEBUG_INFO, "Metrics written to %s", args.metrics_out)
+
     # 4. If we wanted fewer debug prints, set_debug_level(DEBUG_ERROR)
     # set_debug_level(DEBUG_ERROR)
 
@@ -0,0 +1,183 @@
+# hallucination_detection/metrics.py
+"""
+In-process metrics: labelled counters and latency histograms.
+
+Instrumented code records into the process-wide registry from get_metrics():
+    with get_metrics().timer("stage_seconds", stage="classify"):
+        ...
+    get_metrics().inc("llm_calls_total", provider="cerebras", model="llama3.1-8b")
+
+At the end of a run the registry is exported as Prometheus text
+(to_prometheus) or a JSON summary (summary / write).
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    "stage_seconds": "Wall time per pipeline stage (partition, extract, classify, check)",
+    "llm_calls_total": "Provider calls per provider/model/lane",
+    "llm_call_seconds": "Provider call latency per provider/model/lane",
+    "llm_errors_total": "Provider calls that raised per provider/model/lane",
+    "llm_tokens_total": "Tokens reported by the provider, by kind (prompt/completion)",
+    "llm_cache_requests_total": "Response cache lookups by result (hit/miss)",
+    "score_parses_total": "LLM score parses per check by outcome (ok/failure)",
+    "cascade_total": "Cascade decisions per check: small-model score accepted or escalated (band/parse)",
+    "overlap_statements_dropped_total": "Extracted statements dropped as repeats of the partition overlap context",
+    "microbatches_total": "Micro-batches scored by the service per check",
+    "microbatch_statements_total": "Statements scored in service micro-batches per check",
+    "microbatch_wait_seconds": "Time statements waited for their micro-batch to fill",
+    "server_requests_total": "Service HTTP requests by path and status",
+    "server_request_seconds": "Service HTTP request latency by path",
+    "ensemble_total": "Ensemble scorings per check that stopped early on consensus or heard every member",
+    "ensemble_members_skipped_total": "Ensemble member calls cancelled or ignored after an early consensus",
+    "news_keywords_dropped_total": "Statement keywords left out of NewsAPI queries once max_queries were full",
+    "news_statements_unsearched_total": "Latest-news statements left unverified because none of their keywords were searched",
+    "deadline_degradations_total": "Statements or calls degraded by the document deadline, per stage and level",
+    "check_seconds": "Time spent in a check per domain",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "total")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters and histograms keyed by name and labels.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the wall time of the block into histogram name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def summary(self) -> Dict[str, List[Dict]]:
+        """JSON-serializable snapshot: counters as values, histograms as count/sum/mean/p50/p95."""
+        with self._lock:
+            result: Dict[str, List[Dict]] = {}
+            for name, series in sorted(self._counters.items()):
+                result[name] = [dict(key, value=value) for key, value in sorted(series.items())]
+            for name, series in sorted(self._histograms.items()):
+                result[name] = [dict(key, count=h.count, sum=round(h.total, 6),
+                                     mean=round(h.total / h.count, 6) if h.count else 0.0,
+                                     p50=self._quantile(h, 0.5), p95=self._quantile(h, 0.95))
+                                for key, h in sorted(series.items())]
+            return result
+
+    @staticmethod
+    def _quantile(histogram: _Histogram, q: float) -> Optional[float]:
+        """Bucket upper bound containing the q-quantile (None when beyond the last bucket)."""
+        target = q * histogram.count
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return None
+
+    def to_prometheus(self, prefix: str = "hallucination_") -> str:
+        """Render all series in the Prometheus text exposition format."""
+        def fmt_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = key + extra
+            if not pairs:
+                return ""
+            escaped = (k + '="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+                       for k, v in pairs)
+            return "{" + ",".join(escaped) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = prefix + name
+                if name in METRIC_HELP:
+                    lines.append(f"# HELP {full} {METRIC_HELP[name]}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{fmt_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                full = prefix + name
+                if name in METRIC_HELP:
+                    lines.append(f"# HELP {full} {METRIC_HELP[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{fmt_labels(key, (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{full}_bucket{fmt_labels(key, (('le', '+Inf'),))} {h.count}")
+                    lines.append(f"{full}_sum{fmt_labels(key)} {h.total}")
+                    lines.append(f"{full}_count{fmt_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write Prometheus text for *.prom/*.txt paths, otherwise a JSON summary."""
+        with open(path, "w") as f:
+            if path.endswith((".prom", ".txt")):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.summary(), f, indent=2)
+                f.write("\n")
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    return _metrics
@@ -0,0 +1,174 @@
+# hallucination_detection/microbatch.py
+"""
+Cross-request micro-batching of statement checks.
+
+Callers submit (domain, statement) pairs from any thread and get a Future for
+the score. Statements of the same domain (and so the same check and model)
+are collected until the check's max_batch_size is reached or the oldest one
+has waited max_wait seconds, then scored with a single check_facts call on a
+shared worker pool. Admission is bounded: once max_pending statements are
+queued or in flight, reserve raises Overloaded so the caller can shed load.
+Each statement keeps the deadline current when it was submitted. A batch is
+split by degradation level, and each part runs under the tightest deadline in
+it, so one caller with a nearly spent budget does not degrade the others.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from .checks.base_check import BaseCheck
+from .deadline import Deadline, current_deadline, deadline_scope
+from .debug_logger import debug_print, DEBUG_ERROR, DEBUG_VERBOSE
+from .metrics import get_metrics
+
+
+class Overloaded(Exception):
+    """More statements are pending than the batcher admits."""
+
+
+class _DomainQueue:
+    """Pending statements of one domain and the thread that cuts them into batches."""
+
+    def __init__(self, batcher: "MicroBatcher", domain: str, check: BaseCheck):
+        self.batcher = batcher
+        self.domain = domain
+        self.check = check
+        self.items: List[Tuple[float, str, Future, Deadline]] = []
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name=f"microbatch-{domain}", daemon=True)
+        self.thread.start()
+
+    def put(self, text: str, future: Future, deadline: Deadline) -> None:
+        with self.cond:
+            self.items.append((time.monotonic(), text, future, deadline))
+            self.cond.notify()
+
+    def _run(self) -> None:
+        max_size = max(1, self.check.max_batch_size)
+        while True:
+            with self.cond:
+                while not self.items and not self.batcher.closed:
+                    self.cond.wait()
+                if not self.items:
+                    return
+                deadline = self.items[0][0] + self.batcher.max_wait
+                while len(self.items) < max_size and not self.batcher.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch = self.items[:max_size]
+                del self.items[:max_size]
+            self.batcher.executor.submit(self._score, batch)
+
+    def _score(self, batch: List[Tuple[float, str, Future, Deadline]]) -> None:
+        metrics = get_metrics()
+        check_name = self.check.__class__.__name__
+        metrics.inc("microbatches_total", check=check_name)
+        metrics.inc("microbatch_statements_total", len(batch), check=check_name)
+        now = time.monotonic()
+        for enqueued, _, _, _ in batch:
+            metrics.observe("microbatch_wait_seconds", now - enqueued, check=check_name)
+        debug_print(DEBUG_VERBOSE, "Scoring micro-batch of %d '%s' statements", len(batch), self.domain)
+        # Statements without a deadline are kept apart from ones with a (still full) budget.
+        groups: Dict[Tuple[int, bool], List[Tuple[float, str, Future, Deadline]]] = {}
+        for item in batch:
+            deadline = item[3]
+            groups.setdefault((deadline.level(), deadline.unlimited), []).append(item)
+        # Most urgent first; a group is scored under the tightest deadline in it.
+        for group in sorted(groups.values(), key=lambda g: min(d.remaining() for _, _, _, d in g)):
+            self._score_group(group, check_name)
+
+    def _score_group(self, batch: List[Tuple[float, str, Future, Deadline]], check_name: str) -> None:
+        metrics = get_metrics()
+        deadline = min((d for _, _, _, d in batch), key=lambda d: d.remaining())
+        try:
+            with deadline_scope(deadline), metrics.timer("stage_seconds", stage="check"), \
+                    metrics.timer("check_seconds", domain=self.domain, check=check_name):
+                scores = self.check.check_facts([text for _, text, _, _ in batch])
+        except BaseException as e:
+            debug_print(DEBUG_ERROR, "Micro-batch for '%s' failed: %s", self.domain, e)
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+        else:
+            for (_, _, future, _), score in zip(batch, scores):
+                future.set_result(score)
+        finally:
+            self.batcher.release(len(batch))
+
+
+class MicroBatcher:
+    """
+    Shares check_facts batches between concurrent callers.
+    """
+
+    def __init__(self,
+                 get_check: Callable[[str], BaseCheck],
+                 max_wait: float = 0.02,
+                 max_pending: int = 1000,
+                 workers: int = 8):
+        """
+        :param get_check: Domain -> warm check instance (e.g. CheckAggregator.get_checker).
+        :param max_wait: Longest time (seconds) a statement waits for its batch to fill.
+        :param max_pending: Statements queued or being checked before submit raises Overloaded.
+        :param workers: Batches scored concurrently.
+        """
+        self.get_check = get_check
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="microbatch-check")
+        self.closed = False
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._queues_lock = threading.Lock()
+        self._queues: Dict[str, _DomainQueue] = {}
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def reserve(self, count: int) -> None:
+        """Admit count statements, or raise Overloaded without admitting any."""
+        with self._lock:
+            if self.closed or self._pending + count > self.max_pending:
+                raise Overloaded(f"{self._pending} statements pending (limit {self.max_pending})")
+            self._pending += count
+
+    def release(self, count: int) -> None:
+        with self._lock:
+            self._pending -= count
+
+    def submit(self, domain: str, text: str) -> Future:
+        """
+        Queue an admitted statement (see reserve) and return a Future for its
+        score (None if the statement's deadline ran out first).
+        """
+        future: Future = Future()
+        self._queue(domain).put(text, future, current_deadline())
+        return future
+
+    def _queue(self, domain: str) -> _DomainQueue:
+        queue = self._queues.get(domain)
+        if queue is None:
+            with self._queues_lock:
+                queue = self._queues.get(domain)
+                if queue is None:
+                    queue = _DomainQueue(self, domain, self.get_check(domain))
+                    self._queues[domain] = queue
+        return queue
+
+    def close(self, wait: bool = True) -> None:
+        """Flush queued statements and stop the batching threads."""
+        self.closed = True
+        for queue in list(self._queues.values()):
+            with queue.cond:
+                queue.cond.notify_all()
+            if wait:
+                queue.thread.join()
+        self.executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, object]:
+        return {"pending": self._pending, "max_pending": self.max_pending,
+                "queued": {domain: len(q.items) for domain, q in self._queues.items()}}
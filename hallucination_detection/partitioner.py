@@ -0,0 +1,164 @@
+# hallucination_detection/partitioner.py
+"""
+Token-budgeted partitioning on sentence boundaries.
+
+Sentences are packed whole into partitions of at most a target number of
+tokens for the extraction model, measured with a local approximation of a BPE
+tokenizer (no model download). Each partition after the first carries the last
+few preceding sentences as read-only context so the extraction model can
+resolve pronouns that refer back across the cut; statements the model
+re-extracts from that context are dropped by drop_overlap_statements.
+"""
+
+import math
+import re
+from typing import Iterable, List, Set, Tuple
+
+from .sentence_splitter import split_sentences
+
+# Target tokens per partition for each (provider, model) used for extraction.
+# Large enough to fill an extraction call, small enough that the statement list
+# the model writes back stays well inside its output limit.
+PARTITION_TOKEN_BUDGETS = {
+    ("cerebras", "llama3.3-70b"): 600,
+    ("cerebras", "llama3.1-8b"): 400,
+}
+DEFAULT_PARTITION_TOKENS = 400
+
+# Word pieces, numbers and single punctuation marks, roughly as a BPE tokenizer sees them.
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def partition_budget(llm: str, model: str) -> int:
+    return PARTITION_TOKEN_BUDGETS.get((llm, model), DEFAULT_PARTITION_TOKENS)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count: about one token per 4 letters of a word, one per
+    3 digits and one per punctuation mark, which is close enough to BPE
+    tokenizers on English prose for budgeting.
+    """
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        if piece[0].isalpha():
+            tokens += max(1, math.ceil(len(piece) / 4))
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+class Partition(str):
+    """
+    Partition text that also carries the preceding sentences as context.
+    Behaves as a plain string everywhere else.
+    """
+
+    context: str
+
+    def __new__(cls, text: str, context: str = ""):
+        partition = super().__new__(cls, text)
+        partition.context = context
+        return partition
+
+
+def _split_oversized(sentence: str, budget: int) -> List[str]:
+    """Cut a single sentence longer than the budget at word boundaries."""
+    pieces, current, used = [], [], 0
+    for word in sentence.split():
+        cost = estimate_tokens(word)
+        if current and used + cost > budget:
+            pieces.append(" ".join(current))
+            current, used = [], 0
+        current.append(word)
+        used += cost
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def pack_sentences(blocks: Iterable[str], budget: int, overlap_sentences: int = 2) -> List[Partition]:
+    """
+    Pack the sentences of each block (e.g. paragraph) into partitions of at
+    most `budget` estimated tokens. Blocks are never merged; a block that fits
+    stays one partition. Context overlap crosses block boundaries, since a
+    paragraph can open with a reference to the previous one.
+
+    :param blocks: Text blocks, in document order.
+    :param budget: Target tokens per partition.
+    :param overlap_sentences: Preceding sentences carried as context; sentences
+        that together exceed a quarter of the budget are not carried.
+    """
+    partitions: List[Partition] = []
+    previous: List[Tuple[str, int]] = []
+
+    def emit(sentences: List[Tuple[str, int]]) -> None:
+        context: List[str] = []
+        used = 0
+        for sentence, cost in reversed(previous[-overlap_sentences:] if overlap_sentences else []):
+            if used + cost > budget // 4:
+                break
+            context.insert(0, sentence)
+            used += cost
+        partitions.append(Partition(" ".join(s for s, _ in sentences), " ".join(context)))
+        previous.extend(sentences)
+        del previous[:-max(overlap_sentences, 1)]
+
+    for block in blocks:
+        current: List[Tuple[str, int]] = []
+        used = 0
+        for sentence in split_sentences(block):
+            cost = estimate_tokens(sentence)
+            pieces = [(sentence, cost)] if cost <= budget else \
+                [(piece, estimate_tokens(piece)) for piece in _split_oversized(sentence, budget)]
+            for piece, piece_cost in pieces:
+                if current and used + piece_cost > budget:
+                    emit(current)
+                    current, used = [], 0
+                current.append((piece, piece_cost))
+                used += piece_cost
+        if current:
+            emit(current)
+    return partitions
+
+
+# Function words ignored when deciding which part of the text a statement came from.
+_STOPWORDS = {
+    "the", "and", "for", "was", "were", "are", "is", "has", "had", "have", "that", "this", "with", "from",
+    "his", "her", "its", "their", "they", "she", "him", "them", "which", "who", "also", "not", "but",
+}
+
+
+def _content_words(text: str) -> Set[str]:
+    return {w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS and (len(w) > 2 or w.isdigit())}
+
+
+def drop_overlap_statements(statements: List[str], partition: str, context: str,
+                            threshold: float = 0.6) -> List[str]:
+    """
+    Remove duplicate statements and statements restating the overlap context.
+    A statement restates the context when none of its content words occur
+    only in the partition and at least `threshold` of them occur in the
+    context. Referents copied from the context into a statement (resolved
+    pronouns) do not cause a drop, since the rest of the statement still
+    carries words from the partition.
+    """
+    partition_words = _content_words(partition)
+    context_words = _content_words(context) if context else set()
+    partition_only = partition_words - context_words
+    kept: List[str] = []
+    seen: Set[str] = set()
+    for statement in statements:
+        key = " ".join(statement.lower().split())
+        if key in seen:
+            continue
+        seen.add(key)
+        words = _content_words(statement)
+        if context_words and words and not words & partition_only \
+                and len(words & context_words) / len(words) >= threshold:
+            continue
+        kept.append(statement)
+    return kept
@@ -0,0 +1,225 @@
+# hallucination_detection/pipeline.py
+"""
+Streaming document pipeline.
+
+Partitioning/extraction, classification and checking run as overlapping
+stages connected by bounded queues, and each statement result is yielded as
+soon as it is scored instead of after the whole document finishes. With a
+budget, every stage runs under one document deadline (see deadline.py) and
+statements it leaves no time for are reported as unverified.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import IO, Iterable, Iterator, List, Optional
+
+from .check_aggregator import CheckAggregator
+from .deadline import Deadline, bind_context, deadline_scope
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_ERROR
+from .metrics import get_metrics
+from .statement_parser import StatementParser
+
+# Marks the end of a stage's output.
+_DONE = object()
+
+# StatementResult.status: scored, or left without a score when the deadline ran out.
+STATUS_SCORED = "scored"
+STATUS_UNVERIFIED = "unverified"
+
+
+@dataclass
+class StatementResult:
+    statement: str
+    score: Optional[float]
+    domain: str
+    partition: int
+    statement_num: int
+    status: str = field(init=False)
+
+    def __post_init__(self):
+        self.status = STATUS_UNVERIFIED if self.score is None else STATUS_SCORED
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: "queue.Queue", item, stop: threading.Event) -> bool:
+    """Put with backpressure; gives up once the consumer has stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: "queue.Queue", stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def stream_document(text: str,
+                    parser: Optional[StatementParser] = None,
+                    aggregator: Optional[CheckAggregator] = None,
+                    classify_workers: int = 4,
+                    check_workers: int = 4,
+                    queue_size: int = 32,
+                    budget: Optional[float] = None) -> Iterator[StatementResult]:
+    """
+    Score a document and yield a StatementResult per statement as soon as it
+    is checked. Results arrive in completion order; use partition and
+    statement_num to restore document order.
+
+    :param classify_workers: Threads running domain classification.
+    :param check_workers: Threads running domain checks.
+    :param queue_size: Capacity of each inter-stage queue (backpressure bound).
+    :param budget: Seconds for the whole document, counted from the first
+        result requested; None leaves stages without a deadline.
+    """
+    parser = parser or StatementParser(split_by_paragraph=True)
+    owns_aggregator = aggregator is None
+    aggregator = aggregator or CheckAggregator()
+
+    statements_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    classified_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    results_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    metrics = get_metrics()
+    classifiers_left = [classify_workers]
+    classifiers_lock = threading.Lock()
+
+    def extract_stage():
+        try:
+            for i, partition in enumerate(parser.partition_text(text)):
+                for j, statement in enumerate(parser.extract_statements(partition)):
+                    if not _put(statements_q, (i + 1, j + 1, statement), stop):
+                        return
+        except BaseException as e:
+            _put(results_q, _StageError(e), stop)
+        finally:
+            for _ in range(classify_workers):
+                _put(statements_q, _DONE, stop)
+
+    def classify_stage():
+        try:
+            while True:
+                item = _get(statements_q, stop)
+                if item is _DONE:
+                    return
+                partition, statement_num, statement = item
+                cached = aggregator.lookup_verdict(statement)
+                if cached is not None:
+                    score, domain = cached
+                    _put(results_q, StatementResult(statement, score, domain, partition, statement_num), stop)
+                    continue
+                with metrics.timer("stage_seconds", stage="classify"):
+                    domain = aggregator.domain_classifier.classify(statement)
+                _put(classified_q, (partition, statement_num, statement, domain), stop)
+        except BaseException as e:
+            _put(results_q, _StageError(e), stop)
+        finally:
+            # The last classifier to finish releases every check worker.
+            with classifiers_lock:
+                classifiers_left[0] -= 1
+                last = classifiers_left[0] == 0
+            if last:
+                for _ in range(check_workers):
+                    _put(classified_q, _DONE, stop)
+
+    def check_stage():
+        try:
+            while True:
+                item = _get(classified_q, stop)
+                if item is _DONE:
+                    return
+                partition, statement_num, statement, domain = item
+                checker = aggregator.get_checker(domain)
+                with metrics.timer("stage_seconds", stage="check"), \
+                        metrics.timer("check_seconds", domain=domain, check=checker.__class__.__name__):
+                    score = checker.check_fact(statement)
+                aggregator.store_verdict(statement, score, domain)
+                _put(results_q, StatementResult(statement, score, domain, partition, statement_num), stop)
+        except BaseException as e:
+            _put(results_q, _StageError(e), stop)
+        finally:
+            _put(results_q, _DONE, stop)
+
+    # Every stage thread runs under the document's deadline.
+    with deadline_scope(Deadline(budget) if budget is not None else None):
+        threads = [threading.Thread(target=bind_context(extract_stage), name="extract", daemon=True)]
+        threads += [threading.Thread(target=bind_context(classify_stage), name=f"classify-{n}", daemon=True)
+                    for n in range(classify_workers)]
+        threads += [threading.Thread(target=bind_context(check_stage), name=f"check-{n}", daemon=True)
+                    for n in range(check_workers)]
+    for t in threads:
+        t.start()
+    debug_print(DEBUG_INFO, "Started streaming pipeline with %d classify and %d check workers",
+                classify_workers, check_workers)
+
+    remaining = check_workers
+    try:
+        while remaining:
+            item = results_q.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, _StageError):
+                debug_print(DEBUG_ERROR, "Pipeline stage failed: %s", item.error)
+                raise item.error
+            else:
+                yield item
+    finally:
+        stop.set()
+        if owns_aggregator:
+            aggregator.close()
+
+
+async def ascore_document(text: str,
+                          parser: StatementParser,
+                          aggregator: CheckAggregator,
+                          max_concurrency: Optional[int] = None,
+                          budget: Optional[float] = None) -> List[StatementResult]:
+    """
+    Score a whole document with concurrent extraction and checking and return
+    its results in document order. With a budget (seconds), the document runs
+    under that deadline.
+    """
+    with deadline_scope(Deadline(budget) if budget is not None else None):
+        partitions = parser.partition_text(text)
+        statements_per_partition = await asyncio.gather(*(parser.aextract_statements(p) for p in partitions))
+        located = [
+            (i + 1, j + 1, statement)
+            for i, statements in enumerate(statements_per_partition)
+            for j, statement in enumerate(statements)
+        ]
+        scored = await aggregator.check_statements_async([s for _, _, s in located],
+                                                         max_concurrency=max_concurrency)
+    return [
+        StatementResult(statement, score, domain, partition, statement_num)
+        for (partition, statement_num, statement), (score, domain) in zip(located, scored)
+    ]
+
+
+def write_jsonl(results: Iterable[StatementResult], fp: IO[str]) -> int:
+    """Write results as JSON lines, flushing after each one. Returns the count."""
+    count = 0
+    for result in results:
+        fp.write(result.to_json() + "\n")
+        fp.flush()
+        count += 1
+    return count
@@ -0,0 +1,228 @@
+# hallucination_detection/result_store.py
+"""
+Columnar storage and vectorized reporting for statement results.
+
+ResultStore keeps one NumPy column per field (score, domain code, document
+code, partition, statement number) instead of a dict per statement, so
+corpus-scale runs stay compact, and computes risk bands, per-domain and
+per-document summaries and score histograms with array operations.
+Unverified statements (no score) are stored as NaN and get their own band.
+Statement texts are optional. Stores can be written as a directory of .npy
+columns (re-opened memory-mapped) or as Parquet when pyarrow is installed.
+"""
+
+import json
+import math
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Scores above GOOD_THRESHOLD are GOOD, above LOW_RISK_THRESHOLD LOW_RISK, the rest HIGH_RISK;
+# statements without a score are UNVERIFIED.
+GOOD_THRESHOLD = 0.9
+LOW_RISK_THRESHOLD = 0.6
+RISK_LABELS = ("HIGH_RISK", "LOW_RISK", "GOOD", "UNVERIFIED")
+HIGH_RISK, LOW_RISK, GOOD, UNVERIFIED = range(4)
+
+_COLUMNS = {
+    "score": np.float32,
+    "domain": np.uint8,
+    "doc": np.uint32,
+    "partition": np.uint32,
+    "statement_num": np.uint32,
+}
+_META_FILE = "meta.json"
+_TEXT_FILE = "statements.jsonl"
+
+
+def risk_bands(scores: np.ndarray) -> np.ndarray:
+    """Risk band code (HIGH_RISK, LOW_RISK, GOOD or UNVERIFIED for NaN) per score."""
+    scores = np.asarray(scores, dtype=np.float32)
+    bands = np.searchsorted(np.array([LOW_RISK_THRESHOLD, GOOD_THRESHOLD], dtype=np.float32),
+                            scores, side="left").astype(np.uint8)
+    bands[np.isnan(scores)] = UNVERIFIED
+    return bands
+
+
+def _summarize(codes: np.ndarray, scores: np.ndarray, bands: np.ndarray, labels: List[str]) -> Dict[str, Dict]:
+    size = len(labels)
+    counts = np.bincount(codes, minlength=size)
+    verified = ~np.isnan(scores)
+    scored = np.bincount(codes[verified], minlength=size)
+    sums = np.bincount(codes[verified], weights=scores[verified], minlength=size)
+    minimums = np.full(size, np.inf)
+    np.minimum.at(minimums, codes[verified], scores[verified])
+    high_risk = np.bincount(codes, weights=bands == HIGH_RISK, minlength=size)
+    summary = {}
+    for code in np.flatnonzero(counts):
+        # Mean and min cover scored statements only; None when none was scored.
+        summary[labels[code]] = {
+            "count": int(counts[code]),
+            "mean": float(sums[code] / scored[code]) if scored[code] else None,
+            "min": float(minimums[code]) if scored[code] else None,
+            "high_risk": int(high_risk[code]),
+            "unverified": int(counts[code] - scored[code]),
+        }
+    return summary
+
+
+class ResultStore:
+    """
+    Append-only columnar container for (statement, score, domain, partition,
+    statement_num, doc_id) results.
+    """
+
+    def __init__(self, keep_text: bool = True, capacity: int = 1024):
+        """
+        :param keep_text: Keep statement texts; turn off for corpus-scale runs
+            that only need scores and summaries.
+        :param capacity: Initial rows allocated; columns double when full.
+        """
+        self.keep_text = keep_text
+        self.domains: List[str] = []
+        self.docs: List[str] = []
+        self.statements: List[str] = []
+        self._domain_codes: Dict[str, int] = {}
+        self._doc_codes: Dict[str, int] = {}
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in _COLUMNS.items()}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def column(self, name: str) -> np.ndarray:
+        """The filled part of a column (a view, not a copy)."""
+        return self._columns[name][:self._size]
+
+    @property
+    def scores(self) -> np.ndarray:
+        return self.column("score")
+
+    @staticmethod
+    def _code(value: str, codes: Dict[str, int], table: List[str], limit: int) -> int:
+        code = codes.get(value)
+        if code is None:
+            if len(table) >= limit:
+                raise ValueError(f"More than {limit} distinct values")
+            code = codes[value] = len(table)
+            table.append(value)
+        return code
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._columns["score"])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity = max(2 * capacity, 1)
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append(self, statement: str, score: Optional[float], domain: str, partition: int, statement_num: int,
+               doc_id: str = "") -> None:
+        self._grow(self._size + 1)
+        i = self._size
+        columns = self._columns
+        columns["score"][i] = np.nan if score is None else score
+        columns["domain"][i] = self._code(domain, self._domain_codes, self.domains, 256)
+        columns["doc"][i] = self._code(doc_id, self._doc_codes, self.docs, 2 ** 32)
+        columns["partition"][i] = partition
+        columns["statement_num"][i] = statement_num
+        if self.keep_text:
+            self.statements.append(statement)
+        self._size += 1
+
+    def extend(self, results: Iterable, doc_id: str = "") -> None:
+        """Append StatementResult objects (or anything with the same attributes)."""
+        for r in results:
+            self.append(r.statement, r.score, r.domain, r.partition, r.statement_num, doc_id)
+
+    def risk_bands(self) -> np.ndarray:
+        return risk_bands(self.scores)
+
+    def risk_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.risk_bands(), minlength=len(RISK_LABELS))
+        return {label: int(count) for label, count in zip(RISK_LABELS, counts)}
+
+    def domain_summary(self) -> Dict[str, Dict]:
+        """Per domain: statement count, mean and min score, HIGH_RISK and UNVERIFIED counts."""
+        return _summarize(self.column("domain"), self.scores, self.risk_bands(), self.domains)
+
+    def document_summary(self) -> Dict[str, Dict]:
+        """Per document: statement count, mean and min score, HIGH_RISK and UNVERIFIED counts."""
+        return _summarize(self.column("doc"), self.scores, self.risk_bands(), self.docs)
+
+    def histogram(self, bins: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """Score histogram over [0, 1] of scored statements: (counts, bin edges)."""
+        scores = self.scores
+        return np.histogram(scores[~np.isnan(scores)], bins=bins, range=(0.0, 1.0))
+
+    def rows(self) -> Iterator[Dict]:
+        """Results as dicts, decoded row by row (for printing and small exports)."""
+        columns = {name: self.column(name).tolist() for name in _COLUMNS}
+        for i in range(self._size):
+            yield {
+                "statement": self.statements[i] if self.keep_text else None,
+                "score": None if math.isnan(columns["score"][i]) else columns["score"][i],
+                "domain": self.domains[columns["domain"][i]],
+                "partition": columns["partition"][i],
+                "statement_num": columns["statement_num"][i],
+                "doc_id": self.docs[columns["doc"][i]],
+            }
+
+    def to_arrow(self):
+        """A pyarrow Table; domain and doc_id become dictionary-encoded columns."""
+        import pyarrow as pa
+
+        arrays = {
+            "score": pa.array(self.scores, mask=np.isnan(self.scores)),
+            "domain": pa.DictionaryArray.from_arrays(pa.array(self.column("domain")), pa.array(self.domains)),
+            "partition": pa.array(self.column("partition")),
+            "statement_num": pa.array(self.column("statement_num")),
+            "doc_id": pa.DictionaryArray.from_arrays(pa.array(self.column("doc")), pa.array(self.docs)),
+        }
+        if self.keep_text:
+            arrays["statement"] = pa.array(self.statements, type=pa.string())
+        return pa.table(arrays)
+
+    def write_parquet(self, path: str) -> None:
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path)
+
+    def save(self, directory: str) -> None:
+        """Write one .npy file per column plus the code tables (and texts, if kept)."""
+        os.makedirs(directory, exist_ok=True)
+        for name in _COLUMNS:
+            np.save(os.path.join(directory, f"{name}.npy"), self.column(name))
+        with open(os.path.join(directory, _META_FILE), "w") as f:
+            json.dump({"rows": self._size, "domains": self.domains, "docs": self.docs,
+                       "keep_text": self.keep_text}, f)
+        if self.keep_text:
+            with open(os.path.join(directory, _TEXT_FILE), "w") as f:
+                for statement in self.statements:
+                    f.write(json.dumps(statement, ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True, load_text: Optional[bool] = None) -> "ResultStore":
+        """
+        Open a store written by save. With mmap the columns are memory-mapped
+        read-only, so summaries over huge stores do not load them into memory;
+        appending to such a store copies the columns first.
+        """
+        with open(os.path.join(directory, _META_FILE), "r") as f:
+            meta = json.load(f)
+        load_text = meta["keep_text"] if load_text is None else load_text and meta["keep_text"]
+        store = cls(keep_text=load_text, capacity=0)
+        store.domains, store.docs = meta["domains"], meta["docs"]
+        store._domain_codes = {value: code for code, value in enumerate(store.domains)}
+        store._doc_codes = {value: code for code, value in enumerate(store.docs)}
+        store._columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                          for name in _COLUMNS}
+        store._size = meta["rows"]
+        if load_text:
+            with open(os.path.join(directory, _TEXT_FILE), "r") as f:
+                store.statements = [json.loads(line) for line in f]
+        return store
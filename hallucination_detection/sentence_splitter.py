@@ -0,0 +1,103 @@
+# hallucination_detection/sentence_splitter.py
+"""
+Deterministic sentence segmentation and a lightweight pronoun detector.
+
+StatementParser uses these to split plain declarative partitions locally and
+only send partitions with unresolved references (pronouns, demonstratives,
+sentence-initial connectives) to the LLM.
+"""
+
+import re
+from typing import List
+
+# Lowercased tokens (without the trailing period) that end in "." without ending a sentence.
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "e.g", "i.e", "cf", "al",
+    "inc", "ltd", "co", "corp", "dept", "fig", "figs", "eq", "eqs", "no", "nos", "vol", "pp", "ch",
+    "sec", "approx", "est", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct",
+    "nov", "dec", "u.s", "u.k", "u.n", "a.m", "p.m", "ph.d", "b.c", "a.d", "gen", "gov", "sen", "rep",
+}
+
+_PRONOUNS = {
+    "he", "she", "it", "they", "him", "her", "them", "his", "hers", "its", "their", "theirs",
+    "himself", "herself", "itself", "themselves",
+}
+# Words that refer back to an earlier sentence when they open a sentence.
+_LEADING_REFERENCES = {
+    "this", "that", "these", "those", "such", "there", "therefore", "thus", "hence", "so", "however",
+    "but", "because", "also", "consequently", "then", "moreover", "furthermore", "meanwhile",
+}
+
+_CLOSING = "\"'”’)]"
+_WORD_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+def _ends_with_abbreviation(text: str) -> bool:
+    match = re.search(r"(\S+)\.$", text)
+    if not match:
+        return False
+    token = match.group(1).lstrip("\"'“‘(").lower()
+    if token in ABBREVIATIONS:
+        return True
+    # Single-letter initials such as "J. K. Rowling".
+    return len(token) == 1 and token.isalpha()
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences on ., ! and ?, without splitting on decimals,
+    known abbreviations, initials, or inside double quotes.
+    """
+    sentences: List[str] = []
+    start = 0
+    in_quote = False
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in "\"“”":
+            in_quote = not in_quote if ch == "\"" else ch == "“"
+        elif ch in ".!?" and (not in_quote or (i + 1 < n and text[i + 1] in "\"”")):
+            # Decimal numbers and dotted tokens like "e.g." or "3.14".
+            if ch == "." and i + 1 < n and not text[i + 1].isspace() and text[i + 1] not in _CLOSING:
+                i += 1
+                continue
+            end = i + 1
+            while end < n and text[end] in ".!?":
+                end += 1
+            while end < n and text[end] in _CLOSING:
+                if text[end] in "\"”":
+                    in_quote = False
+                end += 1
+            candidate = text[start:end].strip()
+            next_char = text[end:].lstrip()[:1]
+            boundary = end >= n or text[end].isspace()
+            if boundary and not (ch == "." and _ends_with_abbreviation(text[start:i + 1].rstrip())):
+                if not next_char or next_char.isupper() or next_char.isdigit() or next_char in "\"“'‘(":
+                    if candidate:
+                        sentences.append(candidate)
+                    start = end
+            i = end
+            continue
+        i += 1
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def has_unresolved_reference(sentence: str) -> bool:
+    """
+    True if the sentence contains a personal pronoun or opens with a word
+    that refers back to earlier context.
+    """
+    words = _WORD_RE.findall(sentence.lower())
+    if not words:
+        return False
+    if words[0] in _LEADING_REFERENCES:
+        return True
+    return any(word in _PRONOUNS for word in words)
+
+
+def needs_coreference(text: str) -> bool:
+    """True if any sentence of the partition may need pronoun resolution."""
+    return any(has_unresolved_reference(sentence) for sentence in split_sentences(text))
@@ -0,0 +1,301 @@
+# hallucination_detection/server.py
+"""
+Long-running HTTP scoring service.
+
+One process keeps warm checks, pooled LLM clients and the response cache, and
+serves many callers. Statements from concurrent requests are merged into
+shared per-domain micro-batches (see microbatch.py). When more statements are
+pending than --max-pending, requests are rejected with 503 and a Retry-After
+header instead of queueing without bound. A request runs under a latency
+budget ("budget" seconds in the body, else --budget); statements it leaves
+no time for come back with a null score and status "unverified".
+
+Endpoints:
+    POST /v1/statements  {"statements": ["...", ...], "budget": 2.0}
+        -> {"results": [{"statement", "score", "domain", "status"}, ...]}
+    POST /v1/documents   {"text": "...", "budget": 2.0}
+        -> {"results": [{"statement", "score", "domain", "partition", "statement_num", "status"}, ...]}
+    GET  /healthz        -> {"status": "ok", "pending": ..., ...}
+    GET  /metrics        -> Prometheus text
+
+Usage:
+    python -m hallucination_detection.server --port 8080 --max-wait-ms 20 --max-pending 1000 --budget 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+from .check_aggregator import CheckAggregator
+from .deadline import Deadline, bind_context, deadline_scope, default_budget
+from .debug_logger import set_debug_level, debug_print, DEBUG_ERROR, DEBUG_INFO, DEBUG_WARNING
+from .metrics import get_metrics
+from .microbatch import MicroBatcher, Overloaded
+from .pipeline import STATUS_SCORED, STATUS_UNVERIFIED, StatementResult
+from .statement_parser import StatementParser
+
+
+_PATHS = ("/v1/statements", "/v1/documents", "/healthz", "/metrics")
+
+
+class RequestError(Exception):
+    """A request the service refuses, with the HTTP status to answer."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringService:
+    """
+    Scores statements and documents for many concurrent callers.
+    """
+
+    def __init__(self,
+                 aggregator: Optional[CheckAggregator] = None,
+                 parser: Optional[StatementParser] = None,
+                 max_wait: float = 0.02,
+                 max_pending: int = 1000,
+                 check_workers: int = 8,
+                 classify_workers: int = 16,
+                 max_statements: int = 500,
+                 max_document_chars: int = 200_000,
+                 request_timeout: float = 120.0,
+                 budget: Optional[float] = None):
+        """
+        :param max_wait: Longest time (seconds) a statement waits for its micro-batch to fill.
+        :param max_pending: Statements admitted but not yet scored; above it requests get 503.
+        :param check_workers: Micro-batches scored concurrently.
+        :param classify_workers: Threads shared by all requests for extraction and classification.
+        :param max_statements: Largest statement list accepted in one request (413 above).
+        :param max_document_chars: Largest document accepted in one request (413 above).
+        :param request_timeout: Seconds a request may wait in total for its results before answering 504.
+        :param budget: Default latency budget (seconds) per request; None for no deadline.
+        """
+        self.aggregator = aggregator or CheckAggregator()
+        self.parser = parser or StatementParser(split_by_paragraph=True)
+        self.batcher = MicroBatcher(self.aggregator.get_checker, max_wait=max_wait,
+                                    max_pending=max_pending, workers=check_workers)
+        self.executor = ThreadPoolExecutor(max_workers=classify_workers, thread_name_prefix="service")
+        self.max_statements = max_statements
+        self.max_document_chars = max_document_chars
+        self.request_timeout = request_timeout
+        self.budget = budget
+
+    def _deadline(self, budget: Optional[float]) -> Optional[Deadline]:
+        budget = self.budget if budget is None else budget
+        return Deadline(budget) if budget is not None else None
+
+    @staticmethod
+    def _wait(future: Future, expires: float):
+        """The future's result, waiting no later than the request's expiry (monotonic time)."""
+        return future.result(timeout=max(0.0, expires - time.monotonic()))
+
+    def score_statements(self, statements: List[str],
+                         budget: Optional[float] = None) -> List[Tuple[Optional[float], str]]:
+        """
+        Classify and score statements through the shared micro-batches.
+        Returns (score, domain) per statement, in order; the score is None for
+        statements the budget left unverified. Raises Overloaded when the
+        service is saturated and TimeoutError after request_timeout.
+        """
+        expires = time.monotonic() + self.request_timeout
+        if len(statements) > self.max_statements:
+            raise RequestError(413, f"At most {self.max_statements} statements per request")
+        with deadline_scope(self._deadline(budget)):
+            return self._score_statements(statements, expires)
+
+    def _score_statements(self, statements: List[str], expires: float) -> List[Tuple[Optional[float], str]]:
+        results: List[Optional[Tuple[Optional[float], str]]] = [self.aggregator.lookup_verdict(s) for s in statements]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        self.batcher.reserve(len(pending))
+        submitted = 0
+        try:
+            metrics = get_metrics()
+
+            def classify(text: str) -> str:
+                with metrics.timer("stage_seconds", stage="classify"):
+                    return self.aggregator.domain_classifier.classify(text)
+
+            # Bound per statement: classification runs under the request's deadline.
+            classified = [self.executor.submit(bind_context(classify), statements[i]) for i in pending]
+            domains = [self._wait(future, expires) for future in classified]
+            futures = []
+            for i, domain in zip(pending, domains):
+                futures.append(self.batcher.submit(domain, statements[i]))
+                submitted += 1
+            for i, domain, future in zip(pending, domains, futures):
+                score = self._wait(future, expires)
+                results[i] = (score, domain)
+                self.aggregator.store_verdict(statements[i], score, domain)
+        finally:
+            # Statements never handed to the batcher are released here; the rest on completion.
+            self.batcher.release(len(pending) - submitted)
+        return results
+
+    def score_document(self, text: str, budget: Optional[float] = None) -> List[StatementResult]:
+        expires = time.monotonic() + self.request_timeout
+        if len(text) > self.max_document_chars:
+            raise RequestError(413, f"Documents are limited to {self.max_document_chars} characters")
+        with deadline_scope(self._deadline(budget)):
+            partitions = self.parser.partition_text(text)
+            extractions = [self.executor.submit(bind_context(self.parser.extract_statements), p)
+                           for p in partitions]
+            statements_per_partition = [self._wait(future, expires) for future in extractions]
+            located = [
+                (i + 1, j + 1, statement)
+                for i, statements in enumerate(statements_per_partition)
+                for j, statement in enumerate(statements)
+            ]
+            if len(located) > self.max_statements:
+                raise RequestError(413, f"At most {self.max_statements} statements per request")
+            scored = self._score_statements([s for _, _, s in located], expires)
+        return [
+            StatementResult(statement, score, domain, partition, statement_num)
+            for (partition, statement_num, statement), (score, domain) in zip(located, scored)
+        ]
+
+    def health(self) -> dict:
+        return dict(self.batcher.stats(), status="ok")
+
+    def close(self) -> None:
+        self.batcher.close()
+        self.executor.shutdown(wait=False)
+        self.aggregator.close()
+
+
+def _make_handler(service: ScoringService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            debug_print(DEBUG_INFO, "%s - " + format, self.address_string(), *args)
+
+        def _send(self, status: int, body, content_type: str = "application/json", headers=None) -> None:
+            payload = body.encode() if isinstance(body, str) else json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+            path = self.path if self.path in _PATHS else "other"
+            get_metrics().inc("server_requests_total", path=path, status=status)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._send(200, service.health())
+            elif self.path == "/metrics":
+                self._send(200, get_metrics().to_prometheus(), content_type="text/plain; version=0.0.4")
+            else:
+                self._send(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    raise RequestError(400, "Request body must be JSON")
+                if not isinstance(request, dict):
+                    raise RequestError(400, "Request body must be a JSON object")
+                budget = request.get("budget")
+                if budget is not None and (isinstance(budget, bool) or not isinstance(budget, (int, float))
+                                           or budget <= 0):
+                    raise RequestError(400, "'budget' must be a positive number of seconds")
+                with get_metrics().timer("server_request_seconds", path=self.path if self.path in _PATHS else "other"):
+                    if self.path == "/v1/statements":
+                        statements = request.get("statements")
+                        if not isinstance(statements, list) or not all(isinstance(s, str) for s in statements):
+                            raise RequestError(400, "'statements' must be a list of strings")
+                        scored = service.score_statements(statements, budget)
+                        body = {"results": [{"statement": s, "score": score, "domain": domain,
+                                             "status": STATUS_UNVERIFIED if score is None else STATUS_SCORED}
+                                            for s, (score, domain) in zip(statements, scored)]}
+                    elif self.path == "/v1/documents":
+                        text = request.get("text")
+                        if not isinstance(text, str):
+                            raise RequestError(400, "'text' must be a string")
+                        body = {"results": [r.to_dict() for r in service.score_document(text, budget)]}
+                    else:
+                        raise RequestError(404, f"Unknown path {self.path}")
+                self._send(200, body)
+            except Overloaded as e:
+                self._send(503, {"error": str(e)}, headers={"Retry-After": "1"})
+            except RequestError as e:
+                self._send(e.status, {"error": str(e)})
+            except FutureTimeoutError:
+                self._send(504, {"error": "Timed out waiting for scores"})
+            except Exception as e:
+                debug_print(DEBUG_ERROR, "Request to %s failed: %s", self.path, e)
+                self._send(500, {"error": str(e)})
+
+    return Handler
+
+
+def make_server(service: ScoringService, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .llm import get_registry
+    from .llm_cache import LLMResponseCache
+    from .llm_cassette import Cassette
+    from .verdict_store import VerdictStore
+
+    arg_parser = argparse.ArgumentParser(description="Serve hallucination scoring over HTTP")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--max-wait-ms", type=float, default=20.0,
+                            help="Longest wait for a micro-batch to fill")
+    arg_parser.add_argument("--max-pending", type=int, default=1000,
+                            help="Pending statements before requests are rejected with 503")
+    arg_parser.add_argument("--check-workers", type=int, default=8, help="Micro-batches scored concurrently")
+    arg_parser.add_argument("--classify-workers", type=int, default=16,
+                            help="Threads for extraction and classification")
+    arg_parser.add_argument("--request-timeout", type=float, default=120.0)
+    arg_parser.add_argument("--budget", type=float, default=default_budget(),
+                            help="Default latency budget per request in seconds (HALLUCINATION_DOCUMENT_BUDGET)")
+    args = arg_parser.parse_args(argv)
+
+    set_debug_level(DEBUG_WARNING)
+    cache_path = os.environ.get("HALLUCINATION_LLM_CACHE")
+    if cache_path:
+        get_registry().set_cache(LLMResponseCache(cache_path))
+    cassette = Cassette.from_env()
+    if cassette is not None:
+        get_registry().set_cassette(cassette)
+    verdict_store_path = os.environ.get("HALLUCINATION_VERDICT_STORE")
+    verdict_store = VerdictStore(path=verdict_store_path) if verdict_store_path else None
+
+    service = ScoringService(CheckAggregator(verdict_store=verdict_store),
+                             max_wait=args.max_wait_ms / 1000, max_pending=args.max_pending,
+                             check_workers=args.check_workers, classify_workers=args.classify_workers,
+                             request_timeout=args.request_timeout, budget=args.budget)
+    server = make_server(service, args.host, args.port)
+    print(f"Scoring service listening on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if verdict_store is not None:
+            verdict_store.save()
+        get_registry().close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,104 +1,181 @@
 # hallucination_detection/statement_parser.py
 """
-A parser to partition input text by paragraphs or word count and extract statements.
+A parser to partition input text by paragraphs and token budget and extract statements.
 """
 
 import re
-from typing import List
+from typing import List, Optional
 
-from .debug_logger import debug_print, DEBUG_INFO
+from .deadline import SMALL_MODEL, UNVERIFIED, current_deadline
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_WARNING
+from .metrics import get_metrics
 from .llm import LLMContainer
+from .llm_scheduler import LLMDeadlineExceeded
+from .partitioner import drop_overlap_statements, pack_sentences, partition_budget
+from .sentence_splitter import needs_coreference, split_sentences
+
+EXTRACTION_MODES = ("llm", "local", "hybrid")
+# Provider and model that extract statements from partitions.
+EXTRACTION_LLM = "cerebras"
+EXTRACTION_MODEL = "llama3.3-70b"
+# Model that extracts once the document deadline runs low.
+DEGRADED_EXTRACTION_MODEL = "llama3.1-8b"
+# Rough tokens per English word, for the deprecated max_words cap.
+_TOKENS_PER_WORD = 1.3
 
 class StatementParser:
     """
     The StatementParser can:
-      1. Partition a text by paragraph or by a given max word limit.
+      1. Partition a text by paragraph and pack whole sentences up to a token budget.
       2. Extract statements (e.g., sentences) from each partition.
     """
 
-    def __init__(self, max_words: int = 100, split_by_paragraph: bool = True):
+    def __init__(self, max_words: Optional[int] = None, split_by_paragraph: bool = True,
+                 extraction_mode: str = "hybrid", max_tokens: Optional[int] = None,
+                 overlap_sentences: int = 2):
         """
-        :param max_words: Maximum words for each chunk if not strictly using paragraphs.
+        :param max_words: Deprecated; caps the token budget at about this many words.
         :param split_by_paragraph: If True, split based on paragraphs first.
+        :param extraction_mode: "llm" sends every partition to the LLM, "local" always
+            uses rule-based sentence splitting, and "hybrid" splits locally unless the
+            partition contains pronouns or back-references that need resolving.
+        :param max_tokens: Target (estimated) tokens per partition; defaults to the
+            extraction model's budget in partitioner.PARTITION_TOKEN_BUDGETS.
+        :param overlap_sentences: Preceding sentences passed to the extraction model
+            as context for resolving references across partition boundaries.
         """
-        self.max_words = max_words
+        if extraction_mode not in EXTRACTION_MODES:
+            raise ValueError(f"extraction_mode must be one of {EXTRACTION_MODES}")
+        self.max_tokens = max_tokens or partition_budget(EXTRACTION_LLM, EXTRACTION_MODEL)
+        if max_words is not None:
+            self.max_tokens = min(self.max_tokens, max(1, int(max_words * _TOKENS_PER_WORD)))
+        self.overlap_sentences = overlap_sentences
         self.split_by_paragraph = split_by_paragraph
+        self.extraction_mode = extraction_mode
+        self.local_extractions = 0
+        self.llm_extractions = 0
         self.llm_container = LLMContainer()
-        self.llm_container.register_llm("cerebras", "llama3.1-8b")
-        self.llm_container.register_llm("cerebras", "llama3.3-70b")
+        self.llm_container.register_llm(EXTRACTION_LLM, DEGRADED_EXTRACTION_MODEL)
+        self.llm_container.register_llm(EXTRACTION_LLM, EXTRACTION_MODEL)
 
     def partition_text(self, text: str) -> List[str]:
         """
-        Partition the text into chunks. If split_by_paragraph is True, split by blank lines.
-        If not, create chunks of up to max_words words each.
+        Partition the text into chunks of whole sentences of at most max_tokens
+        (estimated) tokens. If split_by_paragraph is True, paragraphs (blank-line
+        separated) are never merged into one chunk. Each chunk after the first
+        carries its preceding sentences in a `context` attribute.
         """
         debug_print(DEBUG_INFO, "Starting text partitioning...")
+        with get_metrics().timer("stage_seconds", stage="partition"):
+            return self._partition(text)
+
+    def _partition(self, text: str) -> List[str]:
         text = text.strip()
         if not text:
             return []
 
         if self.split_by_paragraph:
             # Split by blank lines to get paragraphs
-            paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
-            debug_print(DEBUG_INFO, f"Found {len(paragraphs)} paragraphs.")
-            # Optionally, if paragraphs exceed max_words, chunk them further
-            return self._chunk_paragraphs(paragraphs)
+            blocks = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+            debug_print(DEBUG_INFO, "Found %d paragraphs.", len(blocks))
         else:
-            # Directly chunk by words
-            return self._chunk_by_words(text)
+            blocks = [" ".join(text.split())]
+        # Long paragraphs are cut between sentences once they exceed the token budget
+        return pack_sentences(blocks, self.max_tokens, self.overlap_sentences)
 
     def extract_statements(self, text_partition: str) -> List[str]:
         """
-        Use LLM to extract statements and resolve pronouns.
+        Use LLM to extract statements and resolve pronouns. Once the document
+        deadline runs low the small model extracts, and once it runs out the
+        partition is split locally without resolving pronouns.
         """
-        debug_print(DEBUG_INFO, f"Extracting statements from partition: '{text_partition[:50]}...'")
+        debug_print(DEBUG_INFO, "Extracting statements from partition: '%s...'", text_partition[:50])
 
-        llm_client = self.llm_container.get_llm("cerebras", "llama3.3-70b")
-        
-        prompt = f"""Only change is that resolving any pronouns by replacing them with their referents, and extract individual statements from the text.  Be careful on more than one sentence describes one single statement or a logic chain, put them in one line, but keep it as oringal as possible except pronous replacement.
+        with get_metrics().timer("stage_seconds", stage="extract"):
+            model = self._extraction_model(text_partition)
+            if model is None:
+                return self._split_locally(text_partition)
+
+            llm_client = self.llm_container.get_llm(EXTRACTION_LLM, model)
+            try:
+                response = llm_client.generate_text(self._build_extraction_prompt(text_partition), lane="extract")
+            except LLMDeadlineExceeded as e:
+                debug_print(DEBUG_WARNING, "Extraction ran out of time, splitting locally: %s", e)
+                return self._split_locally(text_partition)
+            return self._parse_statements(response, text_partition)
+
+    async def aextract_statements(self, text_partition: str) -> List[str]:
+        """
+        Async variant of extract_statements.
+        """
+        debug_print(DEBUG_INFO, "Extracting statements from partition: '%s...'", text_partition[:50])
+
+        with get_metrics().timer("stage_seconds", stage="extract"):
+            model = self._extraction_model(text_partition)
+            if model is None:
+                return self._split_locally(text_partition)
+
+            llm_client = self.llm_container.get_llm(EXTRACTION_LLM, model)
+            try:
+                response = await llm_client.agenerate_text(self._build_extraction_prompt(text_partition),
+                                                           lane="extract")
+            except LLMDeadlineExceeded as e:
+                debug_print(DEBUG_WARNING, "Extraction ran out of time, splitting locally: %s", e)
+                return self._split_locally(text_partition)
+            return self._parse_statements(response, text_partition)
+
+    def _extraction_model(self, text_partition: str) -> Optional[str]:
+        """Model to extract the partition with, or None to split it locally."""
+        if self._can_split_locally(text_partition):
+            return None
+        deadline = current_deadline()
+        if deadline.degraded(UNVERIFIED, "extract"):
+            return None
+        if deadline.degraded(SMALL_MODEL, "extract"):
+            return DEGRADED_EXTRACTION_MODEL
+        return EXTRACTION_MODEL
+
+    def _can_split_locally(self, text_partition: str) -> bool:
+        if self.extraction_mode == "local":
+            return True
+        if self.extraction_mode == "llm":
+            return False
+        return not needs_coreference(text_partition)
+
+    def _split_locally(self, text_partition: str) -> List[str]:
+        statements = split_sentences(text_partition)
+        self.local_extractions += 1
+        debug_print(DEBUG_INFO, "Split %d statements locally", len(statements))
+        return statements
+
+    def _build_extraction_prompt(self, text_partition: str) -> str:
+        context = getattr(text_partition, "context", "")
+        if context:
+            return f"""Only change is that resolving any pronouns by replacing them with their referents, and extract individual statements from the text.  Be careful on more than one sentence describes one single statement or a logic chain, put them in one line, but keep it as oringal as possible except pronous replacement.
+        The context is the text just before it; use it only to resolve references and do not extract statements from the context.
         Return each statement on a new line.
         Do not add any explanations or additional text.
 
+        Context: {context}
+
         Text: {text_partition}
         Statements:"""
+        return f"""Only change is that resolving any pronouns by replacing them with their referents, and extract individual statements from the text.  Be careful on more than one sentence describes one single statement or a logic chain, put them in one line, but keep it as oringal as possible except pronous replacement.
+        Return each statement on a new line.
+        Do not add any explanations or additional text.
 
-        response = llm_client.generate_text(prompt)
-        
+        Text: {text_partition}
+        Statements:"""
+
+    def _parse_statements(self, response: str, text_partition: str) -> List[str]:
+        self.llm_extractions += 1
         # Split response into individual statements
         statements = [st.strip() for st in response.split('\n') if st.strip()]
+        # Drop repeats and statements re-extracted from the overlap context
+        extracted = len(statements)
+        statements = drop_overlap_statements(statements, text_partition, getattr(text_partition, "context", ""))
+        if len(statements) < extracted:
+            get_metrics().inc("overlap_statements_dropped_total", extracted - len(statements))
         
-        debug_print(DEBUG_INFO, f"Extracted {len(statements)} statements with resolved pronouns")
+        debug_print(DEBUG_INFO, "Extracted %d statements with resolved pronouns", len(statements))
         return statements
-
-    def _chunk_paragraphs(self, paragraphs: List[str]) -> List[str]:
-        """
-        If a paragraph has more words than max_words, chunk it.
-        """
-        partitions = []
-        for para in paragraphs:
-            words = para.split()
-            if len(words) <= self.max_words:
-                partitions.append(para)
-            else:
-                partitions.extend(self._split_long_text(words))
-        return partitions
-
-    def _chunk_by_words(self, text: str) -> List[str]:
-        words = text.split()
-        return self._split_long_text(words)
-
-    def _split_long_text(self, words: List[str]) -> List[str]:
-        """
-        Helper to split a list of words into multiple chunks of <= max_words length.
-        """
-        chunks = []
-        current_chunk = []
-        for w in words:
-            current_chunk.append(w)
-            if len(current_chunk) >= self.max_words:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = []
-        # Add any leftover words
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-        return chunks
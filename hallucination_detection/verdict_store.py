@@ -0,0 +1,231 @@
+# hallucination_detection/verdict_store.py
+"""
+A statement-level verdict store that remembers (score, domain) for statements
+that were already checked, so repeated or paraphrased claims skip
+classification and checking.
+
+Lookups are exact after normalization (case, whitespace, punctuation) or
+near-duplicate via 64-bit SimHash with banded candidate lookup. A near-duplicate
+must have the same content words; only stopwords and word order may differ.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from .debug_logger import debug_print, DEBUG_INFO, DEBUG_VERBOSE
+
+SIMHASH_BITS = 64
+# The fingerprint is split into this many bands. Two fingerprints within
+# (SIMHASH_BANDS - 1) bits of each other share at least one identical band.
+SIMHASH_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+# Punctuation not inside a number (keeps "3.14" and "1,000" intact).
+_PUNCTUATION_RE = re.compile(r"(?<!\d)[^\w\s]|[^\w\s](?!\d)")
+# Words a near-duplicate may add, drop or swap; every other word (negations,
+# prepositions, numbers, names) must match. Kept short on purpose.
+_STOPWORDS = {
+    "a", "an", "the", "of", "is", "are", "was", "were", "be", "been", "being", "am",
+    "and", "that", "which", "who", "whom", "it", "its", "this", "these", "those",
+    "has", "have", "had", "do", "does", "did", "also", "then", "there",
+}
+
+
+def normalize_statement(text: str) -> str:
+    """Lowercase, drop punctuation outside numbers and collapse whitespace."""
+    text = text.lower().replace("'", "").replace("\u2019", "")
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
+def simhash(normalized: str) -> int:
+    """64-bit SimHash over word unigrams and bigrams of a normalized statement."""
+    words = normalized.split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def _guard_signature(normalized: str) -> Tuple[str, ...]:
+    """
+    The content words (with repeats, in any order) a near-duplicate must share.
+    SimHash alone would consider "X was born in 1900" and "X was born in 1901",
+    "X is not Y" or "X grew slowly" for "X grew rapidly" near-duplicates.
+    """
+    return tuple(sorted(w for w in normalized.split() if w not in _STOPWORDS))
+
+
+class _Verdict:
+    __slots__ = ("score", "domain", "check_version", "fingerprint", "guard")
+
+    def __init__(self, score: float, domain: str, check_version: str, fingerprint: int,
+                 guard: Tuple[str, ...]):
+        self.score = score
+        self.domain = domain
+        self.check_version = check_version
+        self.fingerprint = fingerprint
+        self.guard = guard
+
+
+class VerdictStore:
+    """
+    Bounded, optionally persistent map from statements to (score, domain).
+
+    Each verdict records the version of the check that produced it; a lookup
+    only succeeds while that check's version is unchanged, so bumping a
+    check's `version` invalidates its stored verdicts.
+    """
+
+    def __init__(self, max_entries: int = 100_000, max_hamming_distance: int = 3,
+                 path: Optional[str] = None):
+        """
+        :param max_entries: Maximum number of verdicts kept; least recently used are dropped.
+        :param max_hamming_distance: Largest SimHash distance accepted as a near-duplicate
+            (at most SIMHASH_BANDS - 1; 0 disables near-duplicate lookup).
+        :param path: Optional JSON file the store is loaded from and saved to.
+        """
+        if not 0 <= max_hamming_distance < SIMHASH_BANDS:
+            raise ValueError(f"max_hamming_distance must be between 0 and {SIMHASH_BANDS - 1}")
+        self.max_entries = max_entries
+        self.max_hamming_distance = max_hamming_distance
+        self.path = path
+        self._entries: "OrderedDict[str, _Verdict]" = OrderedDict()
+        self._bands: List[Dict[int, Set[str]]] = [{} for _ in range(SIMHASH_BANDS)]
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, text: str, check_versions: Dict[str, str]) -> Optional[Tuple[float, str]]:
+        """
+        Return (score, domain) for the statement or a near-duplicate of it, or
+        None. check_versions maps each domain to the current version of its check.
+        """
+        normalized = normalize_statement(text)
+        with self._lock:
+            verdict = self._entries.get(normalized)
+            if verdict is not None and self._is_current(verdict, check_versions):
+                self._entries.move_to_end(normalized)
+                self.exact_hits += 1
+                return verdict.score, verdict.domain
+
+            if self.max_hamming_distance > 0:
+                match = self._find_near_duplicate(normalized, check_versions)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    verdict = self._entries[match]
+                    self.near_hits += 1
+                    debug_print(DEBUG_VERBOSE, f"Verdict store near-duplicate hit: '{text}' ~ '{match}'")
+                    return verdict.score, verdict.domain
+
+            self.misses += 1
+            return None
+
+    def store(self, text: str, score: float, domain: str, check_version: str) -> None:
+        normalized = normalize_statement(text)
+        if not normalized:
+            return
+        verdict = _Verdict(score, domain, check_version, simhash(normalized), _guard_signature(normalized))
+        with self._lock:
+            if normalized in self._entries:
+                self._unindex(normalized, self._entries[normalized])
+            self._entries[normalized] = verdict
+            self._entries.move_to_end(normalized)
+            self._index(normalized, verdict)
+            while len(self._entries) > self.max_entries:
+                oldest, old_verdict = self._entries.popitem(last=False)
+                self._unindex(oldest, old_verdict)
+
+    def invalidate(self, domain: Optional[str] = None) -> None:
+        """Drop every verdict, or only those of one domain."""
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if domain is None or v.domain == domain]:
+                self._unindex(key, self._entries.pop(key))
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.exact_hits + self.near_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.near_hits) / lookups if lookups else 0.0,
+        }
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given for saving the verdict store")
+        with self._lock:
+            records = [[k, v.score, v.domain, v.check_version] for k, v in self._entries.items()]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(records, f)
+        os.replace(tmp_path, path)
+        debug_print(DEBUG_INFO, f"Saved {len(records)} verdicts to {path}")
+
+    def load(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        with open(path, "r") as f:
+            records = json.load(f)
+        for normalized, score, domain, check_version in records:
+            self.store(normalized, score, domain, check_version)
+        debug_print(DEBUG_INFO, f"Loaded {len(records)} verdicts from {path}")
+
+    @staticmethod
+    def _is_current(verdict: _Verdict, check_versions: Dict[str, str]) -> bool:
+        return check_versions.get(verdict.domain) == verdict.check_version
+
+    def _find_near_duplicate(self, normalized: str, check_versions: Dict[str, str]) -> Optional[str]:
+        fingerprint = simhash(normalized)
+        guard = _guard_signature(normalized)
+        best_key, best_distance = None, self.max_hamming_distance + 1
+        for band, band_value in enumerate(self._band_values(fingerprint)):
+            for key in self._bands[band].get(band_value, ()):
+                verdict = self._entries[key]
+                if verdict.guard != guard or not self._is_current(verdict, check_versions):
+                    continue
+                distance = bin(verdict.fingerprint ^ fingerprint).count("1")
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+        return best_key
+
+    @staticmethod
+    def _band_values(fingerprint: int) -> List[int]:
+        return [(fingerprint >> (band * _BAND_BITS)) & _BAND_MASK for band in range(SIMHASH_BANDS)]
+
+    def _index(self, key: str, verdict: _Verdict) -> None:
+        for band, band_value in enumerate(self._band_values(verdict.fingerprint)):
+            self._bands[band].setdefault(band_value, set()).add(key)
+
+    def _unindex(self, key: str, verdict: _Verdict) -> None:
+        for band, band_value in enumerate(self._band_values(verdict.fingerprint)):
+            bucket = self._bands[band].get(band_value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._bands[band][band_value]
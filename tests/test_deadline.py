@@ -0,0 +1,41 @@
+import unittest
+from unittest import mock
+
+from hallucination_detection.deadline import FULL, NO_EXTERNAL, SMALL_MODEL, UNVERIFIED, Deadline
+
+
+class DeadlineLevelTest(unittest.TestCase):
+
+    def levels(self, budget: float, step: float = 0.05):
+        """Levels seen while walking the budget down in steps of step seconds."""
+        clock = [100.0]
+        with mock.patch("hallucination_detection.deadline.time.monotonic", lambda: clock[0]):
+            deadline = Deadline(budget)
+            seen = []
+            while clock[0] <= 100.0 + budget + step:
+                level = deadline.level()
+                if not seen or seen[-1] != level:
+                    seen.append(level)
+                clock[0] += step
+        return seen
+
+    def test_two_second_budget_walks_every_level(self):
+        self.assertEqual(self.levels(2.0), [FULL, NO_EXTERNAL, SMALL_MODEL, UNVERIFIED])
+
+    def test_short_budgets_degrade_in_order(self):
+        self.assertEqual(self.levels(1.6), [FULL, NO_EXTERNAL, SMALL_MODEL, UNVERIFIED])
+        self.assertEqual(self.levels(1.0), [NO_EXTERNAL, SMALL_MODEL, UNVERIFIED])
+
+    def test_large_budgets_use_fractions(self):
+        with mock.patch("hallucination_detection.deadline.time.monotonic", lambda: 0.0):
+            deadline = Deadline(20.0)
+        for remaining, level in ((10.5, FULL), (9.5, NO_EXTERNAL), (4.5, SMALL_MODEL), (0.4, UNVERIFIED)):
+            with mock.patch("hallucination_detection.deadline.time.monotonic", lambda: 20.0 - remaining):
+                self.assertEqual(deadline.level(), level, remaining)
+
+    def test_no_deadline_is_always_full(self):
+        self.assertEqual(Deadline(None).level(), FULL)
+
+
+if __name__ == "__main__":
+    unittest.main()
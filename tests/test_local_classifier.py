@@ -0,0 +1,30 @@
+import unittest
+
+from hallucination_detection.local_classifier import LocalDomainClassifier, extract_features
+
+
+class LocalClassifierTest(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = LocalDomainClassifier()
+
+    def test_factual_claims_with_evaluative_words_go_to_the_llm(self):
+        for text in ("The Great Wall of China is visible from space.",
+                     "The Great Barrier Reef is the largest coral reef system in the world.",
+                     "Aspirin should not be given to children with viral infections."):
+            self.assertNotIn("opinion", extract_features(text))
+            self.assertIsNone(self.classifier.predict(text)[0], text)
+
+    def test_none_is_never_answered_locally(self):
+        domain, confidence = self.classifier.predict("I think this movie is amazing.")
+        self.assertIsNone(domain)
+        self.assertGreater(confidence, self.classifier.threshold)
+
+    def test_year_ranges_and_dates_are_not_math(self):
+        self.assertNotIn("math_expression", extract_features("Lincoln served as president 1861-1865."))
+        self.assertNotIn("math_expression", extract_features("The Berlin Wall fell on 11/9/1989."))
+        self.assertEqual(self.classifier.predict("2 + 2 = 5")[0], "math")
+
+
+if __name__ == "__main__":
+    unittest.main()
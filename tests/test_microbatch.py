@@ -0,0 +1,59 @@
+import unittest
+from typing import List, Optional
+
+from hallucination_detection.deadline import FULL, UNVERIFIED, Deadline, current_deadline, deadline_scope
+from hallucination_detection.microbatch import MicroBatcher
+
+
+class RecordingCheck:
+    """Stands in for a check: records the deadline level each check_facts call ran at."""
+
+    max_batch_size = 8
+
+    def __init__(self):
+        self.calls = []
+
+    def check_facts(self, texts: List[str]) -> List[Optional[float]]:
+        level = current_deadline().level()
+        self.calls.append((sorted(texts), level))
+        return [0.9 if level == FULL else None for _ in texts]
+
+
+class MicroBatcherDeadlineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.check = RecordingCheck()
+        # A long max_wait so both statements land in the same micro-batch.
+        self.batcher = MicroBatcher(lambda domain: self.check, max_wait=0.2, workers=1)
+
+    def tearDown(self):
+        self.batcher.close()
+
+    def submit(self, text: str, budget: Optional[float]):
+        self.batcher.reserve(1)
+        with deadline_scope(Deadline(budget)):
+            return self.batcher.submit("general", text)
+
+    def test_tight_deadline_does_not_degrade_batch(self):
+        tight = self.submit("tight", 0.01)
+        generous = self.submit("generous", 60)
+        self.assertIsNone(tight.result(timeout=5))
+        self.assertEqual(generous.result(timeout=5), 0.9)
+        self.assertCountEqual(self.check.calls, [(["tight"], UNVERIFIED), (["generous"], FULL)])
+        self.assertEqual(self.batcher.pending, 0)
+
+    def test_same_level_statements_share_a_call(self):
+        first = self.submit("first", 60)
+        second = self.submit("second", 30)
+        self.assertEqual([first.result(timeout=5), second.result(timeout=5)], [0.9, 0.9])
+        self.assertEqual(self.check.calls, [(["first", "second"], FULL)])
+
+    def test_unlimited_statements_kept_apart_from_budgeted_ones(self):
+        budgeted = self.submit("budgeted", 60)
+        unlimited = self.submit("unlimited", None)
+        self.assertEqual([budgeted.result(timeout=5), unlimited.result(timeout=5)], [0.9, 0.9])
+        self.assertCountEqual(self.check.calls, [(["budgeted"], FULL), (["unlimited"], FULL)])
+
+
+if __name__ == "__main__":
+    unittest.main()
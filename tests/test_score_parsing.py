@@ -0,0 +1,30 @@
+import unittest
+
+from hallucination_detection.checks.base_check import BaseCheck, extract_score
+
+
+class ExtractScoreTest(unittest.TestCase):
+
+    def test_bare_scores_in_range(self):
+        self.assertEqual(extract_score("0.8"), 0.8)
+        self.assertEqual(extract_score(" 1 "), 1.0)
+        self.assertEqual(extract_score("0"), 0.0)
+        self.assertEqual(extract_score("1.0000001"), 1.0)
+
+    def test_bare_numbers_out_of_range_are_failures(self):
+        for answer in ("5", "7", "85", "1.5", "-0.2", "100"):
+            self.assertIsNone(extract_score(answer), answer)
+
+    def test_embedded_percentages_and_ratios(self):
+        self.assertEqual(extract_score("Score: 0.7"), 0.7)
+        self.assertEqual(extract_score("80%"), 0.8)
+        self.assertEqual(extract_score("7/10"), 0.7)
+        self.assertIsNone(extract_score("I would say 85"))
+
+    def test_numbered_lines_out_of_range_are_dropped(self):
+        parsed = BaseCheck._parse_numbered_scores("1. 0.9\n2. 85\n3. 7", 3)
+        self.assertEqual(parsed, {0: 0.9})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from hallucination_detection.verdict_store import VerdictStore
+
+STATEMENT = ("During the reign of Queen Victoria the industrial cities of Britain grew rapidly as workers "
+             "moved from farms to factories in search of steady wages and better housing.")
+VERSIONS = {"history": "1"}
+
+
+class VerdictStoreNearDuplicateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = VerdictStore()
+        self.store.store(STATEMENT, 0.95, "history", "1")
+
+    def test_exact_and_reworded_statements_hit(self):
+        self.assertEqual(self.store.lookup(STATEMENT.upper(), VERSIONS), (0.95, "history"))
+        reworded = STATEMENT.replace("of steady", "of the steady").replace("Britain grew", "Britain, grew")
+        self.assertEqual(self.store.lookup(reworded, VERSIONS), (0.95, "history"))
+
+    def test_reported_substitutions_miss(self):
+        for old, new in (("grew rapidly", "grew slowly"), ("Queen Victoria", "Spain Victoria"),
+                         ("cities", "King")):
+            self.assertIsNone(self.store.lookup(STATEMENT.replace(old, new), VERSIONS), new)
+
+    def test_no_single_content_word_substitution_hits(self):
+        words = STATEMENT.split()
+        replacements = ("slowly", "King", "Spain", "never", "not", "villages", "France", "1850", "after")
+        for i, word in enumerate(words):
+            for replacement in replacements:
+                if replacement.lower() == word.lower().strip("."):
+                    continue
+                changed = " ".join(words[:i] + [replacement] + words[i + 1:])
+                self.assertIsNone(self.store.lookup(changed, VERSIONS), changed)
+
+    def test_numbers_and_negation_still_guarded(self):
+        self.store.store("Napoleon was born in 1769.", 0.9, "history", "1")
+        self.assertIsNone(self.store.lookup("Napoleon was born in 1770.", VERSIONS))
+        self.assertIsNone(self.store.lookup("Napoleon was not born in 1769.", VERSIONS))
+
+
+if __name__ == "__main__":
+    unittest.main()